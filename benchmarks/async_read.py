@@ -0,0 +1,94 @@
+###############################################################################
+#
+# configglue -- glue for your apps' configuration
+#
+# A library for simple, DRY configuration of applications
+#
+# (C) 2009--2013 by Canonical Ltd.
+# by John R. Lenton <john.lenton@canonical.com>
+# and Ricardo Kirkner <ricardo.kirkner@canonical.com>
+#
+# Released under the BSD License (see the file LICENSE)
+#
+# For bug reports, support, and new releases: http://launchpad.net/configglue
+#
+"""Measure how long reading many configuration files stalls an event loop,
+reading them with read() or with aread().
+
+Run as:
+
+    python benchmarks/async_read.py
+
+"""
+import asyncio
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from configglue.parser import SchemaConfigParser  # noqa
+from configglue.schema import Schema  # noqa
+
+
+def make_files(folder, files, sections, options):
+    filenames = []
+    for n in range(files):
+        filename = os.path.join(folder, 'file%d.cfg' % n)
+        with open(filename, 'w') as f:
+            for i in range(sections):
+                f.write('[section%d]\n' % i)
+                for j in range(options):
+                    f.write('option%d = value %d of file %d\n' % (j, j, n))
+        filenames.append(filename)
+    return filenames
+
+
+async def measure(function):
+    """Return the time taken by function(), and the longest loop stall."""
+    stalls = []
+    done = asyncio.Event()
+
+    async def tick():
+        last = time.perf_counter()
+        while not done.is_set():
+            await asyncio.sleep(0.001)
+            now = time.perf_counter()
+            stalls.append(now - last)
+            last = now
+
+    ticker = asyncio.ensure_future(tick())
+    await asyncio.sleep(0.01)
+    start = time.perf_counter()
+    await function()
+    elapsed = time.perf_counter() - start
+    done.set()
+    await ticker
+    return elapsed, max(stalls)
+
+
+def main(files=50, sections=20, options=100):
+    folder = tempfile.mkdtemp()
+    try:
+        filenames = make_files(folder, files, sections, options)
+
+        async def read():
+            SchemaConfigParser(Schema()).read(filenames)
+
+        async def aread():
+            await SchemaConfigParser(Schema()).aread(filenames)
+
+        print("%d files of %d sections of %d options" % (
+            files, sections, options))
+        for function in (read, aread):
+            elapsed, stall = asyncio.run(measure(function))
+            print("  %-8s %8.2f ms total, loop stalled for %8.2f ms" % (
+                function.__name__, elapsed * 1000, stall * 1000))
+    finally:
+        shutil.rmtree(folder)
+
+
+if __name__ == '__main__':
+    main()
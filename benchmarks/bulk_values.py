@@ -0,0 +1,106 @@
+###############################################################################
+#
+# configglue -- glue for your apps' configuration
+#
+# A library for simple, DRY configuration of applications
+#
+# (C) 2009--2013 by Canonical Ltd.
+# by John R. Lenton <john.lenton@canonical.com>
+# and Ricardo Kirkner <ricardo.kirkner@canonical.com>
+#
+# Released under the BSD License (see the file LICENSE)
+#
+# For bug reports, support, and new releases: http://launchpad.net/configglue
+#
+"""Measure reading all the values of a large schema, with values() or by
+calling get() for each option, as values() used to. The best of several
+runs is reported.
+
+Run as:
+
+    python benchmarks/bulk_values.py
+
+"""
+import os
+import sys
+import timeit
+from io import BytesIO
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from configglue.parser import SchemaConfigParser  # noqa
+from configglue.schema import (  # noqa
+    BoolOption,
+    IntOption,
+    ListOption,
+    Schema,
+    Section,
+    StringOption,
+)
+
+# a mix of options, mostly scalars, with a few lists and values using other
+# options or the environment
+OPTIONS = [
+    (StringOption, 'value %d'),
+    (IntOption, '%d'),
+    (BoolOption, 'true'),
+    (StringOption, 'value %d'),
+    (IntOption, '%d'),
+    (ListOption, 'a%d\n    b\n    c'),
+    (StringOption, 'value %d'),
+    (IntOption, '%d'),
+    (BoolOption, 'false'),
+    (StringOption, '%(opt0)s/%d'),
+    (StringOption, 'value %d'),
+    (StringOption, '${HOME}/%d'),
+]
+
+
+def make_schema(sections, options):
+    attrs = {}
+    for i in range(sections):
+        section_attrs = {}
+        for j in range(options):
+            cls, value = OPTIONS[j % len(OPTIONS)]
+            kwargs = {'item': StringOption()} if cls is ListOption else {}
+            section_attrs['opt%d' % j] = cls(**kwargs)
+        attrs['section%d' % i] = type('section%d' % i, (Section,),
+                                      section_attrs)
+    return type('BenchmarkSchema', (Schema,), attrs)
+
+
+def make_config(sections, options):
+    lines = ['[DEFAULT]', 'base = /srv']
+    for i in range(sections):
+        lines.append('[section%d]' % i)
+        # leave some options to their defaults
+        for j in range(options - options // 10):
+            cls, value = OPTIONS[j % len(OPTIONS)]
+            lines.append('opt%d = %s' % (j, value.replace('%d', str(j))
+                                         if '%d' in value else value))
+    return '\n'.join(lines).encode('utf-8')
+
+
+def main(sections=30, options=100, repeat=20):
+    schema = make_schema(sections, options)()
+    parser = SchemaConfigParser(schema)
+    parser.readfp(BytesIO(make_config(sections, options)))
+
+    def get_each():
+        parser.clear_cache()
+        for section in schema.sections():
+            for option in schema.options(section):
+                parser.get(section.name, option.name)
+
+    def values():
+        parser.clear_cache()
+        parser.values()
+
+    print("%d options" % (sections * options))
+    for function in (get_each, values):
+        elapsed = min(timeit.repeat(function, number=1, repeat=repeat))
+        print("  %-16s %8.2f ms" % (function.__name__, elapsed * 1000))
+
+
+if __name__ == '__main__':
+    main()
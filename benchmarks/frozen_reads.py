@@ -0,0 +1,59 @@
+###############################################################################
+#
+# configglue -- glue for your apps' configuration
+#
+# A library for simple, DRY configuration of applications
+#
+# (C) 2009--2013 by Canonical Ltd.
+# by John R. Lenton <john.lenton@canonical.com>
+# and Ricardo Kirkner <ricardo.kirkner@canonical.com>
+#
+# Released under the BSD License (see the file LICENSE)
+#
+# For bug reports, support, and new releases: http://launchpad.net/configglue
+#
+"""Measure looking up values with get(), and in a frozen snapshot.
+
+Run as:
+
+    python benchmarks/frozen_reads.py
+
+"""
+import os
+import sys
+import timeit
+from io import BytesIO
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from configglue.parser import SchemaConfigParser  # noqa
+from configglue.schema import IntOption, Schema, Section  # noqa
+
+
+class BenchmarkSchema(Schema):
+    class server(Section):
+        port = IntOption()
+
+
+def main(number=1000000):
+    parser = SchemaConfigParser(BenchmarkSchema())
+    parser.readfp(BytesIO(b'[server]\nport = 8080\n'))
+    frozen = parser.freeze()
+
+    def get():
+        parser.get('server', 'port')
+
+    def getitem():
+        frozen['server']['port']
+
+    def getattr():
+        frozen.server.port
+
+    print("%d lookups" % number)
+    for function in (get, getitem, getattr):
+        elapsed = timeit.timeit(function, number=number) / number
+        print("  %-16s %8.3f us" % (function.__name__, elapsed * 1000000))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+###############################################################################
+#
+# configglue -- glue for your apps' configuration
+#
+# A library for simple, DRY configuration of applications
+#
+# (C) 2009--2013 by Canonical Ltd.
+# by John R. Lenton <john.lenton@canonical.com>
+# and Ricardo Kirkner <ricardo.kirkner@canonical.com>
+#
+# Released under the BSD License (see the file LICENSE)
+#
+# For bug reports, support, and new releases: http://launchpad.net/configglue
+#
+"""Measure the cost of reading interpolated values, with and without
+resolving them first.
+
+Run as:
+
+    python benchmarks/interpolation.py
+
+"""
+import os
+import sys
+import timeit
+from io import BytesIO
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from configglue.parser import SchemaConfigParser  # noqa
+from configglue.schema import Schema, Section, StringOption  # noqa
+
+
+def make_schema(sections, options):
+    attrs = {}
+    for i in range(sections):
+        section_attrs = dict(('opt%d' % j, StringOption())
+                             for j in range(options))
+        attrs['section%d' % i] = type('section%d' % i, (Section,),
+                                      section_attrs)
+    return type('BenchmarkSchema', (Schema,), attrs)
+
+
+def make_config(sections, options, depth):
+    lines = []
+    for i in range(sections):
+        lines.append('[section%d]' % i)
+        for j in range(options):
+            if j % depth:
+                # each value references the previous one
+                lines.append('opt%d = %%(opt%d)s/%d' % (j, j - 1, j))
+            else:
+                lines.append('opt%d = root%d' % (j, j))
+    return '\n'.join(lines).encode('utf-8')
+
+
+def main(sections=20, options=100, depth=9, repeat=5):
+    schema = make_schema(sections, options)()
+    config = make_config(sections, options, depth)
+
+    def read(resolve):
+        parser = SchemaConfigParser(schema)
+        parser.readfp(BytesIO(config))
+        if resolve:
+            parser.resolve()
+        parser.values()
+
+    print("%d interpolated values, chains of %d" % (sections * options,
+                                                    depth))
+    for name, resolve in (('lazy', False), ('resolved', True)):
+        elapsed = timeit.timeit(lambda: read(resolve),
+                                number=repeat) / repeat
+        print("  %-24s %8.2f ms" % (name, elapsed * 1000))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+###############################################################################
+#
+# configglue -- glue for your apps' configuration
+#
+# A library for simple, DRY configuration of applications
+#
+# (C) 2009--2013 by Canonical Ltd.
+# by John R. Lenton <john.lenton@canonical.com>
+# and Ricardo Kirkner <ricardo.kirkner@canonical.com>
+#
+# Released under the BSD License (see the file LICENSE)
+#
+# For bug reports, support, and new releases: http://launchpad.net/configglue
+#
+"""Measure the cost of reading a large, machine generated configuration
+file, completely or lazily.
+
+Run as:
+
+    python benchmarks/large_file.py
+
+"""
+import os
+import sys
+import tempfile
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from configglue._compat import RawConfigParser  # noqa
+from configglue.parser import SchemaConfigParser  # noqa
+from configglue.schema import Schema  # noqa
+
+
+def make_file(filename, sections, options):
+    with open(filename, 'w') as f:
+        for i in range(sections):
+            f.write('[section%d]\n' % i)
+            f.write('# generated section %d\n' % i)
+            for j in range(options):
+                if j % 10:
+                    f.write('option%d = value %d of section %d\n' % (j, j, i))
+                else:
+                    f.write('option%d =\n    first %d\n    second %d\n\n' % (
+                        j, j, i))
+
+
+def main(sections=2000, options=250, repeat=3):
+    fd, filename = tempfile.mkstemp(suffix='.cfg')
+    os.close(fd)
+    try:
+        make_file(filename, sections, options)
+        size = os.path.getsize(filename)
+
+        def read_configparser():
+            RawConfigParser().read(filename)
+
+        def read_configglue():
+            SchemaConfigParser(Schema()).read(filename)
+
+        def read_configglue_lazy():
+            # only a few sections are used
+            parser = SchemaConfigParser(Schema())
+            parser.read(filename, lazy=True)
+            for i in range(0, sections, sections // 10):
+                parser.items('section%d' % i)
+
+        print("%d sections of %d options, %.1f MB" % (
+            sections, options, size / 1024.0 / 1024))
+        for function in (read_configparser, read_configglue,
+                         read_configglue_lazy):
+            elapsed = timeit.timeit(function, number=repeat) / repeat
+            print("  %-24s %8.2f ms" % (function.__name__, elapsed * 1000))
+    finally:
+        os.remove(filename)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+###############################################################################
+#
+# configglue -- glue for your apps' configuration
+#
+# A library for simple, DRY configuration of applications
+#
+# (C) 2009--2013 by Canonical Ltd.
+# by John R. Lenton <john.lenton@canonical.com>
+# and Ricardo Kirkner <ricardo.kirkner@canonical.com>
+#
+# Released under the BSD License (see the file LICENSE)
+#
+# For bug reports, support, and new releases: http://launchpad.net/configglue
+#
+"""Measure the cost of reading many layered configuration files.
+
+Run as:
+
+    python benchmarks/layered_files.py
+
+"""
+import os
+import shutil
+import sys
+import tempfile
+import timeit
+from io import BytesIO
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from configglue.parser import SchemaConfigParser  # noqa
+from configglue.schema import Schema, Section, StringOption  # noqa
+
+
+def make_schema(sections, options):
+    attrs = {}
+    for i in range(sections):
+        section_attrs = dict(('opt%d' % j, StringOption())
+                             for j in range(options))
+        attrs['section%d' % i] = type('section%d' % i, (Section,),
+                                      section_attrs)
+    return type('BenchmarkSchema', (Schema,), attrs)
+
+
+def make_files(folder, files, sections, options):
+    filenames = []
+    for n in range(files):
+        lines = []
+        for i in range(sections):
+            lines.append('[section%d]' % i)
+            # each layer overrides a slice of the options
+            for j in range(1 + n % files, options, files):
+                lines.append('opt%d = layer%d' % (j, n))
+            lines.append('opt0 = layer%d' % n)
+        filename = os.path.join(folder, 'layer%02d.cfg' % n)
+        with open(filename, 'w') as f:
+            f.write('\n'.join(lines))
+        filenames.append(filename)
+    return filenames
+
+
+def main(files=60, sections=50, options=200, repeat=5):
+    schema = make_schema(sections, options)()
+    folder = tempfile.mkdtemp()
+    try:
+        filenames = make_files(folder, files, sections, options)
+
+        contents = []
+        for filename in filenames:
+            with open(filename, 'rb') as f:
+                contents.append(f.read())
+
+        def read():
+            parser = SchemaConfigParser(schema)
+            parser.read(filenames)
+
+        def readfp():
+            parser = SchemaConfigParser(schema)
+            for filename, content in zip(filenames, contents):
+                parser.readfp(BytesIO(content), filename)
+
+        print("%d layered files, %d sections of %d options" % (
+            files, sections, options))
+        for function in (read, readfp):
+            elapsed = timeit.timeit(function, number=repeat) / repeat
+            print("  %-24s %8.2f ms" % (function.__name__, elapsed * 1000))
+    finally:
+        shutil.rmtree(folder)
+
+
+if __name__ == '__main__':
+    main()
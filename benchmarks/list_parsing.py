@@ -0,0 +1,64 @@
+###############################################################################
+#
+# configglue -- glue for your apps' configuration
+#
+# A library for simple, DRY configuration of applications
+#
+# (C) 2009--2013 by Canonical Ltd.
+# by John R. Lenton <john.lenton@canonical.com>
+# and Ricardo Kirkner <ricardo.kirkner@canonical.com>
+#
+# Released under the BSD License (see the file LICENSE)
+#
+# For bug reports, support, and new releases: http://launchpad.net/configglue
+#
+"""Measure the cost of parsing ListOptions with 50000 items.
+
+Run as:
+
+    python benchmarks/list_parsing.py
+
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from configglue.schema import (  # noqa
+    BoolOption,
+    IntOption,
+    ListOption,
+    StringOption,
+    TupleOption,
+)
+
+
+def main(items=50000, repeat=5):
+    values = {
+        'StringOption': '\n'.join('host%d.example.com' % i
+                                  for i in range(items)),
+        'IntOption': '\n'.join(str(i) for i in range(items)),
+        'BoolOption': '\n'.join(('yes', 'no', 'On')[i % 3]
+                                for i in range(items)),
+        'TupleOption': '\n'.join('host%d, %d' % (i, i) for i in range(items)),
+    }
+    options = [StringOption(), IntOption(), BoolOption(),
+               TupleOption(length=2)]
+    print("%d-item ListOption parsing" % items)
+    for item in options:
+        option = ListOption(item=item)
+        value = values[type(item).__name__]
+        elapsed = timeit.timeit(lambda: option.parse(value),
+                                number=repeat) / repeat
+        print("  %-24s %8.2f ms" % (type(item).__name__, elapsed * 1000))
+
+    option = ListOption(item=StringOption(), remove_duplicates=True)
+    value = '\n'.join([values['StringOption']] * 2)
+    elapsed = timeit.timeit(lambda: option.parse(value),
+                            number=repeat) / repeat
+    print("  %-24s %8.2f ms" % ('StringOption, duplicates', elapsed * 1000))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+###############################################################################
+#
+# configglue -- glue for your apps' configuration
+#
+# A library for simple, DRY configuration of applications
+#
+# (C) 2009--2013 by Canonical Ltd.
+# by John R. Lenton <john.lenton@canonical.com>
+# and Ricardo Kirkner <ricardo.kirkner@canonical.com>
+#
+# Released under the BSD License (see the file LICENSE)
+#
+# For bug reports, support, and new releases: http://launchpad.net/configglue
+#
+"""Measure reading configuration files with I/O latency, sequentially and
+using threads.
+
+Run as:
+
+    python benchmarks/parallel_read.py
+
+"""
+import codecs
+import os
+import shutil
+import sys
+import tempfile
+import time
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from configglue.parser import SchemaConfigParser  # noqa
+from configglue.schema import Schema, StringOption  # noqa
+
+
+class BenchmarkSchema(Schema):
+    foo = StringOption()
+
+
+def make_files(folder, files, includes):
+    filenames = []
+    for n in range(files):
+        lines = ['[__main__]', 'foo = file%d' % n, 'includes =']
+        for i in range(includes):
+            name = 'file%d-include%d.cfg' % (n, i)
+            lines.append('    %s' % name)
+            with open(os.path.join(folder, name), 'w') as f:
+                f.write('[__main__]\nfoo = include%d\n' % i)
+        filename = os.path.join(folder, 'file%d.cfg' % n)
+        with open(filename, 'w') as f:
+            f.write('\n'.join(lines))
+        filenames.append(filename)
+    return filenames
+
+
+def slow_open(latency):
+    def open(*args, **kwargs):
+        # simulate a network mounted volume
+        time.sleep(latency)
+        return codecs_open(*args, **kwargs)
+    codecs_open = codecs.open
+    return open
+
+
+def main(files=20, includes=3, latency=0.005, repeat=3):
+    folder = tempfile.mkdtemp()
+    codecs_open = codecs.open
+    codecs.open = slow_open(latency)
+    try:
+        filenames = make_files(folder, files, includes)
+        print("%d files including %d files each, %d ms latency" % (
+            files, includes, latency * 1000))
+        for workers in (None, 4, 16):
+            def read():
+                parser = SchemaConfigParser(BenchmarkSchema())
+                parser.read(filenames, workers=workers)
+            elapsed = timeit.timeit(read, number=repeat) / repeat
+            print("  workers=%-16s %8.2f ms" % (workers, elapsed * 1000))
+    finally:
+        codecs.open = codecs_open
+        shutil.rmtree(folder)
+
+
+if __name__ == '__main__':
+    main()
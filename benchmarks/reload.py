@@ -0,0 +1,74 @@
+###############################################################################
+#
+# configglue -- glue for your apps' configuration
+#
+# A library for simple, DRY configuration of applications
+#
+# (C) 2009--2013 by Canonical Ltd.
+# by John R. Lenton <john.lenton@canonical.com>
+# and Ricardo Kirkner <ricardo.kirkner@canonical.com>
+#
+# Released under the BSD License (see the file LICENSE)
+#
+# For bug reports, support, and new releases: http://launchpad.net/configglue
+#
+"""Measure applying a change to one of many configuration files, by
+reloading it or by reading all the files again.
+
+Run as:
+
+    python benchmarks/reload.py
+
+"""
+import os
+import shutil
+import sys
+import tempfile
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from configglue.parser import SchemaConfigParser  # noqa
+from configglue.schema import Schema  # noqa
+
+
+def make_files(folder, files, sections, options):
+    filenames = []
+    for n in range(files):
+        filename = os.path.join(folder, 'file%d.cfg' % n)
+        with open(filename, 'w') as f:
+            for i in range(sections):
+                f.write('[section%d]\n' % i)
+                for j in range(options):
+                    f.write('option%d = value %d of file %d\n' % (j, j, n))
+        filenames.append(filename)
+    return filenames
+
+
+def main(files=50, sections=20, options=100, repeat=5):
+    folder = tempfile.mkdtemp()
+    try:
+        filenames = make_files(folder, files, sections, options)
+        parser = SchemaConfigParser(Schema())
+        parser.read(filenames)
+        watcher = parser.watch(inotify=False)
+        changed = filenames[files // 2]
+
+        def read():
+            SchemaConfigParser(Schema()).read(filenames)
+
+        def reload():
+            parser._reload([changed])
+
+        print("%d files of %d sections of %d options" % (
+            files, sections, options))
+        for function in (read, reload):
+            elapsed = timeit.timeit(function, number=repeat) / repeat
+            print("  %-16s %8.2f ms" % (function.__name__, elapsed * 1000))
+        watcher.stop()
+    finally:
+        shutil.rmtree(folder)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+###############################################################################
+#
+# configglue -- glue for your apps' configuration
+#
+# A library for simple, DRY configuration of applications
+#
+# (C) 2009--2013 by Canonical Ltd.
+# by John R. Lenton <john.lenton@canonical.com>
+# and Ricardo Kirkner <ricardo.kirkner@canonical.com>
+#
+# Released under the BSD License (see the file LICENSE)
+#
+# For bug reports, support, and new releases: http://launchpad.net/configglue
+#
+###############################################################################
+"""Measure the cost of instantiating a schema with 5000 options.
+
+Run as:
+
+    python benchmarks/schema_instantiation.py
+
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from configglue.schema import (  # noqa
+    IntOption,
+    ListOption,
+    Schema,
+    Section,
+    StringOption,
+)
+
+
+def make_schema(sections=50, options=100):
+    """Return a Schema class with sections * options options."""
+    attrs = {}
+    for i in range(sections):
+        section_attrs = {}
+        for j in range(options):
+            if j % 3 == 0:
+                option = IntOption(default=j)
+            elif j % 3 == 1:
+                option = StringOption(help='option %d' % j)
+            else:
+                option = ListOption(item=StringOption())
+            section_attrs['option%d' % j] = option
+        attrs['section%d' % i] = type('section%d' % i, (Section,),
+                                      section_attrs)
+    return type('LargeSchema', (Schema,), attrs)
+
+
+def main():
+    schema_class = make_schema()
+    first = timeit.timeit(schema_class, number=1)
+    repeat = 20
+    others = timeit.timeit(schema_class, number=repeat) / repeat
+    print("5000-option schema instantiation")
+    print("  first instance:     %8.2f ms" % (first * 1000))
+    print("  further instances:  %8.2f ms" % (others * 1000))
+
+    def lazy():
+        schema = make_schema()(lazy=True)
+        schema.section('section0').option0
+    # include the class creation in both timings, so that the first lazy
+    # instance is not helped by a cached definition
+    eager_first = timeit.timeit(lambda: make_schema()(), number=1)
+    lazy_first = timeit.timeit(lazy, number=1)
+    print("  first instance, using one section (class creation included)")
+    print("    eager:            %8.2f ms" % (eager_first * 1000))
+    print("    lazy:             %8.2f ms" % (lazy_first * 1000))
+
+    data = schema_class().dumps()
+    loads = timeit.timeit(lambda: Schema.loads(data), number=repeat) / repeat
+    print("  loaded from %d serialized bytes: %8.2f ms" % (
+        len(data), loads * 1000))
+
+
+if __name__ == '__main__':
+    main()
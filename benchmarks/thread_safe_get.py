@@ -0,0 +1,73 @@
+###############################################################################
+#
+# configglue -- glue for your apps' configuration
+#
+# A library for simple, DRY configuration of applications
+#
+# (C) 2009--2013 by Canonical Ltd.
+# by John R. Lenton <john.lenton@canonical.com>
+# and Ricardo Kirkner <ricardo.kirkner@canonical.com>
+#
+# Released under the BSD License (see the file LICENSE)
+#
+# For bug reports, support, and new releases: http://launchpad.net/configglue
+#
+"""Measure the overhead of ThreadSafeSchemaConfigParser.get(), and the cost
+of publishing changes.
+
+Run as:
+
+    python benchmarks/thread_safe_get.py
+
+"""
+import os
+import sys
+import timeit
+from io import BytesIO
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from configglue.parser import (  # noqa
+    SchemaConfigParser,
+    ThreadSafeSchemaConfigParser,
+)
+from configglue.schema import IntOption, Schema, Section  # noqa
+
+
+class BenchmarkSchema(Schema):
+    class server(Section):
+        port = IntOption()
+
+
+CONFIG = b'[server]\nport = 8080\n' + b''.join(
+    b'[section%d]\n' % i + b''.join(b'option%d = %d\n' % (j, j)
+                                    for j in range(100))
+    for i in range(100))
+
+
+def main(number=1000000, changes=100):
+    print("get(), %d lookups" % number)
+    for cls in (SchemaConfigParser, ThreadSafeSchemaConfigParser):
+        parser = cls(BenchmarkSchema())
+        parser.readfp(BytesIO(CONFIG))
+
+        def get():
+            parser.get('server', 'port')
+
+        elapsed = timeit.timeit(get, number=number) / number
+        print("  %-30s %8.3f us" % (cls.__name__, elapsed * 1000000))
+
+    print("set(), %d changes to 10000 options" % changes)
+    for cls in (SchemaConfigParser, ThreadSafeSchemaConfigParser):
+        parser = cls(BenchmarkSchema())
+        parser.readfp(BytesIO(CONFIG))
+
+        def set():
+            parser.set('server', 'port', 8000)
+
+        elapsed = timeit.timeit(set, number=changes) / changes
+        print("  %-30s %8.3f ms" % (cls.__name__, elapsed * 1000))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+###############################################################################
+#
+# configglue -- glue for your apps' configuration
+#
+# A library for simple, DRY configuration of applications
+#
+# (C) 2009--2013 by Canonical Ltd.
+# by John R. Lenton <john.lenton@canonical.com>
+# and Ricardo Kirkner <ricardo.kirkner@canonical.com>
+#
+# Released under the BSD License (see the file LICENSE)
+#
+# For bug reports, support, and new releases: http://launchpad.net/configglue
+#
+"""Measure validating a configuration spread over many files, some of them
+with errors.
+
+Run as:
+
+    python benchmarks/validation.py
+
+"""
+import os
+import shutil
+import sys
+import tempfile
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from configglue.parser import SchemaConfigParser  # noqa
+from configglue.schema import (  # noqa
+    BoolOption,
+    IntOption,
+    Schema,
+    Section,
+    StringOption,
+)
+
+
+def make_schema(sections, options):
+    attrs = {}
+    for i in range(sections):
+        section_attrs = {}
+        for j in range(options):
+            if j % 3 == 0:
+                section_attrs['opt%d' % j] = IntOption(fatal=(j == 0))
+            elif j % 3 == 1:
+                section_attrs['opt%d' % j] = BoolOption()
+            else:
+                section_attrs['opt%d' % j] = StringOption()
+        attrs['section%d' % i] = type('section%d' % i, (Section,),
+                                      section_attrs)
+    return type('BenchmarkSchema', (Schema,), attrs)
+
+
+def make_files(folder, files, sections, options, broken):
+    """Write one file per section, with an error in every *broken* files."""
+    filenames = []
+    for n in range(files):
+        filename = os.path.join(folder, 'file%d.cfg' % n)
+        with open(filename, 'w') as f:
+            f.write('[section%d]\n' % (n % sections))
+            for j in range(options):
+                value = ('%d' % j, 'true', 'value %d' % j)[j % 3]
+                if n % broken == 0 and j == 3:
+                    value = 'not a number'
+                f.write('opt%d = %s\n' % (j, value))
+            if n % broken == 1:
+                f.write('unknown = 1\n')
+        filenames.append(filename)
+    return filenames
+
+
+def main(files=60, options=50, broken=10, repeat=10):
+    schema = make_schema(files, options)()
+    folder = tempfile.mkdtemp()
+    try:
+        filenames = make_files(folder, files, files, options, broken)
+        parser = SchemaConfigParser(schema)
+        parser.read(filenames)
+
+        def validate():
+            parser.clear_cache()
+            return parser.validate()
+
+        errors = validate()
+        print("%d files of %d options, %d problems found in one pass" % (
+            files, options, len(errors)))
+        elapsed = min(timeit.repeat(validate, number=1, repeat=repeat))
+        print("  %-16s %8.2f ms" % ('validate', elapsed * 1000))
+    finally:
+        shutil.rmtree(folder)
+
+
+if __name__ == '__main__':
+    main()
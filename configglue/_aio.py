@@ -0,0 +1,233 @@
+###############################################################################
+#
+# configglue -- glue for your apps' configuration
+#
+# A library for simple, DRY configuration of applications
+#
+# (C) 2009--2013 by Canonical Ltd.
+# by John R. Lenton <john.lenton@canonical.com>
+# and Ricardo Kirkner <ricardo.kirkner@canonical.com>
+#
+# Released under the BSD License (see the file LICENSE)
+#
+# For bug reports, support, and new releases: http://launchpad.net/configglue
+#
+###############################################################################
+"""Reading and reloading configuration files from asyncio code.
+
+Files are read and tokenized in the default executor of the running event
+loop, so the loop keeps serving other tasks; their values are then applied
+to the parser on the loop, in one step. Cancelling a read before its values
+are applied leaves the parser unchanged.
+
+"""
+import asyncio
+import collections
+import logging
+
+from ._compat import string_types
+from ._watch import _InotifyBackend, _backend
+
+
+__all__ = [
+    'read',
+    'reload',
+    'watch',
+]
+
+logger = logging.getLogger(__name__)
+
+
+async def _fetch(paths, read_file, get_includes, requested=()):
+    """Read files, and the files they include, off the event loop.
+
+    Each file is read by calling *read_file* with its path in the default
+    executor; *get_includes* is called with the path and the result, and
+    returns the paths of the files to read next. Files in *requested* are
+    not read. Return the results by path.
+
+    """
+    loop = asyncio.get_running_loop()
+    fetched = {}
+    requested = set(requested)
+    pending = {}
+
+    def submit(paths):
+        for path in paths:
+            if path not in requested:
+                requested.add(path)
+                pending[loop.run_in_executor(None, read_file, path)] = path
+
+    submit(paths)
+    try:
+        while pending:
+            done, _ = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED)
+            for future in done:
+                path = pending.pop(future)
+                result = fetched[path] = future.result()
+                submit(get_includes(path, result))
+    finally:
+        # files being read can't be interrupted, but their results are
+        # dropped
+        for future in pending:
+            future.cancel()
+    return fetched
+
+
+async def read(parser, filenames, already_read=None, lazy=False):
+    """Read files like parser.read(), without blocking the event loop."""
+    if already_read is None:
+        already_read = set()
+    if isinstance(filenames, string_types):
+        filenames = [filenames]
+    paths = parser._normalize_paths(filenames)
+
+    def read_file(path):
+        try:
+            result = parser._read_file(path, lazy)
+            if result is None:
+                return None, [], None
+            includes = parser._get_includes(path, *result[:2])
+        except Exception as e:
+            # raised again when the file is loaded
+            return e, [], None
+        layer = None
+        if not lazy:
+            # applying the values modifies them, so keep a copy of them
+            # for reloading the file later
+            layer = (_copy_sections(result[0]), result[2], includes)
+        return result, includes, layer
+
+    fetched = await _fetch(paths, read_file, lambda path, read: read[1],
+                           already_read)
+    layers = dict((path, read[2]) for path, read in fetched.items()
+                  if read[2] is not None)
+    fetched = dict((path, read[0]) for path, read in fetched.items())
+    read_ok = parser._read_files(filenames, paths, already_read, fetched,
+                                 lazy)
+    if not lazy:
+        _keep_layers(parser, layers)
+    return read_ok
+
+
+def _copy_sections(sections):
+    return collections.OrderedDict(
+        (name, collections.OrderedDict(options))
+        for name, options in sections.items())
+
+
+def _keep_layers(parser, layers):
+    """Keep the values of the files just read, to reload them later.
+
+    The values of every file in the include graph must be known, so
+    nothing is kept if other files were read some other way.
+
+    """
+    known = parser._layers or {}
+    kept = collections.OrderedDict()
+    for path in parser.include_graph:
+        layer = layers.get(path, known.get(path))
+        if layer is None:
+            return
+        kept[path] = layer
+    parser._watch_layers(kept)
+
+
+async def _watch_files(parser):
+    """Keep the values of the files read, reading them off the loop."""
+    loop = asyncio.get_running_loop()
+    paths = list(parser.include_graph)
+    layers = await asyncio.gather(*[
+        loop.run_in_executor(None, parser._read_layer, path)
+        for path in paths])
+    parser._watch_layers(collections.OrderedDict(zip(paths, layers)))
+
+
+async def _reload(parser, paths):
+    """Read some files again off the loop, and apply their changes."""
+    fetched = await _fetch(
+        paths, parser._read_layer, lambda path, layer: layer[2],
+        set(parser._layers).difference(paths))
+    changed = [path for path in paths
+               if fetched.get(path) != parser._layers.get(path)]
+    if not changed:
+        return set()
+    return parser._reload(changed, fetched)
+
+
+async def reload(parser):
+    """Read all the files again, without blocking the event loop.
+
+    Return the set of (section, option) keys whose values changed. If the
+    files were not read with aread(), the first call only records their
+    values, and returns an empty set.
+
+    """
+    if parser._layers is None:
+        await _watch_files(parser)
+        return set()
+    return await _reload(parser, list(parser.include_graph))
+
+
+async def _wait(backend, timeout=None):
+    """Return the files changed, waiting up to *timeout* seconds.
+
+    Wait for as long as it takes if *timeout* is None.
+
+    """
+    loop = asyncio.get_running_loop()
+    if isinstance(backend, _InotifyBackend):
+        ready = asyncio.Event()
+        loop.add_reader(backend.fileno(), ready.set)
+        try:
+            await asyncio.wait_for(ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            return set()
+        finally:
+            loop.remove_reader(backend.fileno())
+        return backend.changes()
+    deadline = None if timeout is None else loop.time() + timeout
+    while True:
+        changed = await loop.run_in_executor(None, backend.changes)
+        if changed:
+            return changed
+        delay = backend.interval
+        if deadline is not None:
+            delay = min(delay, deadline - loop.time())
+            if delay <= 0:
+                return changed
+        await asyncio.sleep(delay)
+
+
+async def watch(parser, interval=1.0, debounce=0.1, inotify=True):
+    """Reload the files read by a parser when they change.
+
+    Yield the set of (section, option) keys whose values changed after
+    each reload; see Watcher for the arguments.
+
+    """
+    if parser._layers is None:
+        await _watch_files(parser)
+    backend = _backend(parser._watched_paths(), interval, inotify)
+    try:
+        while True:
+            changed = set()
+            while not changed:
+                changed = await _wait(backend)
+            while True:
+                more = await _wait(backend, debounce)
+                if not more:
+                    break
+                changed.update(more)
+            try:
+                keys = await _reload(parser, list(changed))
+            except Exception:
+                # keep the values read so far, and watch for a fix
+                logger.exception('Configuration files could not be reloaded.')
+                continue
+            backend.set_paths(parser._watched_paths())
+            if keys:
+                yield keys
+    finally:
+        backend.close()
@@ -0,0 +1,139 @@
+###############################################################################
+#
+# configglue -- glue for your apps' configuration
+#
+# A library for simple, DRY configuration of applications
+#
+# (C) 2009--2013 by Canonical Ltd.
+# by John R. Lenton <john.lenton@canonical.com>
+# and Ricardo Kirkner <ricardo.kirkner@canonical.com>
+#
+# Released under the BSD License (see the file LICENSE)
+#
+# For bug reports, support, and new releases: http://launchpad.net/configglue
+#
+###############################################################################
+"""On-disk snapshots of the configuration files read by a parser.
+
+A snapshot holds the values read from a set of files, with their line
+numbers and includes, so they can be loaded again without parsing the files
+as long as none of them changed.
+
+"""
+import collections
+import errno
+import hashlib
+import marshal
+import os
+import tempfile
+
+from ._compat import replace_file
+
+
+__all__ = [
+    'dump',
+    'file_key',
+    'is_current',
+    'load',
+    'pack_sections',
+    'snapshot_path',
+    'unpack_sections',
+]
+
+# version of the structure of snapshots
+_FORMAT = 1
+
+
+def file_key(stat, data):
+    """Return the key of a file, given its stat() result and content."""
+    return (stat.st_mtime, stat.st_size, hashlib.sha1(data).hexdigest())
+
+
+def is_current(path, key):
+    """Return whether a file still has the given key.
+
+    A key of None stands for a file that couldn't be read. The content of
+    the file is only checked if its size is unchanged but it was modified.
+
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return key is None
+    if key is None:
+        return False
+    mtime, size, digest = key
+    if stat.st_size != size:
+        return False
+    if stat.st_mtime == mtime:
+        return True
+    try:
+        with open(path, 'rb') as fp:
+            data = fp.read()
+    except IOError:
+        return False
+    return hashlib.sha1(data).hexdigest() == digest
+
+
+def snapshot_path(cache_dir, paths, fingerprint):
+    """Return the file holding the snapshot of reading some files."""
+    digest = hashlib.sha1(
+        repr((_FORMAT, list(paths), fingerprint)).encode('utf-8'))
+    return os.path.join(cache_dir, '%s.snapshot' % digest.hexdigest())
+
+
+def pack_sections(sections):
+    """Return the sections read from a file in a marshallable form."""
+    return [(name, list(options.items()))
+            for name, options in sections.items()]
+
+
+def unpack_sections(packed):
+    """Return the sections packed by pack_sections()."""
+    return collections.OrderedDict(
+        (name, collections.OrderedDict(options)) for name, options in packed)
+
+
+def load(filename):
+    """Return the data of a snapshot.
+
+    Return None if there's no snapshot, or if any of the files it was
+    made of changed.
+
+    """
+    try:
+        with open(filename, 'rb') as fp:
+            data = marshal.loads(fp.read())
+    except (IOError, OSError, EOFError, ValueError, TypeError):
+        return None
+    if not isinstance(data, dict) or data.get('format') != _FORMAT:
+        return None
+    for path, key in data['files']:
+        if not is_current(path, key):
+            return None
+    return data
+
+
+def dump(filename, data):
+    """Write a snapshot.
+
+    The snapshot is written to a temporary file which is then renamed, so
+    readers never see it half written, even if several processes write it
+    at the same time.
+
+    """
+    content = marshal.dumps(dict(data, format=_FORMAT))
+    directory = os.path.dirname(filename)
+    try:
+        os.makedirs(directory)
+    except OSError as e:
+        if e.errno != errno.EEXIST:
+            raise
+    fd, temp = tempfile.mkstemp(dir=directory, prefix='.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as fp:
+            fp.write(content)
+        replace_file(temp, filename)
+    except Exception:
+        os.remove(temp)
+        raise
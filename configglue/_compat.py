@@ -15,6 +15,7 @@
 # For bug reports, support, and new releases: http://launchpad.net/configglue
 #
 ###############################################################################
+import os
 import re
 import sys
 
@@ -27,6 +28,7 @@ if PY2:
     from ConfigParser import (
         DEFAULTSECT,
         InterpolationDepthError,
+        InterpolationError,
         InterpolationMissingOptionError,
         InterpolationSyntaxError,
         NoOptionError,
@@ -117,6 +119,8 @@ if PY2:
     text_type = unicode
     string_types = (str, unicode)
     iteritems = lambda d: d.iteritems()
+    # atomic on POSIX, where it replaces existing files too
+    replace_file = os.rename
 
 else:
     import builtins
@@ -124,6 +128,7 @@ else:
     from backports.configparser import (
         DEFAULTSECT,
         InterpolationDepthError,
+        InterpolationError,
         InterpolationMissingOptionError,
         InterpolationSyntaxError,
         NoOptionError,
@@ -135,3 +140,16 @@ else:
     text_type = str
     string_types = (str,)
     iteritems = lambda d: iter(d.items())
+    replace_file = os.replace
+
+
+def with_metaclass(meta, *bases):
+    """Create a base class with a metaclass.
+
+    Works the same in both python 2 and 3 (borrowed from six).
+
+    """
+    class metaclass(meta):
+        def __new__(cls, name, this_bases, d):
+            return meta(name, bases, d)
+    return type.__new__(metaclass, 'temporary_class', (), {})
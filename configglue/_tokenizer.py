@@ -0,0 +1,269 @@
+###############################################################################
+#
+# configglue -- glue for your apps' configuration
+#
+# A library for simple, DRY configuration of applications
+#
+# (C) 2009--2013 by Canonical Ltd.
+# by John R. Lenton <john.lenton@canonical.com>
+# and Ricardo Kirkner <ricardo.kirkner@canonical.com>
+#
+# Released under the BSD License (see the file LICENSE)
+#
+# For bug reports, support, and new releases: http://launchpad.net/configglue
+#
+###############################################################################
+"""Tokenizer for configglue's dialect of INI files.
+
+It accepts the same syntax as ConfigParser with its default settings, and
+raises the same errors, but reads the values directly into new section
+dicts.
+
+"""
+import codecs
+import collections
+import mmap
+import os
+import re
+
+from ._compat import DEFAULTSECT, configparser
+
+
+__all__ = [
+    'LazySection',
+    'read',
+    'tokenize',
+    'tokenize_lazily',
+]
+
+# files at least this big are mapped into memory instead of read
+MMAP_THRESHOLD = 1024 * 1024
+
+_SECTION_RE = re.compile(r'\[(?P<header>[^]]+)\]')
+# section headers at the start of a line
+_HEADER_RE = re.compile(r'\[(?P<header>[^]\r\n]+)\]')
+# line breaks other than \n and \r\n, which str.splitlines() also splits on
+_LINE_BREAKS = '\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029'
+
+
+def read(fp, encoding):
+    """Return the decoded content of a file opened in binary mode."""
+    try:
+        size = os.fstat(fp.fileno()).st_size
+    except (AttributeError, IOError, ValueError):
+        # not a real file
+        size = 0
+    if size < MMAP_THRESHOLD:
+        data = fp.read()
+        if isinstance(data, bytes):
+            data = data.decode(encoding)
+        return data
+    content = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        return codecs.decode(content, encoding)
+    finally:
+        content.close()
+
+
+def _error(error, fpname, lineno, line):
+    if error is None:
+        error = configparser.ParsingError(fpname)
+    error.append(lineno, repr(line))
+    return error
+
+
+def tokenize(text, fpname=None, optionxform=str.lower, first_lineno=1):
+    """Split the content of a configuration file into sections and options.
+
+    Return the values of each section, the default values and the line
+    where each option is defined, by section and option. *first_lineno* is
+    the line number of the first line in *text*.
+
+    """
+    sections = collections.OrderedDict()
+    defaults = collections.OrderedDict()
+    lines = {}
+    section_match = _SECTION_RE.match
+
+    cursect = None
+    curlines = None
+    sectname = None
+    optname = None
+    # lines of the current option's value, if it spans several lines
+    optlines = None
+    indent_level = 0
+    error = None
+    for lineno, line in enumerate(text.splitlines(True), first_lineno):
+        value = line.strip()
+        if not value:
+            # empty lines are kept in multiline values
+            if optname:
+                if optlines is None:
+                    optlines = [cursect[optname]]
+                optlines.append('')
+            continue
+        first = value[0]
+        if first == '#' or first == ';':
+            # comments
+            continue
+        if line[0] == first:
+            indent = 0
+        else:
+            indent = len(line) - len(line.lstrip())
+        if optname and indent > indent_level:
+            # continuation line
+            if optlines is None:
+                optlines = [cursect[optname]]
+            optlines.append(value)
+            continue
+
+        indent_level = indent
+        match = section_match(value) if first == '[' else None
+        if match is None and cursect is None:
+            raise configparser.MissingSectionHeaderError(
+                fpname, lineno, line)
+        if match is None:
+            # the option name ends at the first delimiter
+            index = value.find('=')
+            colon = value.find(':', 0, index if index >= 0 else len(value))
+            if colon >= 0:
+                index = colon
+            if index < 0:
+                error = _error(error, fpname, lineno, line)
+                continue
+        if optlines is not None:
+            cursect[optname] = '\n'.join(optlines).rstrip()
+            optlines = None
+
+        if match is not None:
+            sectname = match.group('header')
+            if sectname in sections:
+                raise configparser.DuplicateSectionError(
+                    sectname, fpname, lineno)
+            elif sectname == DEFAULTSECT:
+                cursect = defaults
+            else:
+                cursect = sections[sectname] = collections.OrderedDict()
+            curlines = lines.setdefault(sectname, {})
+            optname = None
+        else:
+            optname = value[:index].rstrip()
+            if not optname:
+                error = _error(error, fpname, lineno, line)
+            optname = optionxform(optname)
+            if optname in curlines:
+                raise configparser.DuplicateOptionError(
+                    sectname, optname, fpname, lineno)
+            curlines[optname] = lineno
+            cursect[optname] = value[index + 1:].lstrip()
+    if optlines is not None:
+        cursect[optname] = '\n'.join(optlines).rstrip()
+    if error is not None:
+        raise error
+    return sections, defaults, lines
+
+
+class LazySection(object):
+    """A section of a configuration file, to be tokenized when needed."""
+
+    __slots__ = ('text', 'start', 'end', 'fpname', 'lineno')
+
+    def __init__(self, text, start, end, fpname, lineno):
+        self.text = text
+        self.start = start
+        self.end = end
+        self.fpname = fpname
+        self.lineno = lineno
+
+    def tokenize(self, optionxform=str.lower):
+        """Return the values and line numbers of the options in the section.
+
+        They're returned the same as by tokenize().
+
+        """
+        sections, defaults, lines = tokenize(
+            self.text[self.start:self.end], self.fpname, optionxform,
+            self.lineno)
+        return sections, lines
+
+
+def _find_headers(text, fpname):
+    """Return the name, offset and line number of each section header.
+
+    Return None if the lines can't be told apart without tokenizing.
+
+    """
+    if '\r' in text and text.count('\r') != text.count('\r\n'):
+        return None
+    for line_break in _LINE_BREAKS:
+        if line_break in text:
+            return None
+
+    headers = []
+    lineno = 1
+    position = 0
+    header_match = _HEADER_RE.match
+    start = text.find('[')
+    while start >= 0:
+        line_start = text.rfind('\n', 0, start) + 1
+        if line_start < start:
+            if text[line_start:start].isspace():
+                # an indented header or a continuation line
+                return None
+        else:
+            match = header_match(text, start)
+            if match is not None:
+                lineno += text.count('\n', position, start)
+                position = start
+                headers.append((match.group('header'), start, lineno))
+        start = text.find('[', start + 1)
+    return headers
+
+
+def tokenize_lazily(text, fpname=None, optionxform=str.lower,
+                    eager=('__main__',)):
+    """Split the content of a configuration file into sections.
+
+    Return the same as tokenize(), except that the values of the sections
+    not listed in *eager* are LazySection instances. The default section is
+    always tokenized.
+
+    Errors in the options of a lazy section are raised when it's
+    tokenized. The file is tokenized completely if its sections can't be
+    found by scanning it for section headers.
+
+    """
+    headers = _find_headers(text, fpname)
+    if headers is None:
+        return tokenize(text, fpname, optionxform)
+
+    # anything before the first section must be tokenized, to report
+    # missing section headers
+    tokenize(text[:headers[0][1]] if headers else text, fpname, optionxform)
+    names = set()
+    for name, start, lineno in headers:
+        if name == DEFAULTSECT and name in names:
+            # options repeated in the default sections must be reported
+            return tokenize(text, fpname, optionxform)
+        if name in names:
+            raise configparser.DuplicateSectionError(name, fpname, lineno)
+        names.add(name)
+
+    sections = collections.OrderedDict()
+    defaults = collections.OrderedDict()
+    lines = {}
+    for index, (name, start, lineno) in enumerate(headers):
+        if index + 1 < len(headers):
+            end = headers[index + 1][1]
+        else:
+            end = len(text)
+        if name == DEFAULTSECT or name in eager:
+            chunk_sections, chunk_defaults, chunk_lines = tokenize(
+                text[start:end], fpname, optionxform, lineno)
+            sections.update(chunk_sections)
+            defaults.update(chunk_defaults)
+            for section, options in chunk_lines.items():
+                lines.setdefault(section, {}).update(options)
+        else:
+            sections[name] = LazySection(text, start, end, fpname, lineno)
+    return sections, defaults, lines
@@ -0,0 +1,295 @@
+###############################################################################
+#
+# configglue -- glue for your apps' configuration
+#
+# A library for simple, DRY configuration of applications
+#
+# (C) 2009--2013 by Canonical Ltd.
+# by John R. Lenton <john.lenton@canonical.com>
+# and Ricardo Kirkner <ricardo.kirkner@canonical.com>
+#
+# Released under the BSD License (see the file LICENSE)
+#
+# For bug reports, support, and new releases: http://launchpad.net/configglue
+#
+###############################################################################
+"""Watching configuration files for changes.
+
+Files are watched with inotify on Linux, and by polling their stat() results
+elsewhere.
+
+"""
+import ctypes
+import ctypes.util
+import errno
+import logging
+import os
+import select
+import struct
+import sys
+import threading
+import time
+
+
+__all__ = [
+    'Watcher',
+]
+
+logger = logging.getLogger(__name__)
+
+# inotify events for files being written, replaced or removed
+_IN_MODIFY = 0x00000002
+_IN_ATTRIB = 0x00000004
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_Q_OVERFLOW = 0x00004000
+_IN_WATCH_MASK = (_IN_MODIFY | _IN_ATTRIB | _IN_CLOSE_WRITE | _IN_MOVED_FROM |
+                  _IN_MOVED_TO | _IN_CREATE | _IN_DELETE)
+_IN_NONBLOCK = os.O_NONBLOCK
+_IN_CLOEXEC = 0o2000000
+_EVENT = struct.Struct('iIII')
+
+
+def _file_state(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime, stat.st_size, stat.st_ino)
+
+
+class _PollingBackend(object):
+    """Find changed files by comparing their stat() results."""
+
+    def __init__(self, paths, interval):
+        self.interval = interval
+        self._states = {}
+        self.set_paths(paths)
+
+    def set_paths(self, paths):
+        self._states = dict((path, self._states.get(path, _file_state(path)))
+                            for path in paths)
+
+    def changes(self):
+        """Return the files changed since the last call."""
+        changed = set()
+        for path, state in self._states.items():
+            current = _file_state(path)
+            if current != state:
+                self._states[path] = current
+                changed.add(path)
+        return changed
+
+    def wait(self, timeout):
+        """Return the files changed, waiting up to *timeout* seconds."""
+        changed = self.changes()
+        deadline = time.time() + timeout
+        while not changed:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                break
+            time.sleep(min(self.interval, remaining))
+            changed = self.changes()
+        return changed
+
+    def close(self):
+        pass
+
+
+class _InotifyBackend(object):
+    """Find changed files using inotify.
+
+    The folders holding the files are watched, rather than the files, so
+    that files replaced by renaming another file over them are seen.
+
+    """
+
+    def __init__(self, paths, libc):
+        self._libc = libc
+        self._fd = libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        # folder by watch descriptor, and watch descriptor by folder
+        self._folders = {}
+        self._watches = {}
+        # paths by absolute folder and file name, as events name them
+        self._paths = {}
+        self.set_paths(paths)
+
+    def set_paths(self, paths):
+        self._paths = {}
+        for path in paths:
+            folder, name = os.path.split(path)
+            self._paths.setdefault(
+                (os.path.abspath(folder), name), set()).add(path)
+        folders = set(folder for folder, name in self._paths)
+        for folder in set(self._watches) - folders:
+            wd = self._watches.pop(folder)
+            del self._folders[wd]
+            self._libc.inotify_rm_watch(self._fd, wd)
+        for folder in folders - set(self._watches):
+            wd = self._libc.inotify_add_watch(
+                self._fd, os.fsencode(folder), _IN_WATCH_MASK)
+            if wd < 0:
+                # the folder doesn't exist (yet)
+                logger.warn('Folder {0} could not be watched.'.format(folder))
+                continue
+            self._watches[folder] = wd
+            self._folders[wd] = folder
+
+    def changes(self):
+        """Return the files changed since the last call."""
+        changed = set()
+        while True:
+            try:
+                data = os.read(self._fd, 65536)
+            except OSError as e:
+                if e.errno == errno.EAGAIN:
+                    return changed
+                raise
+            offset = 0
+            while offset < len(data):
+                wd, mask, cookie, length = _EVENT.unpack_from(data, offset)
+                offset += _EVENT.size
+                name = data[offset:offset + length].rstrip(b'\0')
+                offset += length
+                if mask & _IN_Q_OVERFLOW:
+                    # events were lost
+                    for paths in self._paths.values():
+                        changed.update(paths)
+                    continue
+                folder = self._folders.get(wd)
+                if folder is None:
+                    continue
+                changed.update(
+                    self._paths.get((folder, os.fsdecode(name)), ()))
+
+    def wait(self, timeout):
+        """Return the files changed, waiting up to *timeout* seconds."""
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return set()
+        return self.changes()
+
+    def fileno(self):
+        return self._fd
+
+    def close(self):
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+def _inotify_libc():
+    """Return the C library, if it supports inotify."""
+    if not sys.platform.startswith('linux'):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+    except OSError:
+        return None
+    if not hasattr(libc, 'inotify_init1'):
+        return None
+    libc.inotify_add_watch.argtypes = [
+        ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+    return libc
+
+
+def _backend(paths, interval, inotify):
+    if inotify:
+        libc = _inotify_libc()
+        if libc is not None:
+            try:
+                return _InotifyBackend(paths, libc)
+            except OSError as e:
+                logger.warn('inotify is not available: {0}'.format(e))
+    return _PollingBackend(paths, interval)
+
+
+class Watcher(object):
+    """Reload the files read by a parser when they change.
+
+    Files are checked on demand with check(), or every *interval* seconds
+    by a background thread after start(). Changes are collected until none
+    happen for *debounce* seconds, so that a file being written is read
+    once. Then the changed files are read again, and the callbacks are
+    called with the set of (section, option) keys whose values changed.
+
+    Use SchemaConfigParser.watch() to create a watcher.
+
+    """
+
+    def __init__(self, parser, interval=1.0, debounce=0.1, inotify=True):
+        self.parser = parser
+        self.interval = interval
+        self.debounce = debounce
+        self.callbacks = []
+        self._backend = _backend(parser._watched_paths(), interval, inotify)
+        self._stopped = threading.Event()
+        self._thread = None
+
+    @property
+    def uses_inotify(self):
+        return isinstance(self._backend, _InotifyBackend)
+
+    def add_callback(self, callback):
+        """Call *callback* with the keys of the values changed."""
+        self.callbacks.append(callback)
+
+    def remove_callback(self, callback):
+        self.callbacks.remove(callback)
+
+    def check(self, timeout=0):
+        """Reload the files changed, waiting up to *timeout* seconds.
+
+        Return the set of (section, option) keys whose values changed.
+
+        """
+        changed = self._backend.wait(timeout)
+        if not changed:
+            return set()
+        while True:
+            more = self._backend.wait(self.debounce)
+            if not more:
+                break
+            changed.update(more)
+        keys = self.parser._reload(changed)
+        self._backend.set_paths(self.parser._watched_paths())
+        if keys:
+            for callback in list(self.callbacks):
+                callback(keys)
+        return keys
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                self.check(self.interval)
+            except Exception:
+                # keep the values read so far, and watch for a fix
+                logger.exception('Configuration files could not be reloaded.')
+
+    def start(self):
+        """Check for changes in a background thread."""
+        if self._thread is None:
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run)
+            self._thread.daemon = True
+            self._thread.start()
+
+    def stop(self):
+        """Stop checking for changes, and release the files watched."""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self._backend.close()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
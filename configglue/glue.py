@@ -21,6 +21,7 @@ from collections import namedtuple
 
 from ._compat import NoSectionError, NoOptionError
 from .parser import SchemaConfigParser
+from .schema import takes_parser
 
 
 __all__ = [
@@ -59,7 +60,7 @@ def schemaconfigglue(parser, op=None, argv=None):
             og = op
         else:
             og = op.add_option_group(section.name)
-        for option in section.options():
+        for option in schema._section_options(section.name):
             kwargs = {}
             if option.help:
                 kwargs['help'] = option.help
@@ -79,13 +80,13 @@ def schemaconfigglue(parser, op=None, argv=None):
         # if value is not of the right type, cast it
         if not option.validate(value):
             kwargs = {}
-            if option.require_parser:
+            if takes_parser(option, 'parse'):
                 kwargs['parser'] = parser
             value = option.parse(value, **kwargs)
         parser.set(section.name, option.name, value)
 
     for section in schema.sections():
-        for option in section.options():
+        for option in schema._section_options(section.name):
             op_value = getattr(options, opt_name(option))
             try:
                 parser_value = parser.get(section.name, option.name)
@@ -17,28 +17,66 @@
 import codecs
 import collections
 import copy
+import itertools
+import keyword
 import logging
 import os
 import re
+import threading
 
 from functools import reduce
 
 from ._compat import BaseConfigParser, text_type, string_types
 from ._compat import (
     DEFAULTSECT,
+    InterpolationDepthError,
+    InterpolationError,
     InterpolationMissingOptionError,
     NoOptionError,
     NoSectionError,
 )
+from . import _aio, _cache, _tokenizer, _watch
+from .schema import diff, takes_parser
 
 
 __all__ = [
+    'ConfigErrors',
+    'FrozenConfig',
+    'IncludeCycleError',
+    'InterpolationCycleError',
     'SchemaValidationError',
     'SchemaConfigParser',
+    'ThreadSafeSchemaConfigParser',
+    'ValidationError',
 ]
 
 CONFIG_FILE_ENCODING = 'utf-8'
 
+CacheInfo = collections.namedtuple('CacheInfo', 'hits misses size')
+
+# a problem found by SchemaConfigParser.validate()
+ValidationError = collections.namedtuple(
+    'ValidationError', 'kind section option message')
+
+# messages of the problems found by validate(), by kind
+_VALIDATION_MESSAGES = {
+    'undefined-section': "Undefined sections in configuration: %s",
+    'unknown-section': "Sections in configuration are missing from schema: %s",
+    'missing-option': ("Configuration missing required options"
+                       " for section '%s': %s"),
+    'unknown-option': ("Configuration includes invalid options"
+                       " for section '%s': %s"),
+}
+# sections which don't need to be in the schema
+_MAGIC_SECTIONS = frozenset(['__main__', '__noschema__'])
+
+# names that can be attributes
+_IDENTIFIER_RE = re.compile(r'[A-Za-z_][A-Za-z0-9_]*$')
+# interpolation references and escaped percent signs
+_REFERENCE_RE = re.compile(r"%(?:%|\(([^)]+)\)s)")
+# marker for options missing from a section
+_MISSING = object()
+
 class NullHandler(logging.Handler):
     def emit(self, record):
         pass
@@ -52,6 +90,193 @@ class SchemaValidationError(Exception):
     """Exception class raised for any schema validation error."""
 
 
+class ConfigErrors(SchemaValidationError, ValueError):
+    """Raised when reading several values fails.
+
+    *errors* is the list of (section, option, exception) tuples, in the
+    order of the schema. It's a ValueError too, like the error raised when
+    a single value can't be parsed.
+
+    """
+
+    def __init__(self, errors):
+        super(ConfigErrors, self).__init__(
+            "%d values could not be read:\n\t%s" % (
+                len(errors), '\n\t'.join('[%s] %s: %s' % error
+                                         for error in errors)))
+        self.errors = errors
+
+
+class InterpolationCycleError(InterpolationDepthError):
+    """Raised when interpolated values reference each other in a cycle.
+
+    *cycle* is the list of (section, option) pairs in the cycle, starting and
+    ending with the same option.
+
+    """
+
+    def __init__(self, cycle):
+        section, option = cycle[0]
+        msg = ("Value interpolation references form a cycle:\n\t%s\n" %
+               ' -> '.join('[%s] %s' % item for item in cycle))
+        InterpolationError.__init__(self, option, section, msg)
+        self.cycle = cycle
+        self.args = (cycle,)
+
+
+class IncludeCycleError(Exception):
+    """Raised when configuration files include each other in a cycle.
+
+    *cycle* is the list of files in the cycle, starting and ending with the
+    same file.
+
+    """
+
+    def __init__(self, cycle):
+        super(IncludeCycleError, self).__init__(
+            "Configuration files include each other: %s" %
+            ' -> '.join(cycle))
+        self.cycle = cycle
+
+
+class FrozenConfig(dict):
+    """A read-only dict of configuration values.
+
+    Values can be looked up by key or as attributes, as in
+    ``config['section']['option']`` or ``config.section.option``.
+
+    """
+
+    __slots__ = ()
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError("%s is read-only" % type(self).__name__)
+
+    __setitem__ = __delitem__ = __ior__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("%s is read-only" % type(self).__name__)
+
+    def __delattr__(self, name):
+        raise AttributeError("%s is read-only" % type(self).__name__)
+
+    def __reduce__(self):
+        if type(self) is FrozenConfig:
+            return (FrozenConfig, (dict(self),))
+        return (_frozen_config, (dict(self),))
+
+    def __repr__(self):
+        return 'FrozenConfig(%s)' % dict.__repr__(self)
+
+
+# FrozenConfig subclasses storing values as slots, by their names
+_frozen_classes = {}
+# number of subclasses kept in _frozen_classes
+_FROZEN_CLASSES_SIZE = 256
+
+
+def _frozen_config(values):
+    """Return a FrozenConfig holding the given values.
+
+    Values are also stored in slots, where possible, so looking them up as
+    attributes is as fast as looking them up by key.
+
+    """
+    names = tuple(sorted(
+        name for name in values
+        if isinstance(name, str) and _IDENTIFIER_RE.match(name) and
+        not keyword.iskeyword(name) and not hasattr(FrozenConfig, name) and
+        not (name.startswith('__') and not name.endswith('__'))))
+    cls = _frozen_classes.get(names)
+    if cls is None:
+        if len(_frozen_classes) >= _FROZEN_CLASSES_SIZE:
+            # schemas changed a lot; start over instead of growing forever
+            _frozen_classes.clear()
+        cls = _frozen_classes[names] = type(
+            'FrozenConfig', (FrozenConfig,), {'__slots__': names})
+    config = cls(values)
+    for name in names:
+        object.__setattr__(config, name, values[name])
+    return config
+
+
+def _freeze(value, slotted=0):
+    """Return a read-only copy of a parsed value.
+
+    Dicts nested up to *slotted* levels deep store their values in slots
+    too; their keys are the names of sections and options, so there are
+    only as many sets of them as there are schemas. Deeper dicts, like
+    DictOption values, can have any keys.
+
+    """
+    if isinstance(value, dict):
+        values = dict((key, _freeze(item, slotted - 1))
+                      for key, item in value.items())
+        if slotted > 0:
+            return _frozen_config(values)
+        return FrozenConfig(values)
+    elif isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    elif isinstance(value, set):
+        return frozenset(value)
+    return value
+
+
+_IMMUTABLE_TYPES = (type(None), bool, int, float, complex, bytes, text_type,
+                    tuple, frozenset)
+
+
+def _copy(value):
+    """Return a copy of a parsed value, safe to modify.
+
+    Lists, dicts and sets are copied all the way down; values of other
+    immutable types are returned as is.
+
+    """
+    if isinstance(value, _IMMUTABLE_TYPES):
+        return value
+    elif type(value) is dict:
+        return dict((key, _copy(item)) for key, item in value.items())
+    elif type(value) is list:
+        return [_copy(item) for item in value]
+    elif type(value) is set:
+        return set(value)
+    return copy.deepcopy(value)
+
+
+def _is_file(path):
+    """Return whether values were read from a file named *path*.
+
+    Values read by readfp() without a filename are read from None, and
+    ConfigParser names other sources like '<string>'.
+
+    """
+    return path is not None and not (path.startswith('<') and
+                                     path.endswith('>'))
+
+
+class _EnvironmentOverrides(dict):
+    """Default values of environment variables, over the environment."""
+
+    def __init__(self, environment):
+        super(_EnvironmentOverrides, self).__init__()
+        self.environment = environment
+
+    def __contains__(self, name):
+        return (super(_EnvironmentOverrides, self).__contains__(name) or
+                name in self.environment)
+
+    def __missing__(self, name):
+        return self.environment[name]
+
+
 class SchemaConfigParser(BaseConfigParser, object):
     """A ConfigParser that validates against a Schema
 
@@ -64,107 +289,198 @@ class SchemaConfigParser(BaseConfigParser, object):
     profit!
 
     """
-    def __init__(self, schema):
+    def __init__(self, schema, json_codec=None):
         super(SchemaConfigParser, self).__init__()
         # validate schema
         if not schema.is_valid():
             # TODO: add error details
             raise SchemaValidationError()
         self.schema = schema
-        self._location = {}
+        # codec for options holding json values that don't set their own
+        self.json_codec = json_codec
+        # file and line where each option was last defined, by section and
+        # option; options missing from the schema are tracked as well, in
+        # case a new schema adds them
+        self._location = collections.OrderedDict()
         self.extra_sections = set()
+        # files read, in the order they were applied, with the files they
+        # include
+        self.include_graph = collections.OrderedDict()
+        # parts of sections read lazily, still to be parsed
+        self._lazy_sections = {}
+        # values, line numbers and includes of each file, while watched
+        self._layers = None
         self._basedir = ''
         self._dirty = collections.defaultdict(
             lambda: collections.defaultdict(dict))
+        # cache of values returned by get(), by (section, option, raw, parse)
+        self._cache = {}
+        # keys of cached values, by section and (transformed) option name
+        self._cache_keys = {}
+        # keys of cached values depending on other options, or on the
+        # environment
+        self._dependent_keys = set()
+        self._environment_keys = set()
+        self._cache_hits = 0
+        self._cache_misses = 0
+        # snapshot of the environment, and templates used to interpolate
+        # it, by raw value
+        self._environment = None
+        self._environment_templates = {}
+        # interpolated values computed by resolve(), by section and option
+        self._resolved = None
+        # snapshot returned by freeze()
+        self._frozen = None
+        # values of all the sections computed by values(), by parse flag
+        self._values = {}
+
+    def update_schema(self, schema):
+        """Switch to a new schema, keeping the configuration read so far.
+
+        Return the SchemaDiff between the current and the new schema.
+
+        """
+        changes = diff(self.schema, schema)
+        self.apply_diff(changes)
+        return changes
+
+    def apply_diff(self, changes):
+        """Switch to the new schema of a SchemaDiff.
+
+        The diff must have been computed from the current schema. Only the
+        state depending on the options affected by the diff is discarded.
+
+        """
+        if changes.old is not self.schema:
+            raise ValueError("Schema diff does not apply to the current "
+                             "schema.")
+        if not changes.new.is_valid():
+            raise SchemaValidationError()
+        self.schema = changes.new
+        self._invalidate(changes)
+
+    def _invalidate(self, changes):
+        for section, option in changes.options():
+            self._invalidate_cache(section, option)
 
     def is_valid(self, report=False):
         """Return if the state of the parser is valid.
 
         This is useful to detect errors in configuration files, like type
-        errors or missing required options.
+        errors or missing required options. If *report* is True, return a
+        (valid, errors) tuple instead, with a message for each error; see
+        validate().
 
         """
-        valid = True
-        errors = []
         try:
-            # validate structure
-            config_sections = set(self.sections())
-            schema_sections = set(s.name for s in self.schema.sections())
-            skip_sections = self.extra_sections
-            magic_sections = set(['__main__', '__noschema__'])
-            # test1: no undefined implicit sections
-            unmatched_sections = (skip_sections - config_sections)
-            if unmatched_sections:
-                error_msg = "Undefined sections in configuration: %s"
-                error_value = ', '.join(unmatched_sections)
-                errors.append(error_msg % error_value)
-                valid = False
-            # remove sections to skip from config sections
-            config_sections.difference_update(skip_sections)
-            # test2: no extra sections that are not implicit sections
-            unmatched_sections = (
-                config_sections - magic_sections - schema_sections)
-            if unmatched_sections:
-                error_msg = "Sections in configuration are missing from schema: %s"
-                error_value = ', '.join(unmatched_sections)
-                errors.append(error_msg % error_value)
-                valid = False
-
-            for name in config_sections.union(schema_sections):
-                if name not in skip_sections:
-                    if not self.schema.has_section(name):
-                        # this should have been reported before
-                        # so skip bogus section
-                        continue
-
-                    section = self.schema.section(name)
-                    try:
-                        parsed_options = set(self.options(name))
-                    except NoSectionError:
-                        parsed_options = set([])
-                    schema_options = set(section.options())
-
-                    fatal_options = set(opt.name for opt in schema_options
-                                        if opt.fatal)
-                    # all fatal options are included
-                    fatal_included = parsed_options.issuperset(fatal_options)
-                    if not fatal_included:
-                        error_msg = ("Configuration missing required options"
-                                     " for section '%s': %s")
-                        error_value = ', '.join(list(fatal_options -
-                                                     parsed_options))
-                        errors.append(error_msg % (name, error_value))
-                    valid &= fatal_included
-
-                    # remaining parsed options are valid schema options
-                    other_options = parsed_options - fatal_options
-                    schema_opt_names = set(opt.name for opt in schema_options)
-
-                    # add the default section special includes option
-                    if name == '__main__':
-                        schema_opt_names.add('includes')
-
-                    schema_options = other_options.issubset(schema_opt_names)
-                    if not schema_options:
-                        error_msg = ("Configuration includes invalid options"
-                                     " for section '%s': %s")
-                        error_value = ', '.join(list(other_options -
-                                                     schema_opt_names))
-                        errors.append(error_msg % (name, error_value))
-                    valid &= schema_options
-
-            # structure validates, validate content
-            self.parse_all()
-
+            errors = self._error_messages(self.validate())
         except Exception as e:
-            errors.append(text_type(e))
-            valid = False
+            errors = [text_type(e)]
+        valid = not errors
 
         if report:
             return valid, errors
         else:
             return valid
 
+    def validate(self):
+        """Return the list of problems found in the configuration.
+
+        All the options are parsed, so every problem is found at once. Each
+        problem is a ValidationError, whose *kind* is one of:
+
+        - 'undefined-section': *section* is used by a dict option, but it's
+          missing from the configuration;
+        - 'unknown-section': *section* is missing from the schema;
+        - 'missing-option': *option* is required, but it's missing from
+          *section*;
+        - 'unknown-option': *option* of *section* is missing from the
+          schema;
+        - 'invalid-value': the value of *option* of *section* can't be read.
+
+        Errors reading the configuration files (for sections read lazily)
+        are raised.
+
+        """
+        # sections read lazily may have errors
+        self._materialize_all()
+        # parsing dict options finds the sections they use
+        value_errors = self._value_errors()
+
+        errors = []
+        config_sections = set(self._sections)
+        skip_sections = self.extra_sections
+        for name in sorted(skip_sections - config_sections):
+            errors.append(self._validation_error('undefined-section', name))
+        for name in sorted(config_sections - skip_sections - _MAGIC_SECTIONS -
+                           self.schema.section_names()):
+            errors.append(self._validation_error('unknown-section', name))
+
+        missing = set()
+        for name in sorted(self.schema.section_names() - skip_sections):
+            options = self._sections.get(name)
+            if options is None:
+                parsed = frozenset()
+            else:
+                parsed = self._defaults.keys() | options.keys()
+            fatal_options = self.schema.fatal_options(name)
+            for option in sorted(fatal_options - parsed):
+                missing.add((name, option))
+                errors.append(
+                    self._validation_error('missing-option', name, option))
+            schema_options = self.schema.option_names(name)
+            if name == '__main__':
+                # add the default section special includes option
+                schema_options = schema_options.union(['includes'])
+            for option in sorted(parsed - fatal_options - schema_options):
+                errors.append(
+                    self._validation_error('unknown-option', name, option))
+
+        for section, option, error in value_errors:
+            if (section, option) in missing:
+                # reported already
+                continue
+            errors.append(ValidationError('invalid-value', section, option,
+                                          text_type(error)))
+        return errors
+
+    def _validation_error(self, kind, section, option=None):
+        if option is None:
+            message = _VALIDATION_MESSAGES[kind] % section
+        else:
+            message = _VALIDATION_MESSAGES[kind] % (section, option)
+        return ValidationError(kind, section, option, message)
+
+    def _error_messages(self, errors):
+        """Return the messages of the problems found by validate().
+
+        Problems of the same kind about the sections, or about the options
+        of the same section, are reported together.
+
+        """
+        messages = []
+
+        def group(error):
+            if error.kind == 'invalid-value':
+                return error
+            if error.option is None:
+                return error.kind
+            return error.kind, error.section
+
+        for key, errors in itertools.groupby(errors, group):
+            errors = list(errors)
+            error = errors[0]
+            if error.kind == 'invalid-value':
+                messages.append(error.message)
+            elif error.option is None:
+                messages.append(_VALIDATION_MESSAGES[error.kind] % ', '.join(
+                    error.section for error in errors))
+            else:
+                messages.append(_VALIDATION_MESSAGES[error.kind] % (
+                    error.section,
+                    ', '.join(error.option for error in errors)))
+        return messages
+
     def items(self, section, raw=False, vars=None):
         """Return the list of all options in a section.
 
@@ -181,6 +497,7 @@ class SchemaConfigParser(BaseConfigParser, object):
         for options not explicitly included in any section.
 
         """
+        self._materialize(section)
         d = self._defaults.copy()
         try:
             d.update(self._sections[section])
@@ -224,136 +541,736 @@ class SchemaConfigParser(BaseConfigParser, object):
         Section is to be specified *by name*, not by
         passing in real Section objects.
 
-        """
-        values = collections.defaultdict(dict)
-        if section is None:
-            sections = self.schema.sections()
-        else:
-            sections = [self.schema.section(section)]
+        All the options are read, even if some of them fail. If only one
+        fails, its error is raised; otherwise ConfigErrors is raised, with
+        all the errors.
 
-        for sect in sections:
-            for opt in sect.options():
-                values[sect.name][opt.name] = self.get(
-                    sect.name, opt.name, parse=parse)
+        """
+        if section is not None and not self.schema.has_section(section):
+            raise NoSectionError(section)
+        values = self._values.get(parse)
+        if values is None:
+            if section is None:
+                sections = [sect.name for sect in self.schema.sections()]
+            else:
+                sections = [section]
+            values, errors = self._evaluate(sections, parse)
+            self._raise_errors(errors)
+            if section is None:
+                self._values[parse] = values
         if section is not None:
-            result = values[section]
+            result = _copy(values.get(section, {}))
         else:
-            result = dict(values)
+            result = _copy(values)
 
         return result
 
-    def read(self, filenames, already_read=None):
-        """Like ConfigParser.read, but consider files we've already read."""
+    def _evaluate(self, sections, parse=True):
+        """Return the values of all the options in the given sections.
+
+        Each section is walked once: its values are merged with the
+        defaults once, and used to interpolate all its options. Return the
+        values by section and option, and the errors raised reading them,
+        as (section, option, exception) tuples.
+
+        """
+        values = {}
+        errors = []
+        # values not using other options are read here, as get() would;
+        # anything else goes through _get_value()
+        plain = self._resolved is None
+        optionxform = self.optionxform
+        parse_value = self._parse_value
+        for name in sections:
+            self._materialize(name)
+            items = self._section_items(name)
+            section_values = {}
+            for option_obj in self.schema._section_options(name):
+                option = option_obj.name
+                value = items.get(optionxform(option), _MISSING)
+                if value is _MISSING and not option_obj.fatal:
+                    value = option_obj.default
+                try:
+                    if (plain and not option_obj.raw and
+                            value is not _MISSING and
+                            not (isinstance(value, string_types) and
+                                 '%' in value)):
+                        try:
+                            if isinstance(value, string_types):
+                                if '$' in value:
+                                    value = self.interpolate_environment(
+                                        value)
+                                if parse:
+                                    value = parse_value(
+                                        name, option, option_obj, value)
+                        except KeyError:
+                            value = self._get_value(
+                                name, option, option_obj, False, None, parse,
+                                items)[0]
+                    else:
+                        value = self._get_value(
+                            name, option, option_obj, False, None, parse,
+                            items)[0]
+                except Exception as e:
+                    errors.append((name, option, e))
+                    continue
+                section_values[option] = value
+            if section_values:
+                values[name] = section_values
+        return values, errors
+
+    def _section_items(self, section):
+        """Return the raw values of a section, including the defaults."""
+        if section in self._sections:
+            items = dict(self._defaults)
+            items.update(self._sections[section])
+        elif section == DEFAULTSECT:
+            items = dict(self._defaults)
+        else:
+            items = {}
+        return items
+
+    def _raise_errors(self, errors):
+        """Raise the errors returned by _evaluate(), if any."""
+        if len(errors) == 1:
+            raise errors[0][2]
+        if errors:
+            raise ConfigErrors(errors)
+
+    def _copy(self):
+        """Return a copy of the parser which can be changed independently.
+
+        Values, locations and the include graph are copied; the schema and
+        the values themselves are shared. Cached values are not copied.
+
+        """
+        parser = self.__class__.__new__(self.__class__)
+        parser.__dict__.update(self.__dict__)
+        parser._sections = self._dict(
+            (name, self._dict(options))
+            for name, options in self._sections.items())
+        parser._defaults = self._dict(self._defaults)
+        if hasattr(self, '_proxies'):
+            # section proxies refer to their parser
+            parser._proxies = self._dict(
+                (name, type(proxy)(parser, name))
+                for name, proxy in self._proxies.items())
+        parser._location = collections.OrderedDict(self._location)
+        parser._dirty = collections.defaultdict(
+            lambda: collections.defaultdict(dict))
+        for filename, sections in self._dirty.items():
+            for section, options in sections.items():
+                parser._dirty[filename][section] = dict(options)
+        parser.extra_sections = set(self.extra_sections)
+        parser.include_graph = collections.OrderedDict(self.include_graph)
+        parser._lazy_sections = dict(
+            (name, list(parts))
+            for name, parts in self._lazy_sections.items())
+        parser._cache = {}
+        parser._cache_keys = {}
+        parser._dependent_keys = set()
+        parser._environment_keys = set()
+        parser._cache_hits = parser._cache_misses = 0
+        parser._resolved = None
+        parser._frozen = None
+        parser._values = {}
+        return parser
+
+    def freeze(self):
+        """Return a read-only snapshot of all the parsed values.
+
+        The snapshot is a FrozenConfig of sections, holding the parsed
+        value of each option; lists are turned into tuples, and dicts into
+        FrozenConfig instances. It doesn't change, so it can be shared by
+        threads without locking. The same snapshot is returned until the
+        configuration changes.
+
+        """
+        frozen = self._frozen
+        if frozen is None:
+            # sections and their options are looked up as attributes
+            frozen = self._frozen = _freeze(self.values(), slotted=2)
+        return frozen
+
+    def read(self, filenames, already_read=None, workers=None, lazy=False,
+             cache_dir=None):
+        """Like ConfigParser.read, but consider files we've already read.
+
+        Each file, and each file it includes, is read only once. If
+        *workers* is given, files are read using that many threads; their
+        values are applied in the same order in any case.
+
+        If *lazy* is True, files are only scanned for sections, and each
+        section is parsed when it's first used.
+
+        If *cache_dir* is given, a snapshot of the values read is saved in
+        that folder, and used instead of reading the files again for as
+        long as none of them changes. Lazy reads and reads with files
+        *already_read* are not cached.
+
+        """
         if already_read is None:
             already_read = set()
         if isinstance(filenames, string_types):
             filenames = [filenames]
+        paths = self._normalize_paths(filenames)
+        snapshot = keys = reads = None
+        if cache_dir is not None and not lazy and not already_read:
+            snapshot = _cache.snapshot_path(
+                cache_dir, paths, self._snapshot_fingerprint())
+            data = _cache.load(snapshot)
+            if data is not None:
+                return self._read_snapshot(data, already_read)
+            keys = collections.OrderedDict()
+            reads = []
+        fetched = None
+        if workers:
+            fetched = self._fetch(paths, already_read, workers, lazy, keys)
+        read_ok = self._read_files(filenames, paths, already_read, fetched,
+                                   lazy, keys, reads)
+        if snapshot is not None:
+            self._write_snapshot(snapshot, keys, reads)
+        return read_ok
+
+    def _normalize_paths(self, filenames):
+        return [os.path.normpath(os.path.join(self._basedir, filename))
+                for filename in filenames]
+
+    def _read_files(self, filenames, paths, already_read, fetched=None,
+                    lazy=False, keys=None, reads=None):
+        """Read files, and apply their values; see read().
+
+        The values read from each file are added to *reads*, if given.
+
+        """
         read_ok = []
-        for filename in filenames:
-            path = os.path.join(self._basedir, filename)
+        for filename, path in zip(filenames, paths):
             if path in already_read:
                 continue
-            try:
-                fp = codecs.open(path, 'r', encoding=CONFIG_FILE_ENCODING)
-            except IOError:
+            layers = []
+            if not self._load(path, already_read, [], layers, fetched,
+                              lazy, keys):
+                if reads is not None:
+                    reads.append((filename, path, None))
+                continue
+            if reads is not None:
+                # applying the layers modifies them
+                reads.append((filename, path, self._pack_layers(layers)))
+            # update current parser with the values of all files, in order
+            for layer in layers:
+                self._update(*layer)
+
+            read_ok.append(path)
+            self._last_location = filename
+        if read_ok:
+            self.clear_cache()
+        return read_ok
+
+    def _snapshot_fingerprint(self):
+        """Return what snapshots of files read by this parser depend on."""
+        return (self.schema.fingerprint(), type(self).__module__,
+                type(self).__name__, CONFIG_FILE_ENCODING)
+
+    def _pack_layers(self, layers):
+        return [(path, _cache.pack_sections(sections), lines,
+                 self.include_graph[path])
+                for path, sections, defaults, lines in layers]
+
+    def _write_snapshot(self, snapshot, keys, reads):
+        data = {'files': list(keys.items()), 'reads': reads}
+        try:
+            _cache.dump(snapshot, data)
+        except (IOError, OSError, ValueError) as e:
+            logger.warn(
+                'Snapshot {0} could not be written: {1}'.format(snapshot, e))
+
+    def _read_snapshot(self, data, already_read):
+        """Apply the values of the files in a snapshot, as read() would."""
+        for path, key in data['files']:
+            if key is None:
                 logger.warn(
                     'File {0} could not be read. Skipping.'.format(path))
+        read_ok = []
+        for filename, path, layers in data['reads']:
+            if layers is None:
                 continue
-            # parse file
-            sub_parser = self.__class__(self.schema)
-            sub_parser._basedir = self._basedir
-            sub_parser._location = self._location
-            sub_parser._read(fp, path, already_read=already_read)
-            # update current parser with those values
-            for section, options in sub_parser._sections.items():
-                if section == '__main__':
-                    # skip copying includes to avoid including same files twice
-                    options.pop('includes', None)
-                if section in self._sections:
-                    self._sections[section].update(options)
-                else:
-                    self._sections[section] = options
-
-            fp.close()
+            for layer_path, sections, lines, includes in layers:
+                already_read.add(layer_path)
+                self._update(layer_path, _cache.unpack_sections(sections),
+                             lines=lines)
+                self.include_graph[layer_path] = includes
             read_ok.append(path)
             self._last_location = filename
+        if read_ok:
+            self.clear_cache()
         return read_ok
 
     def readfp(self, fp, filename=None):
         """Like ConfigParser.readfp, but consider the encoding."""
-        # wrap the StringIO so it can read encoded text
-        decoded_fp = codecs.getreader(CONFIG_FILE_ENCODING)(fp)
-        self._read(decoded_fp, filename)
+        self._read(fp, filename)
 
     def _read(self, fp, fpname, already_read=None):
-        # read file content
-        self._update(fp, fpname)
-
         if already_read is None:
             already_read = set()
         already_read.add(fpname)
+        # read file content
+        sections, defaults, lines = self._tokenize(
+            _tokenizer.read(fp, CONFIG_FILE_ENCODING), fpname)
+        includes = self._get_includes(fpname, sections, defaults)
+
+        # read included files
+        layers = []
+        for include in includes:
+            self._load(include, already_read, [fpname], layers)
+        for layer in layers:
+            self._update(*layer)
+
+        # local values override included options
+        self._update(fpname, sections, defaults, lines, keep_includes=True)
+        self.include_graph.pop(fpname, None)
+        self.include_graph[fpname] = includes
+        # read_file() and read_string() get here as well
+        self.clear_cache()
+
+    def _load(self, path, already_read, including, layers, fetched=None,
+              lazy=False, keys=None):
+        """Read a file and the files it includes.
+
+        Files already read are skipped. Return whether the file could be
+        read. Each file read is appended to *layers* after the files it
+        includes, with its values.
+
+        Files in *fetched* are not read again; see _fetch(). The key of
+        each file read is added to *keys*, if given.
 
-        if self.has_option('__main__', 'includes'):
-            old_basedir, self._basedir = self._basedir, os.path.dirname(
-                fpname)
-            includes = self.get('__main__', 'includes')
-            filenames = [text_type.strip(x) for x in includes]
-
-            # parse included files
-            sub_parser = self.__class__(self.schema)
-            sub_parser._basedir = self._basedir
-            sub_parser._location = self._location
-            sub_parser.read(filenames)
-            # update current parser with those values
-            for section, options in sub_parser._sections.items():
-                if section == '__main__':
-                    # skip copying includes to avoid including same files twice
-                    options.pop('includes', None)
-                if section in self._sections:
-                    self._sections[section].update(options)
-                else:
-                    self._sections[section] = options
+        """
+        if path in including:
+            raise IncludeCycleError(including[including.index(path):] +
+                                    [path])
+        if path in already_read:
+            return True
+        if fetched is not None and path in fetched:
+            result = fetched[path]
+            if isinstance(result, Exception):
+                raise result
+        else:
+            result = self._read_file(path, lazy, keys)
+        if result is None:
+            logger.warn(
+                'File {0} could not be read. Skipping.'.format(path))
+            return False
+        sections, defaults, lines = result
+        already_read.add(path)
+
+        includes = self._get_includes(path, sections, defaults)
+        including.append(path)
+        for include in includes:
+            self._load(include, already_read, including, layers, fetched,
+                       lazy, keys)
+        including.pop()
+        layers.append((path, sections, None, lines))
+        self.include_graph[path] = includes
+        return True
+
+    def _fetch(self, paths, already_read, workers, lazy=False, keys=None):
+        """Read files, and the files they include, using a pool of threads.
+
+        Return the result of _read_file() for each file, by path. Errors
+        are returned as well, to be raised when the file is loaded.
 
-            self._basedir = old_basedir
+        """
+        from concurrent.futures import (
+            FIRST_COMPLETED,
+            ThreadPoolExecutor,
+            wait,
+        )
 
-            if filenames:
-                # re-read the file to override included options with
-                # local values
-                fp.seek(0)
-                self._update(fp, fpname)
+        fetched = {}
+        requested = set(already_read)
+        pending = {}
 
-    def _update(self, fp, fpname):
-        # remember current values
-        old_sections = copy.deepcopy(self._sections)
-        # read in new file
-        super(SchemaConfigParser, self)._read(fp, fpname)
-        # update location of changed values
-        self._update_location(old_sections, fpname)
+        def read_file(path):
+            try:
+                return self._read_file(path, lazy, keys)
+            except Exception as e:
+                return e
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            def submit(paths):
+                for path in paths:
+                    if path not in requested:
+                        requested.add(path)
+                        pending[executor.submit(read_file, path)] = path
+
+            submit(paths)
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    path = pending.pop(future)
+                    result = fetched[path] = future.result()
+                    if result is None or isinstance(result, Exception):
+                        continue
+                    try:
+                        submit(self._get_includes(path, *result[:2]))
+                    except Exception:
+                        # raised again when the file is loaded
+                        pass
+        return fetched
 
-    def _update_location(self, old_sections, filename):
-        # keep list of valid options to include locations for
-        option_names = [x.name for x in self.schema.options()]
+    def _read_file(self, path, lazy=False, keys=None):
+        """Return the result of _tokenize() for a file.
 
-        # new values
-        sections = self._sections
+        Return None if the file can't be read. If *lazy* is True, sections
+        other than the special ones are only found, not parsed. If *keys*
+        is given, the key of the file is added to it, as of when it was
+        read.
 
-        # update locations
+        """
+        try:
+            fp = codecs.open(path, 'rb')
+        except IOError:
+            if keys is not None:
+                keys[path] = None
+            return None
+        try:
+            if keys is not None:
+                # if the file changes while it's read, the key is stale
+                stat = os.fstat(fp.fileno())
+                data = fp.read()
+                keys[path] = _cache.file_key(stat, data)
+                text = data.decode(CONFIG_FILE_ENCODING)
+            else:
+                text = _tokenizer.read(fp, CONFIG_FILE_ENCODING)
+        finally:
+            fp.close()
+        if lazy:
+            return _tokenizer.tokenize_lazily(
+                text, path, self.optionxform,
+                eager=('__main__', '__noschema__'))
+        return self._tokenize(text, path)
+
+    def _get_includes(self, fpname, sections, defaults):
+        """Return the normalized paths of the files included by a file."""
+        if 'includes' not in sections.get('__main__', {}):
+            return []
+        # get the value as it would be read from the file on its own
+        parser = self.__class__(self.schema)
+        parser._sections = sections
+        parser._defaults = defaults
+        basedir = os.path.dirname(fpname) if fpname else self._basedir
+        return [os.path.normpath(os.path.join(basedir, text_type.strip(x)))
+                for x in parser.get('__main__', 'includes')]
+
+    def _tokenize(self, text, fpname):
+        """Read a file into new sections, apart from the values read so far.
+
+        Return the sections, the default values and the line numbers of the
+        options defined in the file.
+
+        """
+        return _tokenizer.tokenize(text, fpname, self.optionxform)
+
+    def _update(self, fpname, sections, defaults=None, lines=None,
+                keep_includes=False):
+        """Update the parser with the values read from a file."""
+        for section, options in list(sections.items()):
+            if isinstance(options, _tokenizer.LazySection):
+                # parse it when needed, in the order it was read
+                del sections[section]
+                if section not in self._sections:
+                    self.add_section(section)
+                self._lazy_sections.setdefault(section, []).append(options)
+            else:
+                # older values of the section are overriden
+                self._materialize(section)
+        # update location of values defined in the file
+        self._update_location(sections, fpname, lines)
+        if not keep_includes and '__main__' in sections:
+            # skip copying includes to avoid including same files twice
+            sections['__main__'].pop('includes', None)
+        if defaults:
+            self._defaults.update(defaults)
         for section, options in sections.items():
-            old_section = old_sections.get(section)
-            if old_section is not None:
-                # update options in existing section
-                for option, value in options.items():
-                    valid_option = option in option_names
-                    option_changed = (option not in old_section or
-                                      value != old_section[option])
-                    if valid_option and option_changed:
-                        self._location[option] = filename
+            if section in self._sections:
+                self._sections[section].update(options)
             else:
-                # complete section is new
-                for option, value in options.items():
-                    valid_option = option in option_names
-                    if valid_option:
-                        self._location[option] = filename
+                self.add_section(section)
+                self._sections[section] = options
+
+    def _materialize(self, section):
+        """Parse the parts of a section that were read lazily."""
+        parts = self._lazy_sections.pop(section, None)
+        if parts:
+            for part in parts:
+                sections, lines = part.tokenize(self.optionxform)
+                self._update(part.fpname, sections, lines=lines)
+
+    def _materialize_all(self):
+        for section in list(self._lazy_sections):
+            self._materialize(section)
+
+    def _update_location(self, sections, filename, lines=None):
+        if lines is None:
+            lines = {}
+        location = self._location
+        for section, options in sections.items():
+            section_lines = lines.get(section, {})
+            for option in options:
+                key = (section, option)
+                # keep locations in the order they were defined
+                location.pop(key, None)
+                location[key] = (filename, section_lines.get(option))
+
+    def watch(self, interval=1.0, debounce=0.1, inotify=True):
+        """Return a Watcher reloading the files read when they change.
+
+        All the files in the include graph are watched, using inotify if
+        it's available and *inotify* is True, or checking them every
+        *interval* seconds otherwise. Changes are applied once no more
+        changes happen for *debounce* seconds.
+
+        Values set with set() are kept when files are reloaded. Values
+        read by readfp() from something else than the named file, or
+        without a filename, and values read by read_string() are not
+        tracked.
+
+        """
+        self._watch_files()
+        return _watch.Watcher(self, interval, debounce, inotify)
+
+    def _watch_files(self):
+        """Keep the values of the files read, to reload them later."""
+        self._watch_layers(collections.OrderedDict(
+            (path, self._read_layer(path)) for path in self.include_graph))
+
+    def _watch_layers(self, layers):
+        """Keep the given values of the files read, by path."""
+        self._materialize_all()
+        self._layers = layers
+
+    def aread(self, filenames, already_read=None, lazy=False):
+        """Coroutine reading files like read(), for asyncio code.
+
+        Files are read and parsed in the default executor of the event
+        loop, and their values are applied on the loop. If the coroutine
+        is cancelled before that, nothing is applied.
+
+        """
+        return _aio.read(self, filenames, already_read, lazy)
+
+    def areload(self):
+        """Coroutine reading all the files again, for asyncio code.
+
+        Return the set of (section, option) keys whose values changed,
+        including the values interpolating them. Unless the files were
+        read with aread(), the first call only records their values.
+
+        """
+        return _aio.reload(self)
+
+    def awatch(self, interval=1.0, debounce=0.1, inotify=True):
+        """Return an async iterator of the changes to the files read.
+
+        Files are watched and reloaded as by watch(), without blocking the
+        event loop; each item is the set of (section, option) keys whose
+        values changed. Files are watched from the first iteration until
+        iterating stops.
+
+        """
+        return _aio.watch(self, interval, debounce, inotify)
+
+    def _watched_paths(self):
+        """Return the paths of the files in the include graph."""
+        return [path for path in self.include_graph if _is_file(path)]
+
+    def _read_layer(self, path):
+        """Return the values, line numbers and includes of a file.
+
+        Values read from something else than a file are not tracked; only
+        the files they include are.
+
+        """
+        if not _is_file(path):
+            return {}, {}, list(self.include_graph.get(path, []))
+        result = self._read_file(path)
+        if result is None:
+            return {}, {}, []
+        sections, defaults, lines = result
+        return sections, lines, self._get_includes(path, sections, defaults)
+
+    def _reload(self, paths, fetched=None):
+        """Read some of the files watched again, and apply their changes.
+
+        Only the given files, and the files they include for the first
+        time, are read; the values of the other files are kept from when
+        they were last read. Files in *fetched* are not read again; it
+        holds the result of _read_layer() by path. Return the set of
+        (section, option) keys whose values changed, including the values
+        interpolating them.
+
+        """
+        if fetched is None:
+            fetched = {}
+        layers = collections.OrderedDict(self._layers)
+        for path in paths:
+            if path in fetched:
+                layers[path] = fetched[path]
+            elif path in layers:
+                layers[path] = self._read_layer(path)
+        for path, layer in fetched.items():
+            # files included for the first time
+            layers.setdefault(path, layer)
+        graph = self._layer_graph(layers)
+        if list(graph) == list(self.include_graph):
+            # only the values of the files read again may have changed
+            sections = self._layer_sections(
+                [self._layers[path] for path in paths if path in graph] +
+                [layers[path] for path in paths if path in graph])
+        else:
+            sections = None
+        old = self._merge_layers(self._layers, self.include_graph, sections)
+        new = self._merge_layers(layers, graph, sections)
+        self._layers = collections.OrderedDict(
+            (path, layers[path]) for path in graph)
+        self.include_graph = graph
+
+        # values set explicitly are not overridden
+        dirty = set()
+        for sections in self._dirty.values():
+            for section, options in sections.items():
+                dirty.update((section, self.optionxform(option))
+                             for option in options)
+        changed = set()
+        removed_sections = set()
+        for key in set(old).union(new):
+            if key in dirty or old.get(key) == new.get(key):
+                continue
+            section, option = key
+            if key in new:
+                value, filename, lineno = new[key]
+                if key not in old or old[key][0] != value:
+                    changed.add(key)
+                if section not in self._sections:
+                    self.add_section(section)
+                self._sections[section][option] = value
+                self._location.pop(key, None)
+                self._location[key] = (filename, lineno)
+            else:
+                changed.add(key)
+                self._sections.get(section, {}).pop(option, None)
+                self._location.pop(key, None)
+                removed_sections.add(section)
+        # drop sections no longer in any file
+        for section in removed_sections:
+            if not self._sections.get(section, True) and not any(
+                    section in layers[path][0] for path in graph):
+                del self._sections[section]
+
+        for section, option in changed:
+            self._invalidate_cache(section, option)
+        return changed.union(self._dependents(changed))
+
+    def _layer_graph(self, layers):
+        """Return the include graph of the files watched, in load order.
+
+        Files included for the first time are read into *layers*. Files
+        no longer included are left out.
+
+        """
+        included = set()
+        for includes in self.include_graph.values():
+            included.update(includes)
+        graph = collections.OrderedDict()
+
+        def visit(path, including):
+            if path in including:
+                raise IncludeCycleError(including[including.index(path):] +
+                                        [path])
+            if path in graph:
+                return
+            if path not in layers:
+                layers[path] = self._read_layer(path)
+            including.append(path)
+            for include in layers[path][2]:
+                visit(include, including)
+            including.pop()
+            graph[path] = layers[path][2]
+
+        for path in self.include_graph:
+            if path not in included:
+                visit(path, [])
+        return graph
+
+    def _layer_sections(self, layers):
+        """Return the names of the options in some files, by section."""
+        sections = {}
+        for values, lines, includes in layers:
+            for section, options in values.items():
+                sections.setdefault(section, set()).update(options)
+        return sections
+
+    def _merge_layers(self, layers, graph, sections=None):
+        """Return the values defined by the files in the graph.
+
+        Values are returned with the file and line defining them, by section
+        and option. If *sections* is given, only the options it holds, by
+        section, are returned.
+
+        """
+        values = {}
+        if sections is None:
+            for path in graph:
+                layer_sections, lines, includes = layers[path]
+                for section, options in layer_sections.items():
+                    section_lines = lines.get(section, {})
+                    for option, value in options.items():
+                        values[(section, option)] = (
+                            value, path, section_lines.get(option))
+        else:
+            # look for each option from the last file read
+            pending = dict((section, set(options))
+                           for section, options in sections.items())
+            for path in reversed(graph):
+                layer_sections, lines, includes = layers[path]
+                for section, names in list(pending.items()):
+                    options = layer_sections.get(section)
+                    if not options:
+                        continue
+                    found = names.intersection(options)
+                    section_lines = lines.get(section, {})
+                    for option in found:
+                        values[(section, option)] = (
+                            options[option], path, section_lines.get(option))
+                    names.difference_update(found)
+                    if not names:
+                        del pending[section]
+                if not pending:
+                    break
+        # includes are not kept
+        values.pop(('__main__', 'includes'), None)
+        return values
+
+    def _dependents(self, keys):
+        """Return the keys of the values interpolating the given ones."""
+        if not keys:
+            return set()
+        dependents = {}
+        for node, value in self._raw_values().items():
+            if not isinstance(value, string_types) or '%' not in value:
+                continue
+            for name in self._interpolation_references(value) or ():
+                name = self.optionxform(name)
+                # the same fallbacks as in _interpolate_value
+                for section in (node[0], '__main__', '__noschema__'):
+                    dependents.setdefault((section, name), []).append(node)
+        found = set()
+        pending = list(keys)
+        while pending:
+            for node in dependents.get(pending.pop(), ()):
+                if node not in found and node not in keys:
+                    found.add(node)
+                    pending.append(node)
+        return found
 
     def parse(self, section, option, value):
         """Parse the value of an option.
@@ -364,28 +1281,27 @@ class SchemaConfigParser(BaseConfigParser, object):
         This method raises ValueError if the value is not parseable.
 
         """
-        if section == '__main__':
-            option_obj = getattr(self.schema, option, None)
-        else:
-            section_obj = getattr(self.schema, section, None)
-            if section_obj is not None:
-                option_obj = getattr(section_obj, option, None)
-            else:
+        option_obj = self.schema._get_option(section, option)
+        if option_obj is None:
+            if section != '__main__' and not self.schema.has_section(section):
                 raise NoSectionError(section)
+            return value
+        return self._parse_value(section, option, option_obj, value)
 
-        if option_obj is not None:
-            kwargs = {}
-            if option_obj.require_parser:
-                kwargs = {'parser': self}
-
-            try:
-                value = option_obj.parse(value, **kwargs)
-            except ValueError as e:
-                raise ValueError("Invalid value '%s' for %s '%s' in"
-                    " section '%s'. Original exception was: %s" %
-                    (value, option_obj.__class__.__name__, option,
-                     section, e))
-        return value
+    def _parse_value(self, section, option, option_obj, value):
+        kwargs = self._parser_kwargs(option_obj, 'parse')
+        try:
+            return option_obj.parse(value, **kwargs)
+        except ValueError as e:
+            raise ValueError("Invalid value '%s' for %s '%s' in"
+                " section '%s'. Original exception was: %s" %
+                (value, option_obj.__class__.__name__, option,
+                 section, e))
+
+    def _parser_kwargs(self, option_obj, method):
+        if takes_parser(option_obj, method):
+            return {'parser': self}
+        return {}
 
     def parse_all(self):
         """Go through all sections and options attempting to parse each one.
@@ -396,18 +1312,197 @@ class SchemaConfigParser(BaseConfigParser, object):
         In the case of an NoSectionError or NoOptionError, raise it if the
         option has *fatal* set to *True*.
 
+        All the options are parsed, even if some of them fail. If only one
+        fails, its error is raised; otherwise ConfigErrors is raised, with
+        all the errors.
+
         """
-        for section in self.schema.sections():
-            for option in section.options():
-                try:
-                    self.get(section.name, option.name, raw=option.raw)
-                except (NoSectionError, NoOptionError):
-                    if option.fatal:
-                        raise
+        self._raise_errors(self._value_errors())
+
+    def _value_errors(self):
+        """Return the errors parsing all the options; see parse_all()."""
+        if True in self._values:
+            return []
+        values, errors = self._evaluate(
+            [section.name for section in self.schema.sections()])
+        if not errors:
+            self._values[True] = values
+        return [error for error in errors
+                if not isinstance(error[2], (NoSectionError, NoOptionError)) or
+                self.schema._get_option(*error[:2]).fatal]
+
+    def resolve(self):
+        """Interpolate all the values at once.
+
+        The references between values in all sections are collected first,
+        and each value is interpolated once, after the values it references.
+        Until the configuration changes, get() uses the interpolated values
+        instead of interpolating them again.
+
+        Raise InterpolationCycleError if values reference each other in a
+        cycle. Values that can't be interpolated are left for get() to
+        report.
+
+        """
+        self._materialize_all()
+        values = self._raw_values()
+        references = {}
+        graph = {}
+        for node, value in values.items():
+            if not isinstance(value, string_types):
+                continue
+            keys = self._interpolation_references(value)
+            if keys is None:
+                # not valid, get() will report the error
+                continue
+            references[node] = keys
+            graph[node] = self._reference_targets(node[0], keys, values)
+
+        resolved = {}
+        # values interpolated within their own section
+        local = set()
+        for node in self._resolution_order(graph):
+            value = self._resolve_value(node, values[node], references[node],
+                                        resolved, local)
+            if value is not None:
+                resolved[node] = value
+        self._resolved = resolved
+
+    def _raw_values(self):
+        """Return the raw values of all options, by section and option."""
+        values = {}
+        for section, options in self._sections.items():
+            items = dict(self._defaults)
+            items.update(options)
+            for option, value in items.items():
+                values[(section, option)] = value
+        return values
+
+    def _interpolation_references(self, rawval):
+        """Return the keys referenced by a raw value.
 
-    def locate(self, option=None):
-        """Return the location (file) where the option was last defined."""
-        return self._location.get(option)
+        Return None if the value doesn't use a valid interpolation syntax.
+
+        """
+        if '%' in _REFERENCE_RE.sub('', rawval):
+            return None
+        return [match.group(1) for match in _REFERENCE_RE.finditer(rawval)
+                if match.group(1) is not None]
+
+    def _reference_targets(self, section, keys, values):
+        targets = []
+        for key in keys:
+            name = self.optionxform(key)
+            if (section, name) in values:
+                targets.append((section, name))
+            else:
+                # the same fallbacks as in _interpolate_value
+                for fallback in ('__main__', '__noschema__'):
+                    if (fallback, name) in values:
+                        targets.append((fallback, name))
+        return targets
+
+    def _resolution_order(self, graph):
+        """Sort the graph so that values come after their references."""
+        order = []
+        visiting = set()
+        done = set()
+        for root in graph:
+            if root in done:
+                continue
+            path = [root]
+            stack = [iter(graph[root])]
+            visiting.add(root)
+            while stack:
+                for node in stack[-1]:
+                    if node in done or node not in graph:
+                        continue
+                    if node in visiting:
+                        cycle = path[path.index(node):] + [node]
+                        raise InterpolationCycleError(cycle)
+                    visiting.add(node)
+                    path.append(node)
+                    stack.append(iter(graph[node]))
+                    break
+                else:
+                    stack.pop()
+                    node = path.pop()
+                    visiting.remove(node)
+                    done.add(node)
+                    order.append(node)
+        return order
+
+    def _resolve_value(self, node, rawval, keys, resolved, local):
+        """Return the interpolated value of an option, or None if it can't
+        be interpolated."""
+        section = node[0]
+        names = [(section, self.optionxform(key)) for key in keys]
+        if all(name in resolved for name in names):
+            # value is defined entirely in current section
+            if all(name in local for name in names):
+                local.add(node)
+            return _REFERENCE_RE.sub(
+                lambda match: resolved[
+                    (section, self.optionxform(match.group(1)))]
+                if match.group(1) is not None else '%', rawval)
+
+        values = {}
+        for key, name in zip(keys, names):
+            try:
+                if name in resolved:
+                    value = self.interpolate_environment(resolved[name])
+                elif (name[1] in self._sections[section] or
+                        name[1] in self._defaults):
+                    # referenced value can't be interpolated either
+                    return
+                else:
+                    value = self._get_default(section, key)
+                    if isinstance(value, string_types):
+                        value = self.interpolate_environment(value)
+            except KeyError:
+                return
+            except (NoSectionError, NoOptionError):
+                # value of key not found in config, so try in special
+                # sections
+                for fallback in ('__main__', '__noschema__'):
+                    if (fallback, name[1]) in local:
+                        value = resolved[(fallback, name[1])]
+                        break
+                else:
+                    return
+            values[key] = value
+
+        try:
+            return rawval % values
+        except (KeyError, TypeError, ValueError):
+            return
+
+    def locate(self, option=None, section=None, lineno=False):
+        """Return the location (file) where the option was last defined.
+
+        If *section* is omitted, return the location of the option in the
+        section where it was last defined. If *lineno* is True, return a
+        (file, line number) tuple instead. Only options in the schema are
+        located.
+
+        """
+        location = None
+        if option is not None:
+            option = self.optionxform(option)
+            option_names = self.schema.option_names
+            if section is not None:
+                self._materialize(section)
+                if option in option_names(section):
+                    location = self._location.get((section, option))
+            else:
+                self._materialize_all()
+                for key in reversed(self._location):
+                    if key[1] == option and option in option_names(key[0]):
+                        location = self._location[key]
+                        break
+        if location is None:
+            location = (None, None)
+        return location if lineno else location[0]
 
     def _extract_interpolation_keys(self, item):
         if isinstance(item, (list, tuple)):
@@ -423,11 +1518,13 @@ class SchemaConfigParser(BaseConfigParser, object):
     def _get_interpolation_keys(self, section, option):
 
         rawval = super(SchemaConfigParser, self).get(section, option, raw=True)
-        try:
-            opt = self.schema.section(section).option(option)
-            value = opt.parse(rawval, raw=True)
-        except:
-            value = rawval
+        value = rawval
+        opt = self.schema._get_option(section, option)
+        if opt is not None:
+            try:
+                value = opt.parse(rawval, raw=True)
+            except:
+                pass
 
         keys = self._extract_interpolation_keys(value)
         return rawval, keys
@@ -469,10 +1566,43 @@ class SchemaConfigParser(BaseConfigParser, object):
         return result
 
     def interpolate_environment(self, rawval, raw=False):
-        """Interpolate environment variables"""
-        if raw:
+        """Interpolate environment variables
+
+        Values are interpolated using a snapshot of the environment, taken
+        the first time it's needed; see refresh_environment().
+
+        """
+        if raw or ('$' not in rawval and '%' not in rawval):
+            return rawval
+
+        try:
+            template = self._environment_templates[rawval]
+        except KeyError:
+            template = self._compile_environment_template(rawval)
+            self._environment_templates[rawval] = template
+        if template is None:
+            # interpolation keys are not valid
             return rawval
 
+        pattern, defaults = template
+        env = self._get_environment()
+        if defaults:
+            overrides = _EnvironmentOverrides(env)
+            for name, default in defaults:
+                if name not in overrides:
+                    # interpolate defaults as well to allow ${FOO:-$BAR}
+                    overrides[name] = default % env
+            env = overrides
+        return pattern % env
+
+    def _compile_environment_template(self, rawval):
+        """Return the template used to interpolate a value.
+
+        The template is a pattern to be interpolated using the environment,
+        and a list of (name, default) pairs for the variables with default
+        values, or None if the value doesn't use the environment.
+
+        """
         # this allows both nested and mutliple environment variable
         # interpolation in a single value
         pattern = re.sub(r'\${([A-Z_]+)}', r'%(\1)s', rawval)
@@ -484,16 +1614,15 @@ class SchemaConfigParser(BaseConfigParser, object):
         simple_pattern = pattern
 
         # handle complex case of env vars with defaults
-        env = os.environ.copy()
+        defaults = []
         env_re = re.compile(r'\${(?P<name>[A-Z_]+):-(?P<default>.*?)}')
         match = env_re.search(pattern)
         while match and num_interpolations < 50:
             groups = match.groupdict()
             name = groups['name']
             pattern = pattern.replace(match.group(), '%%(%s)s' % name)
-            if name not in env and groups['default'] is not None:
-                # interpolate defaults as well to allow ${FOO:-$BAR}
-                env[name] = groups['default'] % os.environ
+            if groups['default'] is not None:
+                defaults.append((name, groups['default']))
 
             num_interpolations += 1
             match = env_re.search(pattern)
@@ -501,13 +1630,17 @@ class SchemaConfigParser(BaseConfigParser, object):
         if num_interpolations >= 50:
             # blown loop, restore earlier simple interpolation
             pattern = simple_pattern
+            defaults = []
 
         keys = self._extract_interpolation_keys(pattern)
         if not keys:
-            # interpolation keys are not valid
-            return rawval
+            return None
+        return pattern, defaults
 
-        return pattern % env
+    def _get_environment(self):
+        if self._environment is None:
+            self._environment = dict(os.environ)
+        return self._environment
 
     def _get_default(self, section, option):
         # cater for 'special' sections
@@ -516,7 +1649,7 @@ class SchemaConfigParser(BaseConfigParser, object):
             return value
 
         # any other section
-        opt = self.schema.section(section).option(option)
+        opt = self._get_option(section, option)
         if not opt.fatal:
             value = opt.default
             return value
@@ -534,47 +1667,189 @@ class SchemaConfigParser(BaseConfigParser, object):
 
         If *parse* is False, return the string representation of the value.
 
+        Values are cached, unless *vars* are given; lists and dicts are
+        returned as copies, so changing them doesn't change the cached
+        values. See clear_cache().
+
         """
-        try:
-            # get option's raw mode setting
+        if vars is None:
+            key = (section, option, raw, parse)
             try:
-                option_obj = self._get_option(section, option)
-                raw = option_obj.raw or raw
-            except:
-                pass
-            # value is defined entirely in current section
-            value = super(SchemaConfigParser, self).get(section, option,
-                                                        raw=raw, vars=vars)
-        except InterpolationMissingOptionError as e:
-            # interpolation key not in same section
-            value = self._interpolate_value(section, option)
-            if value is None:
-                # this should be a string, so None indicates an error
-                raise e
-        except (NoSectionError, NoOptionError) as e:
-            # option not found in config, try to get its default value from
-            # schema
-            value = self._get_default(section, option)
+                value = self._cache[key]
+            except KeyError:
+                self._cache_misses += 1
+            else:
+                self._cache_hits += 1
+                return _copy(value)
+
+        self._materialize(section)
+        option_obj = self.schema._get_option(section, option)
+        value, uses_environment = self._get_value(
+            section, option, option_obj, raw, vars, parse)
+
+        if vars is None:
+            self._cache_value(key, value, option_obj, uses_environment)
+            value = _copy(value)
+        return value
+
+    def _get_value(self, section, option, option_obj, raw, vars, parse,
+                   items=None):
+        """Return the value of an option, and whether it uses the
+        environment; see get().
+
+        If *items* is given, it holds the raw values of the section, as
+        returned by _section_items(), to interpolate the value with.
+
+        """
+        # get option's raw mode setting
+        if option_obj is not None:
+            raw = option_obj.raw or raw
+        value = None
+        if not raw and vars is None and self._resolved is not None:
+            # use the value interpolated by resolve()
+            value = self._resolved.get((section, self.optionxform(option)))
+        if value is None:
+            try:
+                # value is defined entirely in current section
+                if items is None:
+                    value = super(SchemaConfigParser, self).get(
+                        section, option, raw=raw, vars=vars)
+                else:
+                    value = self._get_item(section, option, raw, items)
+            except InterpolationMissingOptionError as e:
+                # interpolation key not in same section
+                value = self._interpolate_value(section, option)
+                if value is None:
+                    # this should be a string, so None indicates an error
+                    raise e
+            except (NoSectionError, NoOptionError) as e:
+                # option not found in config, try to get its default value
+                # from schema
+                value = self._get_default(section, option)
 
         # interpolate environment variables
+        uses_environment = False
         if isinstance(value, string_types):
+            uses_environment = '$' in value
             try:
                 value = self.interpolate_environment(value, raw=raw)
                 if parse:
-                    value = self.parse(section, option, value)
+                    if option_obj is None:
+                        value = self.parse(section, option, value)
+                    else:
+                        value = self._parse_value(section, option,
+                                                  option_obj, value)
             except KeyError:
                 # interpolation failed, fallback to default value
                 value = self._get_default(section, option)
+        return value, uses_environment
 
-        return value
+    def _get_item(self, section, option, raw, items):
+        """Return a raw value from the items of its section, interpolated
+        as ConfigParser.get() would."""
+        name = self.optionxform(option)
+        try:
+            value = items[name]
+        except KeyError:
+            raise NoOptionError(option, section)
+        if raw or value is None or (isinstance(value, string_types) and
+                                    '%' not in value):
+            return value
+        return self._interpolation.before_get(self, section, name, value,
+                                              items)
+
+    def _cache_value(self, key, value, option_obj, uses_environment):
+        section, option = key[:2]
+        option = self.optionxform(option)
+        self._cache[key] = value
+        self._cache_keys.setdefault((section, option), set()).add(key)
+
+        # values that are interpolated, or parsed using other sections,
+        # depend on other options
+        stored = self._sections.get(section, {}).get(option)
+        if stored is None:
+            stored = self._defaults.get(option)
+        if ((option_obj is not None and option_obj.require_parser) or
+                (isinstance(stored, string_types) and '%' in stored)):
+            self._dependent_keys.add(key)
+        if uses_environment:
+            self._environment_keys.add(key)
+
+    def _invalidate_cache(self, section, option):
+        """Drop the cached values that may depend on the given option."""
+        name = (section, self.optionxform(option))
+        for key in self._cache_keys.pop(name, ()):
+            self._cache.pop(key, None)
+        for key in self._dependent_keys:
+            self._cache.pop(key, None)
+        self._dependent_keys.clear()
+        self._resolved = None
+        self._frozen = None
+        self._values = {}
+
+    def clear_cache(self):
+        """Drop all the values cached by get() and values().
+
+        The cache is kept up to date when the configuration changes through
+        the parser's methods (read(), set(), etc); clearing it is needed
+        only if the configuration is modified by other means.
+
+        """
+        self._cache.clear()
+        self._cache_keys.clear()
+        self._dependent_keys.clear()
+        self._environment_keys.clear()
+        self._resolved = None
+        self._frozen = None
+        self._values = {}
+
+    def cache_info(self):
+        """Return the number of cache hits and misses, and the cache size.
+
+        The size counts the values cached by get(), and by values().
+
+        """
+        size = len(self._cache)
+        for values in self._values.values():
+            size += sum(len(options) for options in values.values())
+        return CacheInfo(self._cache_hits, self._cache_misses, size)
+
+    def refresh_environment(self):
+        """Take a new snapshot of the environment.
+
+        Environment variables are interpolated using a snapshot of the
+        environment, so changes to the environment are only seen after
+        calling this method. Cached values using environment variables are
+        dropped.
+
+        """
+        self._environment = None
+        self._resolved = None
+        self._frozen = None
+        self._values = {}
+        for key in self._environment_keys:
+            self._cache.pop(key, None)
+        self._environment_keys.clear()
 
     def _get_option(self, section, option):
-        section_obj = self.schema.section(section)
-        option_obj = section_obj.option(option)
+        option_obj = self.schema._get_option(section, option)
+        if option_obj is None:
+            if not self.schema.has_section(section):
+                raise NoSectionError(section)
+            raise NoOptionError(option, section)
         return option_obj
 
+    def has_option(self, section, option):
+        self._materialize(section)
+        return super(SchemaConfigParser, self).has_option(section, option)
+
+    def options(self, section):
+        self._materialize(section)
+        return super(SchemaConfigParser, self).options(section)
+
     def set(self, section, option, value):
         """Set an option's raw value."""
+        self._materialize(section)
         option_obj = self._get_option(section, option)
         # make sure the value is of the right type for the option
         if not option_obj.validate(value):
@@ -582,18 +1857,38 @@ class SchemaConfigParser(BaseConfigParser, object):
                 value, type(option_obj).__name__))
         # cast value to a string because SafeConfigParser only allows
         # strings to be set
-        str_value = option_obj.to_string(value)
+        str_value = option_obj.to_string(
+            value, **self._parser_kwargs(option_obj, 'to_string'))
         if not self.has_section(section):
             # Don't call .add_section here because 2.6 complains
             # about sections called '__main__'
             self._sections[section] = {}
         super(SchemaConfigParser, self).set(section, option, str_value)
-        filename = self.locate(option)
+        self._invalidate_cache(section, option)
+        filename = self.locate(option, section)
         self._dirty[filename][section][option] = str_value
 
+    def remove_option(self, section, option):
+        """Remove an option."""
+        self._materialize(section)
+        removed = super(SchemaConfigParser, self).remove_option(
+            section, option)
+        if removed:
+            self._invalidate_cache(section, option)
+        return removed
+
+    def remove_section(self, section):
+        """Remove a file section."""
+        self._lazy_sections.pop(section, None)
+        removed = super(SchemaConfigParser, self).remove_section(section)
+        if removed:
+            self.clear_cache()
+        return removed
+
     def write(self, fp):
         """Write an .ini-format representation of the configuration state."""
         # make sure the parser is populated
+        self._materialize_all()
         self._fill_parser()
 
         if self._defaults:
@@ -661,3 +1956,90 @@ class SchemaConfigParser(BaseConfigParser, object):
                 self.set(section, option, value)
         # make sure having set the options didn't change anything
         assert values == self.values()
+
+
+def _changing(name):
+    """Return a method making a change to a copy of the current parser."""
+    def method(self, *args, **kwargs):
+        return self._change(name, *args, **kwargs)
+    method.__name__ = name
+    method.__doc__ = getattr(SchemaConfigParser, name).__doc__
+    return method
+
+
+class ThreadSafeSchemaConfigParser(object):
+    """A SchemaConfigParser which can be shared by threads.
+
+    Reading values goes straight to the current parser, without locking.
+    Changes (read(), set(), etc) are made to a copy of the current parser,
+    and published by replacing it in a single assignment, so readers see
+    the configuration either as it was before a change or after it, never
+    half changed. A change that fails is not published. Changes are made
+    one at a time.
+
+    Anything else is looked up in the current parser, which should not be
+    changed directly.
+
+    """
+
+    def __init__(self, schema, json_codec=None):
+        self._parser = SchemaConfigParser(schema, json_codec=json_codec)
+        self._lock = threading.Lock()
+
+    @property
+    def parser(self):
+        """The current parser."""
+        return self._parser
+
+    def _change(self, name, *args, **kwargs):
+        with self._lock:
+            parser = self._parser._copy()
+            result = getattr(parser, name)(*args, **kwargs)
+            # readers must not parse sections read lazily
+            parser._materialize_all()
+            self._parser = parser
+        return result
+
+    def __getattr__(self, name):
+        return getattr(self._parser, name)
+
+    def get(self, section, option, raw=False, vars=None, parse=True):
+        return self._parser.get(section, option, raw, vars, parse)
+    get.__doc__ = SchemaConfigParser.get.__doc__
+
+    read = _changing('read')
+    readfp = _changing('readfp')
+    read_file = _changing('read_file')
+    read_string = _changing('read_string')
+    read_dict = _changing('read_dict')
+    set = _changing('set')
+    add_section = _changing('add_section')
+    remove_option = _changing('remove_option')
+    remove_section = _changing('remove_section')
+    update_schema = _changing('update_schema')
+    refresh_environment = _changing('refresh_environment')
+    clear_cache = _changing('clear_cache')
+    resolve = _changing('resolve')
+    apply_diff = _changing('apply_diff')
+    write = _changing('write')
+    save = _changing('save')
+    _reload = _changing('_reload')
+    _read_files = _changing('_read_files')
+    _watch_layers = _changing('_watch_layers')
+
+    def watch(self, interval=1.0, debounce=0.1, inotify=True):
+        self._change('_watch_files')
+        return _watch.Watcher(self, interval, debounce, inotify)
+    watch.__doc__ = SchemaConfigParser.watch.__doc__
+
+    def aread(self, filenames, already_read=None, lazy=False):
+        return _aio.read(self, filenames, already_read, lazy)
+    aread.__doc__ = SchemaConfigParser.aread.__doc__
+
+    def areload(self):
+        return _aio.reload(self)
+    areload.__doc__ = SchemaConfigParser.areload.__doc__
+
+    def awatch(self, interval=1.0, debounce=0.1, inotify=True):
+        return _aio.watch(self, interval, debounce, inotify)
+    awatch.__doc__ = SchemaConfigParser.awatch.__doc__
@@ -14,11 +14,15 @@
 #
 ###############################################################################
 
+import hashlib
 import json
-from copy import deepcopy
+import marshal
+import re
+import types
+from importlib import import_module
 from inspect import getmembers
 
-from ._compat import text_type, string_types
+from ._compat import text_type, string_types, with_metaclass
 from ._compat import NoSectionError, NoOptionError
 
 
@@ -33,11 +37,30 @@ __all__ = [
     'Schema',
     'StringOption',
     'TupleOption',
+    'diff',
     'merge',
 ]
 
 NO_DEFAULT = object()
 
+# cache of schema definitions, by Schema class
+_definitions = {}
+# shared instances of identical option definitions
+_flyweights = {}
+# names of the public slots of option types, by type
+_slots = {}
+# cache of merged schemas, by tuple of merged Schema classes
+_merged = {}
+# option types used by serialized schemas, by module and qualified name
+_types = {}
+# version of the format written by Schema.dumps
+_SERIALIZATION_FORMAT = 1
+# first non-blank character of a value
+_FIRST_CHAR = re.compile(r'\s*(\S)')
+# attribute values represented as is in fingerprints
+_CANONICAL_TYPES = (type(None), bool, int, float, complex, bytes,
+                    text_type) + string_types
+
 
 def get_config_objects(obj):
     """Return the list of Section- and Option-derived objects."""
@@ -45,58 +68,804 @@ def get_config_objects(obj):
     for name, obj in getmembers(obj):
         if isinstance(obj, (Section, Option)):
             objects.append((name, obj))
-        elif type(obj) == type and issubclass(obj, Section):
-            instance = obj()
-            for key, value in get_config_objects(obj):
-                setattr(instance, key, value)
-            objects.append((name, instance))
+        elif _is_section_class(obj):
+            objects.append((name, _instantiate_section(obj)))
     return objects
 
 
+def get_definition(cls, lazy=False):
+    """Return the (cached) SchemaDefinition for a Schema class.
+
+    Unless *lazy* is True, all the sections in the definition are
+    introspected before returning it.
+
+    """
+    definition = _definitions.get(cls)
+    if definition is None:
+        definition = _definitions[cls] = SchemaDefinition(cls)
+    if not lazy:
+        definition.complete()
+    return definition
+
+
+def _is_section_class(obj):
+    return isinstance(obj, type) and issubclass(obj, Section)
+
+
+def _instantiate_section(cls):
+    """Return an instance of a Section class holding all its options."""
+    instance = cls()
+    for key, value in get_config_objects(cls):
+        setattr(instance, key, value)
+    return instance
+
+
+def _invalidate_definitions(cls):
+    """Discard the cached definitions that depend on the class *cls*."""
+    if issubclass(cls, Schema):
+        pending = [cls]
+        while pending:
+            klass = pending.pop()
+            _definitions.pop(klass, None)
+            pending.extend(klass.__subclasses__())
+        # the merged schema was modified, so don't hand it out anymore
+        for key, (definitions, merged) in list(_merged.items()):
+            if issubclass(merged, cls):
+                del _merged[key]
+    else:
+        # a Section class might be used by any schema
+        _definitions.clear()
+
+
+def intern_option(option):
+    """Return a shared instance of an option equivalent to *option*.
+
+    Unbound options (i.e., options not assigned to a schema or section, like
+    the ones used as ListOption or DictOption items) that are defined the
+    same way are interchangeable, so a single instance of them is kept
+    around and shared. Options that cannot be shared are returned as is.
+
+    """
+    if (option.name or option.section is not None or
+            hasattr(option, '__dict__')):
+        # bound or not compact, do not share
+        return option
+
+    key = [type(option)]
+    for name in _slot_names(type(option)):
+        if name in ('name', 'section'):
+            continue
+        key.append(_flyweight_key(getattr(option, name, NO_DEFAULT)))
+    try:
+        key = tuple(key)
+        shared = _flyweights.get(key)
+    except TypeError:
+        # some value is not hashable
+        return option
+
+    if shared is None or shared.name or shared.section is not None:
+        # no shared instance yet, or it got bound after being shared
+        _flyweights[key] = shared = option
+    return shared
+
+
+def _flyweight_key(value):
+    """Return the key of an attribute value of a shared option.
+
+    Values are keyed along with their types, so that equal values of
+    different types (like 1 and True) are told apart.
+
+    """
+    if isinstance(value, Option):
+        # options held by shared options are shared as well
+        return (Option, id(value))
+    elif isinstance(value, tuple):
+        return (type(value), tuple(_flyweight_key(item) for item in value))
+    elif isinstance(value, frozenset):
+        return (type(value), frozenset(_flyweight_key(item)
+                                       for item in value))
+    return (type(value), value)
+
+
+def _bind(option, **attrs):
+    """Set attributes binding an option to a schema.
+
+    Bound options, and the item and spec options they hold, can't be
+    changed otherwise; see Option.__setattr__.
+
+    """
+    for name, value in attrs.items():
+        object.__setattr__(option, name, value)
+    object.__setattr__(option, '_fingerprint', None)
+    object.__setattr__(option, '_bound', True)
+    # nested options are part of the option's fingerprint
+    pending = _nested_options(option)
+    while pending:
+        option = pending.pop()
+        if not getattr(option, '_bound', False):
+            object.__setattr__(option, '_bound', True)
+            pending.extend(_nested_options(option))
+
+
+def _private_copy(option, owner):
+    """Return a copy of a shared option that can be changed.
+
+    The item and spec options it holds are copied as well. Changing the
+    copy forgets the fingerprints memoized by its *owner*; see _changed().
+
+    """
+    cls = type(option)
+    copied = cls.__new__(cls)
+    for name in _slot_names(cls):
+        try:
+            value = getattr(option, name)
+        except AttributeError:
+            continue
+        object.__setattr__(copied, name, _copy_nested(value, copied))
+    if hasattr(option, '__dict__'):
+        for name, value in option.__dict__.items():
+            object.__setattr__(copied, name, _copy_nested(value, copied))
+    object.__setattr__(copied, '_bound', False)
+    object.__setattr__(copied, '_owner', owner)
+    # the copy is defined the same way
+    object.__setattr__(copied, '_fingerprint',
+                       getattr(option, '_fingerprint', None))
+    return copied
+
+
+def _copy_nested(value, owner):
+    if isinstance(value, Option):
+        return _private_copy(value, owner)
+    elif isinstance(value, dict):
+        return dict((key, _copy_nested(item, owner))
+                    for key, item in value.items())
+    return value
+
+
+def _instance_option(section, option):
+    """Return a schema instance's own copy of one of its options.
+
+    *section* is the instance's copy of the section holding the option.
+    Options are shared by all the instances of a schema until they are
+    accessed through one of them; then they are copied into its section,
+    so that they can be changed without affecting the other instances.
+
+    """
+    attrs = section.__dict__
+    shared = attrs.get('_shared')
+    if shared is None:
+        return option
+    schema = attrs['_owner']
+    if section.name in schema._definition.pending:
+        # bind the options of a lazy schema's section first
+        schema._materialize(section.name)
+    if shared.__dict__.get(option.name) is not option:
+        return option
+    copied = attrs.get(option.name)
+    if isinstance(copied, Option):
+        return copied
+    copied = _private_copy(option, section)
+    if option.section is shared:
+        object.__setattr__(copied, 'section', section)
+    attrs[option.name] = copied
+    schema._private[(section.name, option.name)] = copied
+    return copied
+
+
+def _changed(obj):
+    """Forget the fingerprints memoized by an object and its owners.
+
+    Private copies of options are owned by the options or sections holding
+    them, and the sections of a schema instance by the instance.
+
+    """
+    while obj is not None:
+        if isinstance(obj, Option):
+            object.__setattr__(obj, '_fingerprint', None)
+            obj = getattr(obj, '_owner', None)
+        elif isinstance(obj, Section):
+            obj.__dict__.pop('_fingerprint', None)
+            obj = obj.__dict__.get('_owner')
+        else:
+            obj._fingerprint = None
+            obj = None
+
+
+def _nested_options(option):
+    """Return the options held by an option, like its item or spec."""
+    options = []
+    values = [getattr(option, name, None)
+              for name in _slot_names(type(option))]
+    values.extend(getattr(option, '__dict__', {}).values())
+    for value in values:
+        if isinstance(value, dict):
+            options.extend(item for item in value.values()
+                           if isinstance(item, Option))
+        elif isinstance(value, Option):
+            options.append(value)
+    return options
+
+
+def _slot_names(cls):
+    """Return the names of all the public slots defined by cls and its
+    bases."""
+    names = _slots.get(cls)
+    if names is not None:
+        return names
+    names = []
+    for klass in reversed(cls.__mro__):
+        slots = klass.__dict__.get('__slots__', ())
+        if isinstance(slots, string_types):
+            slots = (slots,)
+        names.extend(name for name in slots
+                     if name not in names and not name.startswith('_'))
+    names = _slots[cls] = tuple(names)
+    return names
+
+
+def _type_name(cls):
+    return '%s.%s' % (cls.__module__, cls.__name__)
+
+
+def _attribute_names(option):
+    """Return the sorted names of the attributes defining an option."""
+    names = set(_slot_names(type(option)))
+    names.update(name for name in getattr(option, '__dict__', ())
+                 if not name.startswith('_'))
+    names.discard('section')
+    return sorted(names)
+
+
+def _canonical(value):
+    """Return a representation of value that doesn't depend on ordering."""
+    if isinstance(value, Option):
+        return ('option', value.fingerprint())
+    elif isinstance(value, Section):
+        return ('section', value.name)
+    elif isinstance(value, dict):
+        items = [(_canonical(k), _canonical(v)) for k, v in value.items()]
+        return ('dict', sorted(items, key=repr))
+    elif isinstance(value, (set, frozenset)):
+        return ('set', sorted((_canonical(v) for v in value), key=repr))
+    elif isinstance(value, (list, tuple)):
+        return (type(value).__name__, [_canonical(v) for v in value])
+    elif value is NO_DEFAULT:
+        return ('missing',)
+    elif isinstance(value, types.ModuleType):
+        return ('module', value.__name__)
+    elif isinstance(value, (type, types.FunctionType,
+                            types.BuiltinFunctionType)):
+        return ('object', '%s.%s' % (
+            value.__module__, getattr(value, '__qualname__', value.__name__)))
+    elif not isinstance(value, _CANONICAL_TYPES):
+        # other objects, like json codecs, by type; their repr may vary
+        # from one process to another
+        return ('instance', _type_name(type(value)))
+    return value
+
+
+def _digest(value):
+    """Return a hex digest of the given canonical representation."""
+    return hashlib.sha1(repr(value).encode('utf-8')).hexdigest()
+
+
+def _type_path(cls):
+    """Return the module and qualified name an option type is imported by."""
+    path = (cls.__module__, getattr(cls, '__qualname__', cls.__name__))
+    try:
+        resolved = _resolve_type(path)
+    except (ImportError, AttributeError):
+        resolved = None
+    if resolved is not cls:
+        raise ValueError("Cannot serialize option of type %s: the type "
+                         "cannot be imported." % '.'.join(path))
+    return path
+
+
+def _resolve_type(path):
+    """Return the option type imported by the given module and name."""
+    cls = _types.get(path)
+    if cls is None:
+        module, qualname = path
+        cls = import_module(module)
+        for name in qualname.split('.'):
+            cls = getattr(cls, name)
+        _types[path] = cls
+    return cls
+
+
+class _SchemaDumper(object):
+    """Build the marshallable representation of a schema's options.
+
+    Options are stored once each in a table, as their type (an index in a
+    table of types, with the names of their attributes) and the values of
+    those attributes, in order. Values that are not plain data (options,
+    dicts holding options, missing defaults and unset attributes) are
+    encoded separately, as (position, value) pairs.
+
+    """
+
+    def __init__(self):
+        self.types = []
+        self.options = []
+        self._type_index = {}
+        self._memo = {}
+
+    def option(self, option):
+        """Add an option to the table and return its index."""
+        index = self._memo.get(id(option))
+        if index is not None:
+            return index
+        names = tuple(_attribute_names(option))
+        key = (type(option), names)
+        type_index = self._type_index.get(key)
+        if type_index is None:
+            type_index = self._type_index[key] = len(self.types)
+            self.types.append((_type_path(type(option)), names))
+
+        unset = object()
+        values = []
+        special = []
+        for position, name in enumerate(names):
+            value = getattr(option, name, unset)
+            if value is unset:
+                special.append((position, ('unset',)))
+                value = None
+            elif (value is NO_DEFAULT or
+                    isinstance(value, (Option, dict, types.ModuleType))):
+                special.append((position, self.value(value)))
+                value = None
+            values.append(value)
+        index = self._memo[id(option)] = len(self.options)
+        self.options.append((type_index, tuple(values), tuple(special)))
+        return index
+
+    def value(self, value):
+        if isinstance(value, Option):
+            return ('option', self.option(value))
+        elif isinstance(value, dict):
+            return ('dict', [(key, self.value(item))
+                             for key, item in value.items()])
+        elif value is NO_DEFAULT:
+            return ('missing',)
+        elif isinstance(value, types.ModuleType):
+            return ('module', value.__name__)
+        return ('value', value)
+
+
+class _SchemaLoader(object):
+    """Build the options stored by a _SchemaDumper."""
+
+    def __init__(self, types, options):
+        self.types = [(_resolve_type(path), names) for path, names in types]
+        self.options = []
+        for type_index, values, special in options:
+            cls, names = self.types[type_index]
+            option = cls.__new__(cls)
+            option.section = None
+            for name, value in zip(names, values):
+                setattr(option, name, value)
+            for position, value in special:
+                if value[0] == 'unset':
+                    delattr(option, names[position])
+                else:
+                    setattr(option, names[position], self.value(value))
+            self.options.append(option)
+
+    def value(self, value):
+        kind = value[0]
+        if kind == 'option':
+            return self.options[value[1]]
+        elif kind == 'dict':
+            return dict((key, self.value(item)) for key, item in value[1])
+        elif kind == 'missing':
+            return NO_DEFAULT
+        elif kind == 'module':
+            return import_module(value[1])
+        return value[1]
+
+
+def _json_codec(option, parser=None):
+    """Return the JSON codec used by an option.
+
+    That's the option's own codec, if set, or else the parser's codec, if
+    set, or else the json module.
+
+    """
+    codec = option.json_codec
+    if codec is None:
+        codec = getattr(parser, 'json_codec', None) or json
+    return codec
+
+
+def takes_parser(option, method):
+    """Return whether a method of an option should get the parser.
+
+    parse() gets it if the option requires it. The parse() and to_string()
+    methods of ListOption and DictOption get it as well, to find the json
+    codec to use; subclasses overriding them don't, unless they require
+    the parser for parsing.
+
+    """
+    if method == 'parse' and option.require_parser:
+        return True
+    return getattr(type(option), method) in _JSON_METHODS
+
+
+def _decode_json(codec, value, kind):
+    """Return value decoded as JSON, if it holds JSON of the given kind.
+
+    *kind* is either list or dict. The value is only decoded if its first
+    non-blank character can start such JSON; None is returned otherwise, or
+    if decoding fails.
+
+    """
+    if not isinstance(value, string_types):
+        return None
+    match = _FIRST_CHAR.match(value)
+    if match is None or match.group(1) != ('[' if kind is list else '{'):
+        return None
+    try:
+        parsed = codec.loads(value)
+    except (TypeError, ValueError):
+        return None
+    if not isinstance(parsed, kind):
+        return None
+    return parsed
+
+
+def _encode_json(codec, value):
+    encoded = codec.dumps(value)
+    if isinstance(encoded, bytes):
+        # some codecs encode to utf-8 bytes
+        encoded = encoded.decode('utf-8')
+    return encoded
+
+
+def _remove_duplicates(items):
+    """Return a list of the items, keeping only the first of duplicates."""
+    seen = set()
+    result = []
+    for item in items:
+        try:
+            if item in seen:
+                continue
+            seen.add(item)
+        except TypeError:
+            # not hashable
+            if item in result:
+                continue
+        result.append(item)
+    return result
+
+
+def _copy_section(section):
+    """Return a shallow copy of a Section, sharing its options."""
+    copied = section.__class__.__new__(section.__class__)
+    copied.__dict__.update(section.__dict__)
+    return copied
+
+
+def _instance_section(section, schema, attrs):
+    """Return a copy of a Section for a schema instance.
+
+    The copy only gets the other *attrs* of *section*, not its options;
+    they are copied into it when accessed through it; see
+    _instance_option().
+
+    """
+    copied = section.__class__.__new__(section.__class__)
+    copied.__dict__.update(attrs)
+    fingerprint = section.__dict__.get('_fingerprint')
+    if fingerprint is not None:
+        copied.__dict__['_fingerprint'] = fingerprint
+    copied.__dict__['_shared'] = section
+    copied.__dict__['_owner'] = schema
+    return copied
+
+
+class ConfigObjectType(type):
+    """Metaclass for Schema and Section classes.
+
+    Introspecting a Schema class is expensive, so its results are cached
+    per class. Changing the attributes of a Schema or Section class
+    invalidates the cached results that depend on it.
+
+    Section classes are also descriptors, so that the sections of a lazy
+    Schema get introspected the first time they are accessed as attributes;
+    as the same class can be used for several sections, they are looked up
+    by name by Schema.__getattr__.
+
+    """
+
+    def __setattr__(cls, name, value):
+        super(ConfigObjectType, cls).__setattr__(name, value)
+        _invalidate_definitions(cls)
+
+    def __delattr__(cls, name):
+        super(ConfigObjectType, cls).__delattr__(name)
+        _invalidate_definitions(cls)
+
+    def __get__(cls, instance, owner):
+        # sections of lazy schemas are introspected on first access
+        if (isinstance(instance, Schema) and issubclass(cls, Section) and
+                cls in instance._definition.sources):
+            # the name it's accessed by is not known here
+            raise AttributeError(cls.__name__)
+        return cls
+
+
+class SchemaDefinition(object):
+    """The sections and options defined by a Schema class.
+
+    A definition is built once per Schema class, by introspecting it, and
+    it's shared by all the instances of that class. It also holds the
+    lookup tables used to find options by name, so that looking up an
+    option never needs to introspect the schema again.
+
+    Building a definition only registers the sections by name; each
+    section is introspected, and its options bound, by materialize(),
+    either when it's first needed or all at once by complete().
+
+    Options are shared by all the instances of a schema, so they can't be
+    changed once they are bound to it; instances change copies of them.
+
+    """
+
+    def __init__(self, cls):
+        self._setup()
+        for name, item in getmembers(cls):
+            if isinstance(item, Option):
+                _bind(item, name=name)
+                self.main_options.append(item)
+                name = '__main__'
+            elif isinstance(item, Section) or _is_section_class(item):
+                if isinstance(item, Section):
+                    item.name = name
+                else:
+                    self.sources.setdefault(item, []).append(name)
+                self.pending[name] = item
+            else:
+                continue
+            if name not in self.section_order:
+                self.section_order.append(name)
+        self.section_names = frozenset(self.section_order)
+
+        self.explicit_main = '__main__' in self.pending
+        if self.explicit_main:
+            self.materialize('__main__')
+        if self.main_options:
+            section = self.sections.get('__main__')
+            if section is None:
+                section = Section(name='__main__')
+                self.sections['__main__'] = section
+            for option in self.main_options:
+                _bind(option, section=section)
+                setattr(section, option.name, option)
+            self._index('__main__', self.main_options)
+
+    def _setup(self):
+        self.sections = {}
+        self.pending = {}
+        self.sources = {}
+        self.section_order = []
+        self.main_options = []
+        self.explicit_main = False
+        self.index = {}
+        self.section_options = {}
+        self.option_names = {}
+        self.fatal_options = {}
+        self.all_option_names = None
+        # attributes of the sections other than options, by section name
+        self.section_attributes = {}
+
+    @classmethod
+    def from_sections(cls, sections):
+        """Return a definition made of already bound sections.
+
+        *sections* is a list of (section, options) pairs, in order.
+
+        """
+        definition = cls.__new__(cls)
+        definition._setup()
+        for section, options in sections:
+            name = section.name
+            definition.section_order.append(name)
+            definition.sections[name] = section
+            definition._index(name, options)
+            if name == '__main__':
+                definition.main_options = list(options)
+        definition.section_names = frozenset(definition.section_order)
+        return definition.complete()
+
+    def _index(self, name, options):
+        self.section_options[name] = tuple(options)
+        self.option_names[name] = frozenset(opt.name for opt in options)
+        self.fatal_options[name] = frozenset(
+            opt.name for opt in options if opt.fatal)
+        for opt in options:
+            self.index[(name, opt.name)] = opt
+        self.all_option_names = None
+
+    def materialize(self, name):
+        """Introspect a pending section and bind its options.
+
+        Return the section, or None if there is no such section.
+
+        """
+        section = self.pending.get(name)
+        if section is None:
+            return self.sections.get(name)
+        if _is_section_class(section):
+            section = _instantiate_section(section)
+            section.name = name
+        for opt_name, opt in get_config_objects(section):
+            _bind(opt, name=opt_name, section=section)
+        self.sections[name] = section
+        self._index(name, section.options())
+        del self.pending[name]
+        return section
+
+    def attributes(self, name, section):
+        """Return the attributes of a section other than its options."""
+        cached = self.section_attributes.get(name)
+        if cached is None or cached[0] is not section:
+            attrs = dict((key, value)
+                         for key, value in section.__dict__.items()
+                         if not isinstance(value, Option) and
+                         key != '_fingerprint')
+            cached = self.section_attributes[name] = (section, attrs)
+        return cached[1]
+
+    def complete(self):
+        """Introspect all the pending sections."""
+        for name in list(self.pending):
+            self.materialize(name)
+        if self.all_option_names is None:
+            self.all_option_names = frozenset().union(
+                *self.option_names.values())
+        return self
+
+
+class SchemaDiff(object):
+    """The differences between two schemas.
+
+    *added*, *removed* and *changed* map section names to the sets of names
+    of the options added, removed or changed within them; sections without
+    such options are left out. *added_sections* and *removed_sections* hold
+    the names of the sections only defined by the new or old schema.
+
+    """
+
+    def __init__(self, old, new):
+        self.old = old
+        self.new = new
+        self.added = {}
+        self.removed = {}
+        self.changed = {}
+
+        old_definition = _complete_definition(old)
+        new_definition = _complete_definition(new)
+        self.added_sections = (new_definition.section_names -
+                               old_definition.section_names)
+        self.removed_sections = (old_definition.section_names -
+                                 new_definition.section_names)
+        old_index = old_definition.index
+        new_index = new_definition.index
+        for key, option in old_index.items():
+            other = new_index.get(key)
+            if other is None:
+                self._add(self.removed, key)
+            elif (other is not option and
+                    other.fingerprint() != option.fingerprint()):
+                self._add(self.changed, key)
+        for key in new_index:
+            if key not in old_index:
+                self._add(self.added, key)
+
+    def _add(self, changes, key):
+        section, option = key
+        changes.setdefault(section, set()).add(option)
+
+    def __bool__(self):
+        return bool(self.added or self.removed or self.changed or
+                    self.added_sections or self.removed_sections)
+    __nonzero__ = __bool__
+
+    def __repr__(self):
+        return '<SchemaDiff added=%r removed=%r changed=%r>' % (
+            self.added, self.removed, self.changed)
+
+    def options(self):
+        """Return the set of (section, option) pairs affected by the diff."""
+        keys = set()
+        for changes in (self.added, self.removed, self.changed):
+            for section, options in changes.items():
+                keys.update((section, option) for option in options)
+        return keys
+
+
+def _complete_definition(schema):
+    """Return the definition of a schema, with all its sections."""
+    if not schema._complete:
+        schema._materialize_all()
+    return schema._definition
+
+
+def diff(old, new):
+    """Return the SchemaDiff between two schema instances.
+
+    Options are compared by section and name, using the lookup tables of
+    both schemas, so the cost is proportional to the number of options.
+    Options shared by both schemas are never compared further; other
+    options are compared by their fingerprints.
+
+    """
+    return SchemaDiff(old, new)
+
+
 def merge(*schemas):
+    """Return a Schema class combining all the given Schema classes.
+
+    Options defined in more than one schema must be defined the same way;
+    a SchemaValidationError listing every conflicting option is raised
+    otherwise.
+
+    Results are memoized, so merging the same schemas again returns the
+    same class, unless any of them changed in between.
+
+    """
     # import here to avoid circular imports
     from .parser import SchemaValidationError
 
-    # define result schema
-    class MergedSchema(Schema):
-        pass
-
-    # for each schema
-    for schema in schemas:
-        instance = schema()
-        # iterate over the schema sections
-        for section in instance.sections():
-            # create the appropriate section object
-            section_name = section.name
-            if section_name == '__main__':
-                # section is special __main__ section
-                sect = MergedSchema
-            elif not hasattr(MergedSchema, section_name):
-                # section is not present in schema, just copy it over
-                # completely
-                setattr(MergedSchema, section_name, section)
-                continue
-            else:
-                # section is present in schema, do the merge
-                sect = getattr(MergedSchema, section_name)
+    key = tuple(schemas)
+    definitions = tuple(get_definition(schema) for schema in schemas)
+    cached = _merged.get(key)
+    if cached is not None and cached[0] == definitions:
+        return cached[1]
+
+    attrs = {}
+    sections = {}
+    index = {}
+    conflicts = []
+    for definition in definitions:
+        for section_name, options in definition.section_options.items():
+            if section_name != '__main__':
+                section = sections.get(section_name)
+                if section is None:
+                    # section is not present in schema, copy it over
+                    section = _copy_section(definition.sections[section_name])
+                    sections[section_name] = attrs[section_name] = section
+                    for option in options:
+                        index[(section_name, option.name)] = option
+                    continue
 
             # do the merge
+            for option in options:
+                option_key = (section_name, option.name)
+                opt = index.get(option_key)
+                if opt is None:
+                    index[option_key] = option
+                    if section_name == '__main__':
+                        attrs[option.name] = option
+                    else:
+                        setattr(section, option.name, option)
+                elif opt is not option and opt != option:
+                    conflicts.append("%s.%s" % option_key)
 
-            # iterate over the section options
-            for option in section.options():
-                opt = getattr(sect, option.name, None)
-                if opt is not None:
-                    if option != opt:
-                        raise SchemaValidationError("Conflicting option "
-                            "'%s.%s' while merging schemas." % (
-                            section_name, option.name))
-                else:
-                    setattr(sect, option.name, option)
+    if conflicts:
+        if len(conflicts) == 1:
+            msg = "Conflicting option '%s' while merging schemas."
+        else:
+            msg = "Conflicting options '%s' while merging schemas."
+        raise SchemaValidationError(msg % "', '".join(sorted(conflicts)))
 
-    return MergedSchema
+    merged = type(Schema)('MergedSchema', (Schema,), attrs)
+    _merged[key] = (definitions, merged)
+    return merged
 
 
-class Schema(object):
+class Schema(with_metaclass(ConfigObjectType, object)):
     """A complete description of a system configuration.
 
     To define your own configuration schema you should:
@@ -115,50 +884,172 @@ class Schema(object):
 
     """
 
-    def __init__(self):
+    def __init__(self, lazy=False):
+        self._setup(get_definition(self.__class__, lazy=lazy))
+
+    def _setup(self, definition):
         self.includes = ListOption(item=StringOption())
+        self._fingerprint = None
+        self._complete = not definition.pending
+        self._definition = definition
+        # sections are copied so that each instance can be modified on its
+        # own, while options are shared until accessed; the copies made, by
+        # section and option name
         self._sections = {}
-        # add section and options to the schema
-        for name, item in get_config_objects(self.__class__):
-            self._add_item(name, item)
-
-    def _add_item(self, name, item):
-        """Add a top-level item to the schema."""
-        item.name = name
-        if isinstance(item, Section):
-            self._add_section(name, item)
-        elif isinstance(item, Option):
-            self._add_option(name, item)
-        # override class attributes with instance attributes to correctly
-        # handle schema inheritance
-        setattr(self, name, deepcopy(item))
+        self._private = {}
+        for name in definition.section_order:
+            section = definition.sections.get(name)
+            if section is None:
+                section = definition.pending[name]
+                if _is_section_class(section):
+                    # introspected on first access
+                    continue
+            self._add_section(name, section)
+
+    def dumps(self):
+        """Return this schema serialized as a byte string.
+
+        The serialized schema holds all the sections and options, with all
+        of their attributes, and it can be loaded back by loads() without
+        introspecting any Schema class. It uses the marshal format, so it
+        can only be loaded by the same Python version.
+
+        All option types must be importable, and option attributes must
+        be of builtin types; ValueError is raised otherwise.
+
+        """
+        dumper = _SchemaDumper()
+        sections = []
+        for section in self.sections():
+            options = tuple(dumper.option(option)
+                            for option in self._section_options(section.name))
+            sections.append((section.name, options))
+        data = {
+            'format': _SERIALIZATION_FORMAT,
+            'fingerprint': self.fingerprint(),
+            'types': dumper.types,
+            'options': dumper.options,
+            'sections': sections,
+        }
+        try:
+            return marshal.dumps(data)
+        except ValueError as e:
+            raise ValueError("Cannot serialize schema: %s" % e)
+
+    @classmethod
+    def loads(cls, data, fingerprint=None):
+        """Return a schema loaded from data serialized by dumps().
+
+        The schema is built directly from the serialized data, as an
+        instance of the class this method is called on, without
+        introspecting the class. If *fingerprint* is given, it must match
+        the fingerprint of the serialized schema; SchemaValidationError is
+        raised otherwise, so stale data can be detected.
+
+        Only load data from trusted sources.
+
+        """
+        # import here to avoid circular imports
+        from .parser import SchemaValidationError
+
+        try:
+            data = marshal.loads(data)
+        except (EOFError, ValueError, TypeError):
+            raise SchemaValidationError("Invalid serialized schema.")
+        if (not isinstance(data, dict) or
+                data.get('format') != _SERIALIZATION_FORMAT):
+            raise SchemaValidationError(
+                "Unsupported serialized schema format.")
+        if fingerprint is not None and fingerprint != data['fingerprint']:
+            raise SchemaValidationError(
+                "Serialized schema is stale: fingerprint %s, expected %s." %
+                (data['fingerprint'], fingerprint))
+
+        loaded = _SchemaLoader(data['types'], data['options']).options
+        sections = []
+        for name, indexes in data['sections']:
+            section = Section(name=name)
+            options = [loaded[index] for index in indexes]
+            for option in options:
+                _bind(option, section=section)
+                setattr(section, option.name, option)
+            sections.append((section, options))
+
+        schema = cls.__new__(cls)
+        schema._setup(SchemaDefinition.from_sections(sections))
+        schema._fingerprint = data['fingerprint']
+        return schema
 
     def _add_section(self, name, section):
-        """Add a top-level section to the schema."""
-        self._sections[name] = section
-        for opt_name, opt in get_config_objects(section):
-            opt.name = opt_name
-            opt.section = section
+        definition = self._definition
+        section = self._sections[name] = _instance_section(
+            section, self, definition.attributes(name, section))
+        if name != '__main__' or definition.explicit_main:
+            setattr(self, name, section)
+        return section
 
-    def _add_option(self, name, option):
-        """Add a top-level option to the schema."""
-        section = self._sections.setdefault('__main__',
-            Section(name='__main__'))
-        option.section = section
-        setattr(section, name, option)
+    def _materialize(self, name):
+        """Make sure the named section has been introspected.
+
+        Return this schema's copy of the section, or None if there is no
+        such section.
+
+        """
+        definition = self._definition
+        if name in definition.pending:
+            definition.materialize(name)
+        section = self._sections.get(name)
+        if section is None and name in definition.sections:
+            section = self._add_section(name, definition.sections[name])
+        return section
+
+    def __getattr__(self, name):
+        # sections of lazy schemas not introspected yet
+        definition = self.__dict__.get('_definition')
+        if definition is not None and name in definition.section_names:
+            section = self._materialize(name)
+            if name in self.__dict__:
+                return section
+        raise AttributeError("%r object has no attribute %r" % (
+            self.__class__.__name__, name))
+
+    def _materialize_all(self):
+        definition = self._definition.complete()
+        for name in definition.section_order:
+            self._materialize(name)
+        self._sections = dict(
+            (name, self._sections[name]) for name in definition.section_order)
+        self._complete = True
 
     def __eq__(self, other):
-        return (
-            type(self) == type(other) and
-            self._sections == other._sections and
-            self.includes == other.includes)
+        return (type(self) == type(other) and
+                self.fingerprint() == other.fingerprint())
 
     def __ne__(self, other):
         return not self.__eq__(other)
 
     def __hash__(self):
-        attrs = ['_sections', 'includes']
-        return hash(hash(getattr(self, attr)) for attr in attrs)
+        return hash(self.fingerprint())
+
+    def fingerprint(self):
+        """Return a digest of the structure of this schema.
+
+        The digest covers the names of all sections and options, the option
+        types and all of their attributes (defaults, flags, nested item and
+        spec options, etc). It's deterministic, so it can be used to key
+        caches by schema content.
+
+        The fingerprint is computed the first time it's requested and
+        remembered afterwards, so the schema should not be modified after
+        that.
+
+        """
+        if self._fingerprint is None:
+            sections = sorted((section.name, section.fingerprint())
+                              for section in self.sections())
+            self._fingerprint = _digest(
+                ('schema', sections, self.includes.fingerprint()))
+        return self._fingerprint
 
     def is_valid(self):
         """Return whether the schema has a valid structure."""
@@ -169,17 +1060,26 @@ class Schema(object):
 
     def has_section(self, name):
         """Return True if a Section with the given name is available"""
-        return name in self._sections.keys()
+        return (name in self._sections or
+                name in self._definition.section_names)
+
+    def section_names(self):
+        """Return the set of names of the available Sections"""
+        return self._definition.section_names
 
     def section(self, name):
         """Return a Section by name"""
         section = self._sections.get(name)
-        if section is None:
-            raise NoSectionError(name)
+        if section is None or name in self._definition.pending:
+            section = self._materialize(name)
+            if section is None:
+                raise NoSectionError(name)
         return section
 
     def sections(self):
         """Returns the list of available Sections"""
+        if not self._complete:
+            self._materialize_all()
         return self._sections.values()
 
     def options(self, section=None):
@@ -190,22 +1090,96 @@ class Schema(object):
         To get options from the default section, specify section='__main__'
 
         """
-        if isinstance(section, string_types):
-            section = self.section(section)
         if section is None:
             options = []
-            for s in self.sections():
-                options += self.options(s)
-        elif section.name == '__main__':
-            class_config_objects = get_config_objects(self.__class__)
-            options = [getattr(self, att) for att, _ in class_config_objects
-                           if isinstance(getattr(self, att), Option)]
+            for section in self.sections():
+                options.extend(self.options(section.name))
+            return options
+
+        if isinstance(section, string_types):
+            name = section
         else:
-            options = section.options()
-        return options
+            name = section.name
+            if self._sections.get(name) is not section:
+                # not one of our sections; ask the section itself
+                return section.options()
+        options = self._section_options(name)
+        section = self._materialize(name)
+        return [_instance_option(section, option) for option in options]
+
+    def _section_options(self, name):
+        """Return the options within a section, like options(), without
+        copying the ones shared with other instances."""
+        section_options = self._definition.section_options
+        if name not in section_options and self._materialize(name) is None:
+            raise NoSectionError(name)
+        options = section_options[name]
+        private = self._private
+        if private:
+            return [private.get((name, option.name), option)
+                    for option in options]
+        return list(options)
+
+    def get_option(self, section, name):
+        """Return the Option *name* within *section*.
 
+        Return None if the schema does not define such an option. The
+        special 'includes' option is always available in the '__main__'
+        section.
 
-class Section(object):
+        """
+        option = self._get_option(section, name)
+        if option is not None and option is not self.includes:
+            option = _instance_option(self._materialize(section), option)
+        return option
+
+    def _get_option(self, section, name):
+        """Return an option like get_option(), without copying the ones
+        shared with other instances."""
+        index = self._definition.index
+        option = index.get((section, name))
+        if option is None:
+            if (section, name) == ('__main__', 'includes'):
+                return self.includes
+            elif section in self._definition.pending:
+                self._materialize(section)
+                option = index.get((section, name))
+        private = self._private
+        if private and option is not None:
+            option = private.get((section, name), option)
+        return option
+
+    def option_names(self, section=None):
+        """Return the set of option names defined within a given section.
+
+        If section is omitted, returns the names of all the options in the
+        schema, flattening out any sections.
+
+        """
+        if section is None:
+            if not self._complete:
+                self._materialize_all()
+            return self._definition.all_option_names
+        return self._section_table('option_names', section)
+
+    def fatal_options(self, section):
+        """Return the set of names of the fatal options within a section."""
+        names = self._section_table('fatal_options', section)
+        if any(key[0] == section for key in self._private):
+            # some options were copied, and may have changed
+            names = frozenset(option.name
+                              for option in self._section_options(section)
+                              if option.fatal)
+        return names
+
+    def _section_table(self, table, section):
+        names = getattr(self._definition, table).get(section)
+        if names is None and self._materialize(section) is not None:
+            names = getattr(self._definition, table).get(section)
+        return names or frozenset()
+
+
+class Section(with_metaclass(ConfigObjectType, object)):
     """A group of options.
 
     This class is just a bag you can dump Options in.
@@ -217,19 +1191,51 @@ class Section(object):
     def __init__(self, name=''):
         self.name = name
 
+    def __getattr__(self, name):
+        # the options of a schema instance's section are copied from the
+        # shared section when first accessed
+        shared = self.__dict__.get('_shared')
+        if shared is not None:
+            option = shared.__dict__.get(name)
+            if isinstance(option, Option):
+                return _instance_option(self, option)
+        raise AttributeError("%r object has no attribute %r" % (
+            self.__class__.__name__, name))
+
+    def __setattr__(self, name, value):
+        super(Section, self).__setattr__(name, value)
+        _changed(self)
+
+    def __delattr__(self, name):
+        super(Section, self).__delattr__(name)
+        _changed(self)
+
     def __eq__(self, other):
-        return (
-            type(self) == type(other) and
-            self.name == other.name and
-            self.options() == other.options())
+        return (type(self) == type(other) and
+                self.fingerprint() == other.fingerprint())
 
     def __ne__(self, other):
         return not self.__eq__(other)
 
     def __hash__(self):
-        return hash(
-            hash(self.name) + hash(hash(option) for option in self.options())
-        )
+        return hash(self.fingerprint())
+
+    def fingerprint(self):
+        """Return a digest of the structure of this section.
+
+        The digest covers the section's name and the fingerprints of all
+        of its options. It's computed the first time it's requested, and
+        remembered until an attribute of the section is set.
+
+        """
+        fingerprint = self.__dict__.get('_fingerprint')
+        if fingerprint is None:
+            options = sorted((opt.name, opt.fingerprint())
+                             for opt in self._attributes().values()
+                             if isinstance(opt, Option))
+            fingerprint = self.__dict__['_fingerprint'] = _digest(
+                ('section', self.name, options))
+        return fingerprint
 
     def __repr__(self):
         if self.name:
@@ -253,8 +1259,19 @@ class Section(object):
 
     def options(self):
         """Return a list of all available Options within this section"""
-        return [getattr(self, att) for att in vars(self)
-                if isinstance(getattr(self, att), Option)]
+        return [getattr(self, att) for att, value in self._attributes().items()
+                if isinstance(value, Option)]
+
+    def _attributes(self):
+        """Return the attributes of this section, without copying the
+        options shared with other schema instances."""
+        attrs = vars(self)
+        shared = attrs.get('_shared')
+        if shared is not None:
+            shared_attrs = vars(shared).copy()
+            shared_attrs.update(attrs)
+            attrs = shared_attrs
+        return attrs
 
 
 class Option(object):
@@ -283,12 +1300,27 @@ class Option(object):
     In runtime, after instantiating the Schema, each Option will also
     know its own name and to which section it belongs.
 
+    Options use __slots__ to keep large schemas compact; subclasses adding
+    attributes of their own should define __slots__ as well.
+
+    Once bound to a schema, options are shared by all the instances of the
+    schema. Each instance copies an option the first time it's accessed
+    through it, and the copy can be changed without affecting the other
+    instances. Setting or deleting attributes of the shared option itself,
+    or of the options it holds, like ListOption items, raises
+    AttributeError.
+
     """
 
+    __slots__ = ('name', 'short_name', 'raw', 'fatal', 'default', 'help',
+                 'section', 'action', '_bound', '_fingerprint', '_owner')
+
     require_parser = False
 
     def __init__(self, name='', raw=False, default=NO_DEFAULT, fatal=False,
                  help='', section=None, action='store', short_name=''):
+        self._owner = None
+        self._bound = False
         self.name = name
         self.short_name = short_name
         self.raw = raw
@@ -300,37 +1332,74 @@ class Option(object):
         self.section = section
         self.action = action
 
-    def __eq__(self, other):
-        try:
-            equal = (
-                type(self) == type(other) and
-                self.name == other.name and
-                self.short_name == other.short_name and
-                self.raw == other.raw and
-                self.fatal == other.fatal and
-                self.default == other.default and
-                self.help == other.help and
-                self.action == other.action)
-            if self.section is not None and other.section is not None:
-                # sections might be different while the options are the
-                # same; the section names though should be the same
-                equal &= self.section.name == other.section.name
-            else:
-                equal &= (self.section is None and other.section is None)
-        except AttributeError:
-            equal = False
+    def __setattr__(self, name, value):
+        if getattr(self, '_bound', False):
+            self._shared_error(name)
+        object.__setattr__(self, name, value)
+        object.__setattr__(self, '_fingerprint', None)
+        owner = getattr(self, '_owner', None)
+        if owner is not None:
+            _changed(owner)
+
+    def __delattr__(self, name):
+        if getattr(self, '_bound', False):
+            self._shared_error(name)
+        object.__delattr__(self, name)
+        object.__setattr__(self, '_fingerprint', None)
+        owner = getattr(self, '_owner', None)
+        if owner is not None:
+            _changed(owner)
+
+    def __get__(self, instance, owner):
+        # options are copied when accessed through a schema instance, or
+        # one of its sections
+        if isinstance(instance, Schema):
+            section = instance.__dict__.get('_sections', {}).get('__main__')
+            if section is not None:
+                return _instance_option(section, self)
+        elif isinstance(instance, Section):
+            return _instance_option(instance, self)
+        return self
+
+    def _shared_error(self, name):
+        raise AttributeError(
+            "Cannot change attribute '%s' of %r: it's shared by all the "
+            "instances of its schema; change the copy accessed through a "
+            "schema instance instead." % (name, self))
 
-        return equal
+    def __eq__(self, other):
+        return (type(self) == type(other) and
+                self.fingerprint() == other.fingerprint())
 
     def __ne__(self, other):
         return not self.__eq__(other)
 
     def __hash__(self):
-        attrs = [
-            'name', 'short_name', 'raw', 'fatal', 'default', 'help', 'action',
-            'section',
-        ]
-        return hash(hash(getattr(self, attr)) for attr in attrs)
+        return hash(self.fingerprint())
+
+    def fingerprint(self):
+        """Return a digest of the structure of this option.
+
+        The digest covers the option's type, name, section name and all
+        of its attributes, including nested item and spec options, so two
+        options have the same fingerprint if and only if they are defined
+        the same way.
+
+        The fingerprint is computed the first time it's requested, and
+        remembered until the option changes.
+
+        """
+        fingerprint = getattr(self, '_fingerprint', None)
+        if fingerprint is None:
+            cls = type(self)
+            attrs = [(name, _canonical(getattr(self, name, NO_DEFAULT)))
+                     for name in _attribute_names(self)]
+            section = getattr(self, 'section', None)
+            if section is not None:
+                section = section.name
+            fingerprint = _digest(('option', _type_name(cls), section, attrs))
+            object.__setattr__(self, '_fingerprint', fingerprint)
+        return fingerprint
 
     def __repr__(self):
         extra = ' raw' if self.raw else ''
@@ -352,6 +1421,23 @@ class Option(object):
         """Parse the given value."""
         raise NotImplementedError()
 
+    def parse_many(self, values, parser=None, raw=False):
+        """Parse a sequence of values, returning the list of results.
+
+        This is the same as calling parse() for each value, but option
+        types can provide faster implementations.
+        A *parser* object is passed on to parse() if this option requires
+        one. If *raw* is *True*, return the values unparsed.
+
+        """
+        kwargs = {}
+        if takes_parser(self, 'parse'):
+            kwargs['parser'] = parser
+        if raw:
+            kwargs['raw'] = raw
+        parse = self.parse
+        return [parse(value, **kwargs) for value in values]
+
     def validate(self, value):
         raise NotImplementedError()
 
@@ -363,6 +1449,14 @@ class Option(object):
 class BoolOption(Option):
     """A Option that is parsed into a bool"""
 
+    __slots__ = ()
+
+    # accepted values, by their lowercase representation
+    _values = {
+        'y': True, '1': True, 'yes': True, 'on': True, 'true': True,
+        'n': False, '0': False, 'no': False, 'off': False, 'false': False,
+    }
+
     def _get_default(self):
         return False
 
@@ -375,13 +1469,31 @@ class BoolOption(Option):
         if raw:
             return value
 
-        if value.lower() in ['y', '1', 'yes', 'on', 'true']:
-            return True
-        elif value.lower() in ['n', '0', 'no', 'off', 'false']:
-            return False
-        else:
+        try:
+            return self._values[value.lower()]
+        except KeyError:
             raise ValueError("Unable to determine boolosity of %r" % value)
 
+    def parse_many(self, values, parser=None, raw=False):
+        """Parse a sequence of values, returning the list of results.
+
+        If *raw* is *True*, return the values unparsed.
+
+        """
+        if type(self).parse != BoolOption.parse:
+            # parse() is overridden, so it must be used
+            return super(BoolOption, self).parse_many(
+                values, parser=parser, raw=raw)
+        if raw:
+            return list(values)
+
+        booleans = self._values
+        try:
+            return [booleans[value.lower()] for value in values]
+        except KeyError:
+            # report the first invalid value
+            return [self.parse(value) for value in values]
+
     def validate(self, value):
         return isinstance(value, bool)
 
@@ -389,6 +1501,8 @@ class BoolOption(Option):
 class IntOption(Option):
     """A Option that is parsed into an int"""
 
+    __slots__ = ()
+
     def _get_default(self):
         return 0
 
@@ -403,6 +1517,20 @@ class IntOption(Option):
 
         return int(value)
 
+    def parse_many(self, values, parser=None, raw=False):
+        """Parse a sequence of values, returning the list of results.
+
+        If *raw* is *True*, return the values unparsed.
+
+        """
+        if type(self).parse != IntOption.parse:
+            # parse() is overridden, so it must be used
+            return super(IntOption, self).parse_many(
+                values, parser=parser, raw=raw)
+        if raw:
+            return list(values)
+        return list(map(int, values))
+
     def validate(self, value):
         return isinstance(value, int)
 
@@ -421,38 +1549,30 @@ class ListOption(Option):
     removed.  Only the first occurrence of any item will be kept,
     otherwise the general order of the list will be preserved.
 
+    If parse_json == True, values holding a json list are decoded with
+    json_codec, an object providing loads() and dumps() like the json
+    module. If json_codec is None, the parser's codec is used, or the json
+    module if the parser doesn't set one.
+
     """
 
+    __slots__ = ('item', 'require_parser', 'remove_duplicates', 'parse_json',
+                 'json_codec')
+
     def __init__(self, name='', item=None, raw=False, default=NO_DEFAULT,
         fatal=False, help='', action='store', remove_duplicates=False,
-        short_name='', parse_json=True):
+        short_name='', parse_json=True, json_codec=None):
         super(ListOption, self).__init__(name=name, raw=raw,
             default=default, fatal=fatal, help=help, action=action,
             short_name=short_name)
         if item is None:
             item = StringOption()
-        self.item = item
+        self.item = item = intern_option(item)
         self.require_parser = item.require_parser
         self.raw = raw or item.raw
         self.remove_duplicates = remove_duplicates
         self.parse_json = parse_json
-
-    def __eq__(self, other):
-        equal = super(ListOption, self).__eq__(other)
-        if equal:
-            # we can be sure both objects are of the same type by now
-            equal &= (self.item == other.item and
-                self.require_parser == other.require_parser and
-                self.raw == other.raw and
-                self.remove_duplicates == other.remove_duplicates)
-
-        return equal
-
-    def __hash__(self):
-        attrs = [
-            'item', 'require_parser', 'raw', 'remove_duplicates',
-        ]
-        return hash(hash(getattr(self, attr)) for attr in attrs)
+        self.json_codec = json_codec
 
     def _get_default(self):
         return []
@@ -464,38 +1584,24 @@ class ListOption(Option):
         If *raw* is *True*, return the value unparsed.
 
         """
-        def _parse_item(value):
-            if self.require_parser:
-                value = self.item.parse(value, parser=parser, raw=raw)
-            else:
-                value = self.item.parse(value, raw=raw)
-            return value
-
-        is_json = self.parse_json
-        if is_json:
-            try:
-                parsed = json.loads(value)
-                is_json = isinstance(parsed, list)
-            except:
-                is_json = False
+        parsed = None
+        if self.parse_json:
+            parsed = _decode_json(_json_codec(self, parser), value, list)
 
-        if not is_json:
-            parsed = [_parse_item(x) for x in value.split('\n') if len(x)]
+        if parsed is None:
+            parsed = self.item.parse_many(
+                [x for x in value.split('\n') if x], parser=parser, raw=raw)
 
         if self.remove_duplicates:
-            filtered_items = []
-            for item in parsed:
-                if not item in filtered_items:
-                    filtered_items.append(item)
-            parsed = filtered_items
+            parsed = _remove_duplicates(parsed)
         return parsed
 
     def validate(self, value):
         return isinstance(value, list)
 
-    def to_string(self, value):
+    def to_string(self, value, parser=None):
         if self.parse_json:
-            return json.dumps(value)
+            return _encode_json(_json_codec(self, parser), value)
         else:
             return super(ListOption, self).to_string(value)
 
@@ -508,6 +1614,8 @@ class StringOption(Option):
 
     """
 
+    __slots__ = ('null',)
+
     def __init__(self, name='', raw=False, default=NO_DEFAULT, fatal=False,
         null=False, help='', action='store', short_name=''):
         self.null = null
@@ -515,18 +1623,6 @@ class StringOption(Option):
             default=default, fatal=fatal, help=help, action=action,
             short_name=short_name)
 
-    def __eq__(self, other):
-        equal = super(StringOption, self).__eq__(other)
-        if equal:
-            # we can be sure both objects are of the same type by now
-            equal &= self.null == other.null
-
-        return equal
-
-    def __hash__(self):
-        attrs = ['null']
-        return hash(hash(getattr(self, attr)) for attr in attrs)
-
     def _get_default(self):
         return '' if not self.null else None
 
@@ -546,6 +1642,24 @@ class StringOption(Option):
             result = repr(value)
         return result
 
+    def parse_many(self, values, parser=None, raw=False):
+        """Parse a sequence of values, returning the list of results.
+
+        If *raw* is *True*, return the values unparsed.
+
+        """
+        if type(self).parse != StringOption.parse:
+            # parse() is overridden, so it must be used
+            return super(StringOption, self).parse_many(
+                values, parser=parser, raw=raw)
+        if raw:
+            return list(values)
+        elif self.null:
+            return [None if value in (None, 'None') else value
+                    for value in values]
+        return [value if isinstance(value, string_types) else repr(value)
+                for value in values]
+
     def to_string(self, value):
         if value is None and self.null:
             return 'None'
@@ -563,6 +1677,8 @@ class TupleOption(Option):
 
     """
 
+    __slots__ = ('length',)
+
     def __init__(self, name='', length=0, raw=False, default=NO_DEFAULT,
         fatal=False, help='', action='store', short_name=''):
         super(TupleOption, self).__init__(name=name, raw=raw,
@@ -570,18 +1686,6 @@ class TupleOption(Option):
             short_name=short_name)
         self.length = length
 
-    def __eq__(self, other):
-        equal = super(TupleOption, self).__eq__(other)
-        if equal:
-            # we can be sure both objects are of the same type by now
-            equal &= self.length == other.length
-
-        return equal
-
-    def __hash__(self):
-        attrs = ['length']
-        return hash(hash(getattr(self, attr)) for attr in attrs)
-
     def _get_default(self):
         return ()
 
@@ -606,6 +1710,24 @@ class TupleOption(Option):
             # length is 0, so no length validation
         return result
 
+    def parse_many(self, values, parser=None, raw=False):
+        """Parse a sequence of values, returning the list of results."""
+        if type(self).parse != TupleOption.parse:
+            # parse() is overridden, so it must be used
+            return super(TupleOption, self).parse_many(
+                values, parser=parser, raw=raw)
+        length = self.length
+        results = []
+        append = results.append
+        for value in values:
+            parts = tuple([part.strip() for part in value.split(',')])
+            if parts == ('()',):
+                parts = ()
+            elif length and len(parts) != length:
+                raise ValueError("Tuples need to be %d items long" % length)
+            append(parts)
+        return results
+
     def validate(self, value):
         return isinstance(value, tuple)
 
@@ -621,39 +1743,31 @@ class DictOption(Option):
     available keys for the config file, and spec's values should be
     Options that will be used to parse the values in the config file.
 
+    Values holding a json dictionary are decoded as for ListOption.
+
     """
 
+    __slots__ = ('spec', 'strict', 'item', 'parse_json', 'json_codec')
+
     require_parser = True
 
     def __init__(self, name='', spec=None, strict=False, raw=False,
                  default=NO_DEFAULT, fatal=False, help='', action='store',
-                 item=None, short_name='', parse_json=True):
+                 item=None, short_name='', parse_json=True, json_codec=None):
         if spec is None:
             spec = {}
         if item is None:
             item = StringOption()
-        self.spec = spec
+        self.spec = dict(
+            (key, intern_option(value)) for key, value in spec.items())
         self.strict = strict
-        self.item = item
+        self.item = intern_option(item)
         self.parse_json = parse_json
+        self.json_codec = json_codec
         super(DictOption, self).__init__(name=name, raw=raw,
             default=default, fatal=fatal, help=help, action=action,
             short_name=short_name)
 
-    def __eq__(self, other):
-        equal = super(DictOption, self).__eq__(other)
-        if equal:
-            # we can be sure both objects are of the same type by now
-            equal &= (self.spec == other.spec and
-                self.strict == other.strict and
-                self.item == other.item)
-
-        return equal
-
-    def __hash__(self):
-        attrs = ['spec', 'strict', 'item']
-        return hash(hash(getattr(self, attr)) for attr in attrs)
-
     def _get_default(self):
         default = {}
         for key, value in self.spec.items():
@@ -667,15 +1781,11 @@ class DictOption(Option):
         If *raw* is *True*, return the value unparsed.
 
         """
-        is_json = self.parse_json
-        if is_json:
-            try:
-                parsed = json.loads(value)
-                is_json = isinstance(parsed, dict)
-            except:
-                is_json = False
-
-        if not is_json:
+        parsed = None
+        if self.parse_json:
+            parsed = _decode_json(_json_codec(self, parser), value, dict)
+
+        if parsed is None:
             # process extra sections
             sections = value.split()
             parser.extra_sections.update(set(sections))
@@ -686,7 +1796,8 @@ class DictOption(Option):
             parsed = dict(parser.items(value))
 
         result = {}
-        # parse config items according to spec
+        # group config items by the option in spec used to parse them
+        groups = {}
         for key, value in parsed.items():
             if self.strict and not key in self.spec:
                 raise ValueError("Invalid key %s in section %s" % (
@@ -697,14 +1808,17 @@ class DictOption(Option):
                 # parse it using the default item parser
                 option = self.item
 
-            if not option.validate(value):
-                # parse option
-                kwargs = {}
-                if option.require_parser:
-                    kwargs['parser'] = parser
-                if not raw:
-                    value = option.parse(value, **kwargs)
-            result[key] = value
+            if option.validate(value) or raw:
+                result[key] = value
+            else:
+                group = groups.get(id(option))
+                if group is None:
+                    group = groups[id(option)] = (option, [], [])
+                group[1].append(key)
+                group[2].append(value)
+
+        for option, keys, values in groups.values():
+            result.update(zip(keys, option.parse_many(values, parser=parser)))
 
         # fill in missing items with default values
         for key in self.spec:
@@ -724,9 +1838,9 @@ class DictOption(Option):
     def validate(self, value):
         return isinstance(value, dict)
 
-    def to_string(self, value):
+    def to_string(self, value, parser=None):
         if self.parse_json:
-            return json.dumps(value)
+            return _encode_json(_json_codec(self, parser), value)
         else:
             return super(DictOption, self).to_string(value)
 
@@ -763,3 +1877,8 @@ class DictOption(Option):
                 sections.extend(extra)
 
         return sections
+
+
+# methods taking the parser to find the json codec to use
+_JSON_METHODS = frozenset([ListOption.parse, ListOption.to_string,
+                           DictOption.parse, DictOption.to_string])
@@ -15,19 +15,26 @@
 #
 ###############################################################################
 
+import asyncio
 import codecs
+import operator
 import os
+import pickle
 import shutil
 import tempfile
 import textwrap
+import threading
+import time
 import unittest
-from io import BytesIO
+from io import BytesIO, StringIO
 from unittest.mock import (
     MagicMock,
     Mock,
     patch,
 )
 
+from configglue import _cache, _watch
+from configglue import parser as parser_module
 from configglue._compat import iteritems
 from configglue._compat import (
     DEFAULTSECT,
@@ -36,11 +43,17 @@ from configglue._compat import (
     InterpolationSyntaxError,
     NoOptionError,
     NoSectionError,
+    configparser,
 )
 from configglue.parser import (
     CONFIG_FILE_ENCODING,
+    ConfigErrors,
+    FrozenConfig,
+    IncludeCycleError,
+    InterpolationCycleError,
     SchemaConfigParser,
     SchemaValidationError,
+    ThreadSafeSchemaConfigParser,
 )
 from configglue.schema import (
     BoolOption,
@@ -51,6 +64,7 @@ from configglue.schema import (
     Schema,
     StringOption,
     TupleOption,
+    diff,
 )
 
 
@@ -246,6 +260,597 @@ class TestIncludes(unittest.TestCase):
         self.assertEqual(parser._basedir, '')
 
 
+    def _write_files(self, files):
+        folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, folder)
+        for name, content in files.items():
+            f = codecs.open(os.path.join(folder, name), 'w',
+                            encoding=CONFIG_FILE_ENCODING)
+            f.write(content)
+            f.close()
+        return folder
+
+    def test_diamond_includes(self):
+        """Test files included more than once are read only once."""
+        folder = self._write_files({
+            'first.cfg': "[__main__]\nincludes=left.cfg\n  right.cfg",
+            'left.cfg': "[__main__]\nfoo=left\nincludes=shared.cfg",
+            'right.cfg': "[__main__]\nincludes=shared.cfg",
+            'shared.cfg': "[__main__]\nfoo=shared\nbar=shared",
+        })
+        path = lambda name: os.path.join(folder, name)
+        parser = SchemaConfigParser(self.schema)
+        with patch.object(parser, '_tokenize',
+                          wraps=parser._tokenize) as mock_tokenize:
+            parser.read(path('first.cfg'))
+
+        read = [args[1] for args, kwargs in mock_tokenize.call_args_list]
+        self.assertEqual(sorted(read), sorted(map(path, [
+            'first.cfg', 'left.cfg', 'right.cfg', 'shared.cfg'])))
+        # included files are applied before the files including them
+        self.assertEqual(list(parser.include_graph.items()), [
+            (path('shared.cfg'), []),
+            (path('left.cfg'), [path('shared.cfg')]),
+            (path('right.cfg'), [path('shared.cfg')]),
+            (path('first.cfg'), [path('left.cfg'), path('right.cfg')]),
+        ])
+        self.assertEqual(parser.get('__main__', 'foo'), 'left')
+        self.assertEqual(parser.locate('foo'), path('left.cfg'))
+
+    def test_read_workers(self):
+        """Test reading files in threads applies them in the same order."""
+        folder = self._write_files({
+            'first.cfg': "[__main__]\nfoo=first\nincludes=left.cfg\n"
+                         "  right.cfg\n  missing.cfg",
+            'left.cfg': "[__main__]\nfoo=left\nincludes=shared.cfg",
+            'right.cfg': "[__main__]\nfoo=right\nincludes=shared.cfg",
+            'shared.cfg': "[__main__]\nfoo=shared",
+            'second.cfg': "[__main__]\nincludes=right.cfg",
+        })
+        files = [os.path.join(folder, 'first.cfg'),
+                 os.path.join(folder, 'second.cfg')]
+        expected = SchemaConfigParser(self.schema)
+        expected.read(files)
+
+        parser = SchemaConfigParser(self.schema)
+        with patch('configglue.parser.logger.warn') as mock_warn:
+            read_ok = parser.read(files, workers=4)
+        self.assertEqual(read_ok, files)
+        self.assertEqual(parser.include_graph, expected.include_graph)
+        self.assertEqual(parser._sections, expected._sections)
+        self.assertEqual(parser.locate('foo'), expected.locate('foo'))
+        self.assertEqual(mock_warn.call_count, 1)
+
+    def test_read_lazy(self):
+        """Test sections read lazily are parsed only when used."""
+        class MySchema(Schema):
+            foo = StringOption()
+
+            class one(Section):
+                bar = IntOption()
+
+            class two(Section):
+                bar = IntOption()
+                baz = StringOption()
+        folder = self._write_files({
+            'first.cfg': "[__main__]\nfoo=x\nincludes=second.cfg\n"
+                         "[one]\nbar=1\n[two]\nbar=2\nbaz=%(bar)s",
+            'second.cfg': "[one]\nbar=3\n[two]\nbar=4",
+        })
+        files = [os.path.join(folder, 'first.cfg')]
+        expected = SchemaConfigParser(MySchema())
+        expected.read(files)
+
+        parser = SchemaConfigParser(MySchema())
+        parser.read(files, lazy=True)
+        self.assertEqual(parser.sections(), expected.sections())
+        self.assertEqual(sorted(parser._lazy_sections), ['one', 'two'])
+        self.assertEqual(parser.get('two', 'baz'), '2')
+        self.assertEqual(parser.locate('bar', 'two', lineno=True),
+                         expected.locate('bar', 'two', lineno=True))
+        self.assertEqual(list(parser._lazy_sections), ['one'])
+        self.assertEqual(parser.values(), expected.values())
+        self.assertEqual(parser._lazy_sections, {})
+
+    def test_read_lazy_is_valid(self):
+        """Test errors in sections read lazily are reported."""
+        folder = self._write_files({
+            'first.cfg': "[__main__]\nfoo=1\n[other]\nbar",
+        })
+        parser = SchemaConfigParser(self.schema)
+        parser.read([os.path.join(folder, 'first.cfg')], lazy=True)
+        valid, errors = parser.is_valid(report=True)
+        self.assertFalse(valid)
+        self.assertIn("'bar'", errors[0])
+
+    def test_read_cache(self):
+        """Test files are not parsed again while their snapshot is current."""
+        folder = self._write_files({
+            'first.cfg': "[__main__]\nfoo=first\nincludes=second.cfg\n"
+                         "  missing.cfg",
+            'second.cfg': "[__main__]\nfoo=second",
+        })
+        cache_dir = os.path.join(folder, 'cache')
+        files = [os.path.join(folder, 'first.cfg')]
+        expected = SchemaConfigParser(self.schema)
+        self.assertEqual(expected.read(files, cache_dir=cache_dir), files)
+        self.assertEqual(len(os.listdir(cache_dir)), 1)
+
+        parser = SchemaConfigParser(self.schema)
+        with patch.object(parser, '_tokenize') as mock_tokenize:
+            with patch('configglue.parser.logger.warn') as mock_warn:
+                read_ok = parser.read(files, cache_dir=cache_dir)
+        self.assertEqual(read_ok, files)
+        self.assertFalse(mock_tokenize.called)
+        self.assertEqual(mock_warn.call_count, 1)
+        self.assertEqual(parser._sections, expected._sections)
+        self.assertEqual(parser.include_graph, expected.include_graph)
+        self.assertEqual(parser.locate('foo', lineno=True),
+                         (files[0], 2))
+
+        # the snapshot is replaced when files change
+        with codecs.open(os.path.join(folder, 'second.cfg'), 'w',
+                         encoding=CONFIG_FILE_ENCODING) as f:
+            f.write("[__main__]\nfoo=changed")
+        parser = SchemaConfigParser(self.schema)
+        with patch.object(parser, '_tokenize',
+                          wraps=parser._tokenize) as mock_tokenize:
+            parser.read(files, cache_dir=cache_dir)
+        self.assertEqual(mock_tokenize.call_count, 2)
+        snapshots = os.listdir(cache_dir)
+        self.assertEqual(len(snapshots), 1)
+        data = _cache.load(os.path.join(cache_dir, snapshots[0]))
+        filename, path, layers = data['reads'][0]
+        self.assertEqual(layers[0][1], [('__main__', [('foo', 'changed')])])
+
+    def test_read_cache_touched(self):
+        """Test snapshots are used if files are touched but not changed."""
+        folder = self._write_files({'first.cfg': "[__main__]\nfoo=first"})
+        cache_dir = os.path.join(folder, 'cache')
+        filename = os.path.join(folder, 'first.cfg')
+        SchemaConfigParser(self.schema).read(filename, cache_dir=cache_dir)
+        stat = os.stat(filename)
+        os.utime(filename, (stat.st_atime, stat.st_mtime + 10))
+
+        parser = SchemaConfigParser(self.schema)
+        with patch.object(parser, '_tokenize') as mock_tokenize:
+            parser.read(filename, cache_dir=cache_dir)
+        self.assertFalse(mock_tokenize.called)
+        self.assertEqual(parser.get('__main__', 'foo'), 'first')
+
+    def test_read_cache_schema(self):
+        """Test snapshots are kept by schema."""
+        class MySchema(Schema):
+            foo = IntOption()
+        folder = self._write_files({'first.cfg': "[__main__]\nfoo=1"})
+        cache_dir = os.path.join(folder, 'cache')
+        filename = os.path.join(folder, 'first.cfg')
+        SchemaConfigParser(self.schema).read(filename, cache_dir=cache_dir)
+        parser = SchemaConfigParser(MySchema())
+        parser.read(filename, cache_dir=cache_dir)
+        self.assertEqual(parser.get('__main__', 'foo'), 1)
+        self.assertEqual(len(os.listdir(cache_dir)), 2)
+
+    def test_include_cycle(self):
+        """Test files including each other are reported."""
+        folder = self._write_files({
+            'first.cfg': "[__main__]\nincludes=second.cfg",
+            'second.cfg': "[__main__]\nincludes=sub/../first.cfg",
+        })
+        first = os.path.join(folder, 'first.cfg')
+        second = os.path.join(folder, 'second.cfg')
+        parser = SchemaConfigParser(self.schema)
+        try:
+            parser.read(first)
+        except IncludeCycleError as e:
+            self.assertEqual(e.cycle, [first, second, first])
+        else:
+            self.fail("IncludeCycleError not raised")
+
+        config = "[__main__]\nincludes=%s" % first
+        parser = SchemaConfigParser(self.schema)
+        self.assertRaises(IncludeCycleError, parser.readfp,
+                          BytesIO(config.encode(CONFIG_FILE_ENCODING)),
+                          first)
+
+class WatchTestCase(unittest.TestCase):
+    def setUp(self):
+        class MySchema(Schema):
+            foo = StringOption()
+            bar = StringOption()
+
+            class other(Section):
+                baz = IntOption()
+        self.schema = MySchema()
+        self.folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.folder)
+
+    def _write(self, name, content):
+        filename = os.path.join(self.folder, name)
+        f = codecs.open(filename, 'w', encoding=CONFIG_FILE_ENCODING)
+        f.write(content)
+        f.close()
+        return filename
+
+    def _watch(self, content, **kwargs):
+        filename = self._write('first.cfg', content)
+        parser = SchemaConfigParser(self.schema)
+        parser.read(filename)
+        kwargs.setdefault('inotify', False)
+        watcher = parser.watch(interval=0.01, debounce=0.01, **kwargs)
+        self.addCleanup(watcher.stop)
+        return parser, watcher
+
+
+class TestWatch(WatchTestCase):
+    def test_check(self):
+        """Test only values that changed are reported."""
+        parser, watcher = self._watch(
+            "[__main__]\nfoo=1\nbar=%(foo)s\n[other]\nbaz=1")
+        callback = Mock()
+        watcher.add_callback(callback)
+        self.assertEqual(parser.get('__main__', 'bar'), '1')
+        self.assertEqual(watcher.check(), set())
+
+        # polling may only see files changing size
+        self._write('first.cfg', "[__main__]\nbar=%(foo)s\nfoo=22\n"
+                                 "[other]\nbaz=1")
+        changed = watcher.check(1)
+        self.assertEqual(changed, set([('__main__', 'foo'),
+                                       ('__main__', 'bar')]))
+        callback.assert_called_once_with(changed)
+        self.assertEqual(parser.get('__main__', 'bar'), '22')
+        self.assertEqual(parser.locate('foo', lineno=True),
+                         (os.path.join(self.folder, 'first.cfg'), 3))
+
+        self._write('first.cfg', "[__main__]\nfoo=22\nbar=%(foo)s\n")
+        self.assertEqual(watcher.check(1), set([('other', 'baz')]))
+        self.assertEqual(parser.sections(), ['__main__'])
+        self.assertEqual(callback.call_count, 2)
+
+    def test_check_includes(self):
+        """Test files included or no longer included are followed."""
+        parser, watcher = self._watch("[__main__]\nfoo=1")
+        second = self._write('second.cfg', "[__main__]\nbar=2")
+        first = self._write('first.cfg', "[__main__]\nincludes=second.cfg")
+        self.assertEqual(watcher.check(1), set([('__main__', 'foo'),
+                                                ('__main__', 'bar')]))
+        self.assertEqual(list(parser.include_graph), [second, first])
+        self.assertFalse(parser.has_option('__main__', 'foo'))
+
+        self._write('second.cfg', "[__main__]\nbar=33")
+        self.assertEqual(watcher.check(1), set([('__main__', 'bar')]))
+        self.assertEqual(parser.get('__main__', 'bar'), '33')
+
+    def test_check_keeps_set_values(self):
+        """Test values set explicitly are not overridden."""
+        parser, watcher = self._watch("[__main__]\nfoo=1\nbar=1")
+        parser.set('__main__', 'foo', '2')
+        self._write('first.cfg', "[__main__]\nfoo=3\nbar=33")
+        self.assertEqual(watcher.check(1), set([('__main__', 'bar')]))
+        self.assertEqual(parser.get('__main__', 'foo'), '2')
+
+    def test_check_inotify(self):
+        """Test files can be watched with inotify."""
+        parser, watcher = self._watch("[__main__]\nfoo=1", inotify=True)
+        if not watcher.uses_inotify:
+            self.skipTest("inotify is not available")
+        # replace the file, as editors do
+        temp = self._write('first.cfg.tmp', "[__main__]\nfoo=2")
+        os.rename(temp, os.path.join(self.folder, 'first.cfg'))
+        self.assertEqual(watcher.check(1), set([('__main__', 'foo')]))
+        self.assertEqual(parser.get('__main__', 'foo'), '2')
+
+    def test_check_inotify_relative(self):
+        """Test files read by relative name are watched with inotify."""
+        self._write('first.cfg', "[__main__]\nfoo=1")
+        cwd = os.getcwd()
+        os.chdir(self.folder)
+        self.addCleanup(os.chdir, cwd)
+        parser = SchemaConfigParser(self.schema)
+        parser.read('first.cfg')
+        watcher = parser.watch(interval=0.01, debounce=0.01)
+        self.addCleanup(watcher.stop)
+        if not watcher.uses_inotify:
+            self.skipTest("inotify is not available")
+        self._write('first.cfg', "[__main__]\nfoo=2")
+        self.assertEqual(watcher.check(1), set([('__main__', 'foo')]))
+        self.assertEqual(parser.get('__main__', 'foo'), '2')
+
+    def test_check_readfp(self):
+        """Test values read without a filename are kept."""
+        second = self._write('second.cfg', "[__main__]\nbar=2")
+        config = "[__main__]\nincludes=%s\nfoo=1" % second
+        for inotify in (False, True):
+            parser = SchemaConfigParser(self.schema)
+            parser.readfp(BytesIO(config.encode(CONFIG_FILE_ENCODING)))
+            parser.read_string(u"[other]\nbaz=3")
+            watcher = parser.watch(interval=0.01, debounce=0.01,
+                                   inotify=inotify)
+            self.addCleanup(watcher.stop)
+            self._write('second.cfg', "[__main__]\nbar=%s" % (22 + inotify))
+            self.assertEqual(watcher.check(1), set([('__main__', 'bar')]))
+            self.assertEqual(parser.values(), {
+                '__main__': {'foo': '1', 'bar': str(22 + inotify)},
+                'other': {'baz': 3}})
+
+    def test_start(self):
+        """Test changes are applied in the background."""
+        parser, watcher = self._watch("[__main__]\nfoo=1")
+        changes = []
+        watcher.add_callback(changes.append)
+        with watcher:
+            self._write('first.cfg', "[__main__]\nfoo=22")
+            for i in range(100):
+                if changes:
+                    break
+                time.sleep(0.01)
+        self.assertEqual(changes, [set([('__main__', 'foo')])])
+        self.assertEqual(parser.get('__main__', 'foo'), '22')
+
+
+class TestAsync(WatchTestCase):
+    def test_aread(self):
+        """Test aread() reads files like read()."""
+        self._write('second.cfg', "[__main__]\nbar=2\n[other]\nbaz=3")
+        filename = self._write(
+            'first.cfg', "[__main__]\nincludes=second.cfg\nfoo=1")
+        expected = SchemaConfigParser(self.schema)
+        expected.read(filename)
+
+        parser = SchemaConfigParser(self.schema)
+        read_ok = asyncio.run(parser.aread(filename))
+        self.assertEqual(read_ok, [filename])
+        self.assertEqual(parser.values(), expected.values())
+        self.assertEqual(parser.include_graph, expected.include_graph)
+        self.assertEqual(parser.locate('baz', 'other'),
+                         expected.locate('baz', 'other'))
+
+    def test_aread_errors(self):
+        """Test errors reading files are raised."""
+        filename = self._write('first.cfg', "[__main__]\nfoo")
+        parser = SchemaConfigParser(self.schema)
+        self.assertRaises(configparser.ParsingError, asyncio.run, parser.aread(filename))
+        self.assertEqual(parser.sections(), [])
+
+    def test_aread_cancelled(self):
+        """Test cancelling aread() leaves the parser unchanged."""
+        filename = self._write('first.cfg', "[__main__]\nfoo=1")
+        parser = SchemaConfigParser(self.schema)
+        reading = threading.Event()
+        release = threading.Event()
+        read_file = parser._read_file
+
+        def slow_read_file(*args):
+            reading.set()
+            release.wait(5)
+            return read_file(*args)
+
+        async def cancel():
+            task = asyncio.ensure_future(parser.aread(filename))
+            while not reading.is_set():
+                await asyncio.sleep(0.001)
+            task.cancel()
+            try:
+                await task
+            finally:
+                release.set()
+
+        with patch.object(parser, '_read_file', slow_read_file):
+            self.assertRaises(asyncio.CancelledError, asyncio.run, cancel())
+        self.assertEqual(parser.sections(), [])
+        self.assertEqual(parser.include_graph, {})
+
+    def test_areload(self):
+        """Test areload() applies the changes to the files."""
+        filename = self._write('first.cfg', "[__main__]\nfoo=1\nbar=%(foo)s")
+        parser = SchemaConfigParser(self.schema)
+        asyncio.run(parser.aread(filename))
+        self.assertEqual(asyncio.run(parser.areload()), set())
+
+        self._write('first.cfg', "[__main__]\nfoo=2\nbar=%(foo)s")
+        self.assertEqual(asyncio.run(parser.areload()),
+                         set([('__main__', 'foo'), ('__main__', 'bar')]))
+        self.assertEqual(parser.get('__main__', 'bar'), '2')
+
+    def test_areload_after_read(self):
+        """Test the first areload() after read() records the files."""
+        parser, watcher = self._watch("[__main__]\nfoo=1")
+        parser._layers = None
+        self.assertEqual(asyncio.run(parser.areload()), set())
+        self._write('first.cfg', "[__main__]\nfoo=2")
+        self.assertEqual(asyncio.run(parser.areload()),
+                         set([('__main__', 'foo')]))
+
+    def test_areload_readfp(self):
+        """Test areload() keeps values read without a filename."""
+        parser = SchemaConfigParser(self.schema)
+        parser.readfp(BytesIO(b"[__main__]\nfoo=1"))
+        self.assertEqual(asyncio.run(parser.areload()), set())
+        self.assertEqual(asyncio.run(parser.areload()), set())
+        self.assertEqual(parser.get('__main__', 'foo'), '1')
+
+    def test_awatch(self):
+        """Test awatch() yields the changes to the files."""
+        filename = self._write('first.cfg', "[__main__]\nfoo=1")
+        parser = SchemaConfigParser(self.schema)
+
+        async def watch():
+            await parser.aread(filename)
+            changes = parser.awatch(interval=0.01, debounce=0.01,
+                                    inotify=False)
+            try:
+                waiting = asyncio.ensure_future(changes.__anext__())
+                await asyncio.sleep(0.05)
+                # polling may only see files changing size
+                self._write('first.cfg', "[__main__]\nfoo=22")
+                return await asyncio.wait_for(waiting, 5)
+            finally:
+                await changes.aclose()
+
+        self.assertEqual(asyncio.run(watch()), set([('__main__', 'foo')]))
+        self.assertEqual(parser.get('__main__', 'foo'), '22')
+
+    def test_awatch_inotify(self):
+        """Test awatch() can use inotify."""
+        filename = self._write('first.cfg', "[__main__]\nfoo=1")
+        parser = SchemaConfigParser(self.schema)
+        if _watch._inotify_libc() is None:
+            self.skipTest("inotify is not available")
+
+        async def watch():
+            await parser.aread(filename)
+            changes = parser.awatch(debounce=0.01)
+            try:
+                waiting = asyncio.ensure_future(changes.__anext__())
+                await asyncio.sleep(0.05)
+                self._write('first.cfg', "[__main__]\nfoo=2")
+                return await asyncio.wait_for(waiting, 5)
+            finally:
+                await changes.aclose()
+
+        self.assertEqual(asyncio.run(watch()), set([('__main__', 'foo')]))
+
+    def test_thread_safe(self):
+        """Test ThreadSafeSchemaConfigParser replaces its parser."""
+        filename = self._write('first.cfg', "[__main__]\nfoo=1")
+        parser = ThreadSafeSchemaConfigParser(self.schema)
+        first = parser.parser
+        asyncio.run(parser.aread(filename))
+        self.assertIsNot(parser.parser, first)
+        self.assertEqual(first.sections(), [])
+        self._write('first.cfg', "[__main__]\nfoo=22")
+        self.assertEqual(asyncio.run(parser.areload()),
+                         set([('__main__', 'foo')]))
+        self.assertEqual(parser.get('__main__', 'foo'), '22')
+
+
+class TestThreadSafeParser(unittest.TestCase):
+    def setUp(self):
+        class MySchema(Schema):
+            class values(Section):
+                pass
+        for i in range(20):
+            setattr(MySchema.values, 'option%d' % i, IntOption())
+        self.schema = MySchema()
+        self.folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.folder)
+        self.files = []
+        for n in range(2):
+            filename = os.path.join(self.folder, 'file%d.cfg' % n)
+            with open(filename, 'w') as f:
+                f.write('[values]\n')
+                for i in range(20):
+                    f.write('option%d = %d\n' % (i, n))
+            self.files.append(filename)
+        self.parser = ThreadSafeSchemaConfigParser(self.schema)
+        self.parser.read(self.files[0])
+
+    def _hammer(self, read, change, readers=8, changes=200):
+        """Call read() from several threads while calling change()."""
+        errors = []
+        reads = [0] * readers
+        done = threading.Event()
+
+        def reader(index):
+            while not done.is_set():
+                try:
+                    read()
+                except Exception as e:
+                    errors.append(e)
+                    return
+                reads[index] += 1
+
+        threads = [threading.Thread(target=reader, args=(i,))
+                   for i in range(readers)]
+        for thread in threads:
+            thread.start()
+        try:
+            for i in range(changes):
+                change(i)
+        finally:
+            done.set()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(errors, [])
+        self.assertTrue(all(reads))
+
+    def test_get_during_reloads(self):
+        """Test readers never see files half read."""
+        def read():
+            values = self.parser.values('values')
+            self.assertEqual(len(set(values.values())), 1, values)
+            self.assertIn(self.parser.get('values', 'option7'), (0, 1))
+
+        def change(i):
+            self.parser.read(self.files[i % 2])
+
+        self._hammer(read, change)
+
+    def test_get_during_sets(self):
+        """Test readers always see the values set."""
+        def read():
+            value = self.parser.get('values', 'option3')
+            self.assertTrue(0 <= value < 200)
+
+        def change(i):
+            self.parser.set('values', 'option3', i)
+            self.assertEqual(self.parser.get('values', 'option3'), i)
+
+        self._hammer(read, change)
+
+    def test_get_during_environment_refreshes(self):
+        """Test refreshing the environment doesn't break readers."""
+        self.parser.read_string(u'[values]\n' + u''.join(
+            u'option%d = $CONFIGGLUE_TEST_%s\n' % (i, chr(65 + i))
+            for i in range(20)))
+
+        def read():
+            for i in range(20):
+                self.assertEqual(self.parser.get('values', 'option%d' % i),
+                                 i)
+
+        def change(i):
+            parser = self.parser.parser
+            self.parser.refresh_environment()
+            self.assertIsNot(self.parser.parser, parser)
+
+        environ = dict(('CONFIGGLUE_TEST_%s' % chr(65 + i), str(i))
+                       for i in range(20))
+        with patch.dict(os.environ, environ):
+            self._hammer(read, change)
+            os.environ['CONFIGGLUE_TEST_D'] = '4'
+            self.parser.refresh_environment()
+            self.assertEqual(self.parser.get('values', 'option3'), 4)
+
+    def test_change_publishes_copy(self):
+        """Test changes don't modify the parser being read."""
+        parser = self.parser.parser
+        self.parser.set('values', 'option1', 5)
+        self.assertIsNot(self.parser.parser, parser)
+        self.assertEqual(parser.get('values', 'option1'), 0)
+        self.assertEqual(self.parser.get('values', 'option1'), 5)
+        self.assertEqual(self.parser.locate('option1', 'values'),
+                         self.files[0])
+
+    def test_failed_change(self):
+        """Test changes that fail are not published."""
+        parser = self.parser.parser
+        self.assertRaises(TypeError, self.parser.set, 'values', 'option1',
+                          'foo')
+        self.assertIs(self.parser.parser, parser)
+
+    def test_watch(self):
+        """Test reloaded files are published."""
+        watcher = self.parser.watch(inotify=False)
+        self.addCleanup(watcher.stop)
+        with open(self.files[0], 'w') as f:
+            f.write('[values]\noption1 = 10\n')
+        self.assertIn(('values', 'option1'), watcher.check(1))
+        self.assertEqual(self.parser.get('values', 'option1'), 10)
+        self.assertFalse(self.parser.has_option('values', 'option2'))
+
+
 class TestInterpolation(unittest.TestCase):
     """Test basic interpolation."""
     def test_basic_interpolate(self):
@@ -505,6 +1110,27 @@ class TestInterpolation(unittest.TestCase):
         parser.readfp(config)
         self.assertEqual(parser.get('__main__', 'foo'), 42)
 
+    @patch('configglue.parser.os')
+    def test_interpolate_environment_snapshot(self, mock_os):
+        mock_os.environ = {'FOO': 'foo'}
+        parser = SchemaConfigParser(Schema())
+        self.assertEqual(parser.interpolate_environment("$FOO"), 'foo')
+        mock_os.environ = {'FOO': 'bar'}
+        self.assertEqual(parser.interpolate_environment("$FOO"), 'foo')
+        parser.refresh_environment()
+        self.assertEqual(parser.interpolate_environment("$FOO"), 'bar')
+
+    @patch('configglue.parser.os')
+    def test_interpolate_environment_reuses_template(self, mock_os):
+        mock_os.environ = {'FOO': 'foo'}
+        parser = SchemaConfigParser(Schema())
+        with patch.object(parser, '_compile_environment_template',
+                          wraps=parser._compile_environment_template) as mock:
+            parser.interpolate_environment("${FOO:-bar}")
+            result = parser.interpolate_environment("${FOO:-bar}")
+        self.assertEqual(result, 'foo')
+        self.assertEqual(mock.call_count, 1)
+
     def test_get_without_environment_var(self):
         class MySchema(Schema):
             foo = IntOption()
@@ -680,6 +1306,98 @@ class TestInterpolation(unittest.TestCase):
         self.assertEqual(result, expected)
 
 
+    def test_resolve(self):
+        """Test resolve interpolates values the same as get."""
+        class MySchema(Schema):
+            foo = StringOption()
+            bar = StringOption()
+
+            class one(Section):
+                baz = StringOption()
+                qux = IntOption(default=3)
+                spam = StringOption()
+
+        config = BytesIO(textwrap.dedent("""
+            [__noschema__]
+            wham=%(ham)s!
+            ham=ham
+            [__main__]
+            foo=%(bar)s/foo
+            bar=bar 100%%
+            [one]
+            baz=%(spam)s-%(qux)s
+            spam=%(wham)s
+            """).encode(CONFIG_FILE_ENCODING))
+        parser = SchemaConfigParser(MySchema())
+        parser.readfp(config)
+        expected = parser.values()
+
+        parser = SchemaConfigParser(MySchema())
+        parser.readfp(BytesIO(config.getvalue()))
+        parser.resolve()
+        with patch.object(parser, '_interpolate_value') as mock:
+            self.assertEqual(parser.values(), expected)
+        self.assertFalse(mock.called)
+        self.assertEqual(parser.get('one', 'baz'),
+                         'ham!-3')
+        self.assertEqual(parser.get('__main__', 'foo'),
+                         'bar 100%/foo')
+
+    def test_resolve_cycle(self):
+        """Test resolve reports values referencing each other."""
+        class MySchema(Schema):
+            foo = StringOption()
+            bar = StringOption()
+            baz = StringOption()
+
+        config = BytesIO(
+            b"[__main__]\nfoo=%(bar)s\nbar=%(baz)s\nbaz=x%(foo)s")
+        parser = SchemaConfigParser(MySchema())
+        parser.readfp(config)
+        try:
+            parser.resolve()
+        except InterpolationCycleError as e:
+            cycle = e.cycle
+        else:
+            self.fail("InterpolationCycleError not raised")
+        self.assertEqual(len(cycle), 4)
+        self.assertEqual(cycle[0], cycle[-1])
+        self.assertEqual(set(cycle), set([('__main__', 'foo'),
+                                          ('__main__', 'bar'),
+                                          ('__main__', 'baz')]))
+        # cycles are still too deep interpolations
+        self.assertRaises(InterpolationDepthError, parser.resolve)
+
+    def test_resolve_missing_option(self):
+        """Test resolve leaves invalid values for get to report."""
+        class MySchema(Schema):
+            class foo(Section):
+                bar = IntOption()
+                baz = StringOption()
+
+        config = BytesIO(b"[foo]\nbar=%(wham)s\nbaz=%(bar)s")
+        parser = SchemaConfigParser(MySchema())
+        parser.readfp(config)
+        parser.resolve()
+        self.assertRaises(InterpolationMissingOptionError,
+                          parser.get, 'foo', 'bar')
+        self.assertRaises(InterpolationMissingOptionError,
+                          parser.get, 'foo', 'baz')
+
+    def test_resolve_dropped_on_change(self):
+        """Test changing the configuration drops the resolved values."""
+        class MySchema(Schema):
+            foo = StringOption()
+            bar = StringOption()
+
+        config = BytesIO(b"[__main__]\nfoo=%(bar)s\nbar=1")
+        parser = SchemaConfigParser(MySchema())
+        parser.readfp(config)
+        parser.resolve()
+        self.assertEqual(parser.get('__main__', 'foo'), '1')
+        parser.set('__main__', 'bar', '2')
+        self.assertEqual(parser.get('__main__', 'foo'), '2')
+
 class TestSchemaConfigParser(unittest.TestCase):
     def setUp(self):
         class MySchema(Schema):
@@ -702,6 +1420,62 @@ class TestSchemaConfigParser(unittest.TestCase):
         self.assertRaises(SchemaValidationError, SchemaConfigParser,
                           MyInvalidSchema())
 
+    def test_update_schema(self):
+        class NewSchema(Schema):
+            foo = IntOption()
+            bar = IntOption(default=3)
+
+        self.parser.readfp(BytesIO(b"[__main__]\nfoo = 42"))
+        self.assertEqual(self.parser.get('__main__', 'foo'), '42')
+        new_schema = NewSchema()
+        changes = self.parser.update_schema(new_schema)
+
+        self.assertTrue(self.parser.schema is new_schema)
+        self.assertEqual(changes.changed, {'__main__': set(['foo'])})
+        self.assertEqual(changes.added, {'__main__': set(['bar'])})
+        self.assertEqual(self.parser.values(),
+                         {'__main__': {'foo': 42, 'bar': 3}})
+
+    def test_update_schema_removed_options(self):
+        class NewSchema(Schema):
+            bar = IntOption(default=3)
+
+        self.parser.readfp(self.config, 'foo.cfg')
+        self.assertEqual(self.parser.locate('foo'), 'foo.cfg')
+        self.parser.update_schema(NewSchema())
+        self.assertEqual(self.parser.locate('foo'), None)
+
+    def test_update_schema_added_options(self):
+        class NewSchema(Schema):
+            foo = StringOption()
+            bar = IntOption()
+
+        self.parser.readfp(BytesIO(b"[__main__]\nfoo = 1\nbar = 2"),
+                           'foo.cfg')
+        self.assertEqual(self.parser.locate('bar', '__main__'), None)
+        self.parser.update_schema(NewSchema())
+        self.assertEqual(self.parser.locate('bar', '__main__', lineno=True),
+                         ('foo.cfg', 3))
+        self.parser.set('__main__', 'bar', 3)
+        self.assertEqual(dict(self.parser._dirty),
+                         {'foo.cfg': {'__main__': {'bar': '3'}}})
+
+    def test_update_schema_invalid_schema(self):
+        class MyInvalidSchema(Schema):
+            class __main__(Section):
+                pass
+
+        self.assertRaises(SchemaValidationError, self.parser.update_schema,
+                          MyInvalidSchema())
+        self.assertTrue(self.parser.schema is self.schema)
+
+    def test_apply_diff_other_schema(self):
+        class NewSchema(Schema):
+            bar = IntOption()
+
+        changes = diff(NewSchema(), self.schema)
+        self.assertRaises(ValueError, self.parser.apply_diff, changes)
+
     def test_items(self):
         self.parser.readfp(self.config)
         items = self.parser.items('__main__')
@@ -793,6 +1567,39 @@ class TestSchemaConfigParser(unittest.TestCase):
         values = parser.values()
         self.assertEqual(values, expected_values)
 
+    def test_values_errors(self):
+        """Test parser.values reports the errors of all options."""
+        class MySchema(Schema):
+            foo = IntOption()
+            bar = StringOption()
+
+            class baz(Section):
+                qux = IntOption(fatal=True)
+
+        parser = SchemaConfigParser(MySchema())
+        parser.readfp(BytesIO(b"[__main__]\nfoo = x\nbar = %(missing)s"))
+        try:
+            parser.values()
+        except ConfigErrors as e:
+            self.assertEqual([error[:2] for error in e.errors],
+                             [('__main__', 'bar'), ('__main__', 'foo'),
+                              ('baz', 'qux')])
+            self.assertIsInstance(e.errors[1][2], ValueError)
+            self.assertIsInstance(e.errors[2][2], NoOptionError)
+        else:
+            self.fail("ConfigErrors not raised")
+
+        # a single error is raised as is
+        self.assertRaises(NoOptionError, parser.values, 'baz')
+        # callers expecting parse errors catch both
+        self.assertRaises(ValueError, parser.values)
+
+    def test_values_no_section_cached(self):
+        """Test parser.values of a missing section with cached values."""
+        self.parser.readfp(BytesIO(b"[__main__]\nfoo = bar"))
+        self.assertEqual(self.parser.values(), {'__main__': {'foo': 'bar'}})
+        self.assertRaises(NoSectionError, self.parser.values, 'nosuch')
+
     def test_parse_option(self):
         """Test parser parses option."""
         class MyOtherSchema(Schema):
@@ -852,6 +1659,28 @@ class TestSchemaConfigParser(unittest.TestCase):
         parser.readfp(config)
         self.assertRaises(NoOptionError, parser.values)
 
+    def test_parse_all_errors(self):
+        """Test parse_all reports the errors of all options."""
+        class MySchema(Schema):
+            foo = IntOption()
+            bar = IntOption()
+            baz = IntOption(fatal=True)
+
+        parser = SchemaConfigParser(MySchema())
+        parser.readfp(BytesIO(b"[__main__]\nfoo = x\nbar = y"))
+        try:
+            parser.parse_all()
+        except ConfigErrors as e:
+            self.assertEqual(sorted(error[1] for error in e.errors),
+                             ['bar', 'baz', 'foo'])
+        else:
+            self.fail("ConfigErrors not raised")
+
+        # missing options are only errors if they are fatal
+        parser.set('__main__', 'foo', 1)
+        parser.set('__main__', 'bar', 2)
+        self.assertRaises(NoOptionError, parser.parse_all)
+
     def test_extra_sections(self):
         """Test extra_sections."""
         class MySchema(Schema):
@@ -1017,6 +1846,40 @@ class TestSchemaConfigParser(unittest.TestCase):
         self.parser.read(files)
         self.assertEqual(self.parser.values(), {'__main__': {'foo': 'bar'}})
 
+    def test_locate_same_option_in_sections(self):
+        """Test options with the same name are located per section."""
+        class MySchema(Schema):
+            foo = StringOption()
+
+            class one(Section):
+                foo = StringOption()
+
+        parser = SchemaConfigParser(MySchema())
+        parser.readfp(BytesIO(b"[__main__]\nfoo=1\n[one]\nfoo=1"), 'a.cfg')
+        parser.readfp(BytesIO(b"[one]\nfoo=2\n[two]\nfoo=2"), 'b.cfg')
+        self.assertEqual(parser.locate('foo', '__main__'), 'a.cfg')
+        self.assertEqual(parser.locate('foo', 'one'), 'b.cfg')
+        # not in the schema
+        self.assertEqual(parser.locate('foo', 'two'), None)
+        # last location of the option in any section
+        self.assertEqual(parser.locate('foo'), 'b.cfg')
+
+    def test_locate_lineno(self):
+        """Test locating the line where options are defined."""
+        parser = SchemaConfigParser(self.schema)
+        parser.readfp(BytesIO(b"[__main__]\n# foo\n\nfoo=1"), 'a.cfg')
+        self.assertEqual(parser.locate('foo', lineno=True), ('a.cfg', 4))
+        self.assertEqual(parser.locate('bar', lineno=True), (None, None))
+
+    def test_locate_redefined_option(self):
+        """Test options are located in the last file defining them."""
+        parser = SchemaConfigParser(self.schema)
+        parser.readfp(BytesIO(b"[__main__]\nfoo=1"), 'a.cfg')
+        parser.readfp(BytesIO(b"[__main__]\nfoo=1"), 'b.cfg')
+        parser.readfp(BytesIO(b"[__main__]\nbar=1"), 'c.cfg')
+        self.assertEqual(parser.locate('foo'), 'b.cfg')
+        self.assertEqual(parser.get('__main__', 'foo'), '1')
+
     def test_interpolate_using_noschema_from_multiple_files(self):
         """Test interpolation across files."""
         def setup_config():
@@ -1301,6 +2164,192 @@ class TestSchemaConfigParser(unittest.TestCase):
         self.assertTrue('baz = 42' in data)
 
 
+class TestParserCache(unittest.TestCase):
+    def setUp(self):
+        class MySchema(Schema):
+            foo = IntOption()
+            bar = StringOption()
+            baz = StringOption()
+
+            class one(Section):
+                qux = ListOption(item=IntOption())
+                spam = DictOption(item=IntOption())
+
+        self.parser = SchemaConfigParser(MySchema())
+        self.parser.readfp(BytesIO(
+            b"[__main__]\nfoo = 1\nbar = %(foo)s0\nbaz = $HOME\n"
+            b"[one]\nqux = 1\n    2\nspam = mydict\n[mydict]\na = 3"))
+
+    def test_get_cached(self):
+        """Test repeated calls to get use the cache."""
+        self.assertEqual(self.parser.get('__main__', 'foo'), 1)
+        self.assertEqual(self.parser.get('__main__', 'foo'), 1)
+        self.assertEqual(self.parser.get('__main__', 'foo', parse=False), '1')
+        self.assertEqual(self.parser.cache_info(), (1, 2, 2))
+
+    def test_get_cached_copies(self):
+        """Test changing a value returned by get doesn't change the cache."""
+        self.parser.get('one', 'qux').append(99)
+        self.parser.get('one', 'spam')['b'] = 4
+        self.assertEqual(self.parser.get('one', 'qux'), [1, 2])
+        self.assertEqual(self.parser.get('one', 'spam'), {'a': 3})
+        self.assertEqual(self.parser.cache_info().hits, 2)
+
+    def test_get_vars_not_cached(self):
+        """Test calls to get with vars are not cached."""
+        self.parser.get('__main__', 'bar', vars={'foo': '2'})
+        self.assertEqual(self.parser.cache_info().size, 0)
+
+    def test_values_cached(self):
+        """Test values() uses the cached values."""
+        with patch.object(IntOption, 'parse',
+                          side_effect=IntOption.parse,
+                          autospec=True) as mock_parse:
+            values = self.parser.values()
+            self.assertEqual(self.parser.values(), values)
+        # foo is only parsed once
+        self.assertEqual(mock_parse.call_count, 1)
+
+    def test_values_cached_copies(self):
+        """Test changing the values returned doesn't change the cache."""
+        values = self.parser.values()
+        values['one']['qux'].append(7)
+        values['one']['spam']['b'] = 4
+        self.parser.values('one')['qux'].append(8)
+        self.assertEqual(self.parser.values()['one'],
+                         {'qux': [1, 2], 'spam': {'a': 3}})
+
+    def test_values_invalidated(self):
+        """Test values() sees the changes to the configuration."""
+        self.assertEqual(self.parser.values()['__main__']['bar'], '10')
+        self.parser.set('__main__', 'foo', 2)
+        values = self.parser.values()
+        self.assertEqual(values['__main__']['foo'], 2)
+        self.assertEqual(values['__main__']['bar'], '20')
+        # each call returns new dicts
+        values['__main__']['foo'] = 3
+        self.assertEqual(self.parser.values()['__main__']['foo'], 2)
+
+    def test_set_invalidates(self):
+        """Test set drops the option's values and its dependent values."""
+        self.assertEqual(self.parser.get('__main__', 'bar'), '10')
+        self.assertEqual(self.parser.get('one', 'qux'), [1, 2])
+        self.assertEqual(self.parser.get('one', 'spam'), {'a': 3})
+
+        self.parser.set('__main__', 'foo', 2)
+        self.assertEqual(self.parser.get('__main__', 'foo'), 2)
+        self.assertEqual(self.parser.get('__main__', 'bar'), '20')
+        # values that don't depend on foo are still cached
+        hits = self.parser.cache_info().hits
+        self.assertEqual(self.parser.get('one', 'qux'), [1, 2])
+        self.assertEqual(self.parser.cache_info().hits, hits + 1)
+
+        # values parsed using other sections depend on them
+        self.parser.remove_option('mydict', 'a')
+        self.assertEqual(self.parser.get('one', 'spam'), {})
+
+    def test_remove_option_invalidates(self):
+        """Test remove_option drops the option's values."""
+        self.assertEqual(self.parser.get('__main__', 'foo'), 1)
+        self.assertTrue(self.parser.remove_option('__main__', 'foo'))
+        self.assertEqual(self.parser.get('__main__', 'foo'), 0)
+
+    def test_read_clears_cache(self):
+        """Test reading configuration drops all cached values."""
+        self.assertEqual(self.parser.get('__main__', 'foo'), 1)
+        self.parser.readfp(BytesIO(b"[__main__]\nfoo = 5"))
+        self.assertEqual(self.parser.get('__main__', 'foo'), 5)
+
+        fd, filename = tempfile.mkstemp()
+        os.write(fd, b"[__main__]\nfoo = 6")
+        os.close(fd)
+        self.addCleanup(os.remove, filename)
+        self.parser.read(filename)
+        self.assertEqual(self.parser.get('__main__', 'foo'), 6)
+
+    def test_read_string_clears_cache(self):
+        """Test read_string and read_file drop all cached values."""
+        self.assertEqual(self.parser.get('__main__', 'foo'), 1)
+        self.assertEqual(self.parser.values()['__main__']['foo'], 1)
+        self.parser.read_string(u"[__main__]\nfoo = 2")
+        self.assertEqual(self.parser.get('__main__', 'foo'), 2)
+        self.assertEqual(self.parser.values()['__main__']['foo'], 2)
+        self.parser.read_file(StringIO(u"[__main__]\nfoo = 3"))
+        self.assertEqual(self.parser.get('__main__', 'foo'), 3)
+
+    def test_clear_cache(self):
+        """Test clear_cache drops all cached values."""
+        self.parser.values()
+        self.assertNotEqual(self.parser.cache_info().size, 0)
+        self.parser.clear_cache()
+        self.assertEqual(self.parser.cache_info().size, 0)
+
+    @patch('configglue.parser.os')
+    def test_refresh_environment(self, mock_os):
+        """Test refresh_environment drops values using the environment."""
+        mock_os.environ = {'HOME': '/home/foo'}
+        self.assertEqual(self.parser.get('__main__', 'baz'), '/home/foo')
+        self.assertEqual(self.parser.get('__main__', 'foo'), 1)
+        mock_os.environ = {'HOME': '/home/bar'}
+        self.assertEqual(self.parser.get('__main__', 'baz'), '/home/foo')
+
+        self.parser.refresh_environment()
+        self.assertEqual(self.parser.cache_info().size, 1)
+        self.assertEqual(self.parser.get('__main__', 'baz'), '/home/bar')
+
+    def test_update_schema_invalidates(self):
+        """Test switching schemas drops the values of changed options."""
+        class NewSchema(Schema):
+            foo = StringOption()
+            bar = StringOption()
+            baz = StringOption()
+
+            class one(Section):
+                qux = ListOption(item=IntOption())
+                spam = DictOption(item=IntOption())
+
+        self.assertEqual(self.parser.get('__main__', 'foo'), 1)
+        self.assertEqual(self.parser.get('one', 'qux'), [1, 2])
+        self.parser.update_schema(NewSchema())
+        self.assertEqual(self.parser.get('__main__', 'foo'), '1')
+        hits = self.parser.cache_info().hits
+        self.assertEqual(self.parser.get('one', 'qux'), [1, 2])
+        self.assertEqual(self.parser.cache_info().hits, hits + 1)
+
+    def test_freeze(self):
+        frozen = self.parser.freeze()
+        self.assertIsInstance(frozen, FrozenConfig)
+        self.assertEqual(frozen['__main__']['bar'], '10')
+        self.assertEqual(frozen.__main__.foo, 1)
+        self.assertEqual(frozen.one.qux, (1, 2))
+        self.assertEqual(frozen.one.spam.a, 3)
+        self.assertEqual(frozen.__main__, self.parser.values('__main__'))
+        self.assertRaises(AttributeError, setattr, frozen, 'one', {})
+        self.assertRaises(TypeError, operator.setitem, frozen.one, 'qux', [])
+        self.assertRaises(AttributeError, getattr, frozen.one, 'missing')
+        self.assertFalse(hasattr(frozen, '__dict__'))
+
+    def test_freeze_cached(self):
+        frozen = self.parser.freeze()
+        self.assertIs(self.parser.freeze(), frozen)
+        self.parser.set('__main__', 'foo', 2)
+        self.assertEqual(self.parser.freeze().__main__.bar, '20')
+        self.assertEqual(frozen.__main__.bar, '10')
+
+    def test_freeze_dict_keys(self):
+        """Test dict values don't get a FrozenConfig class per key set."""
+        self.parser.freeze()
+        classes = len(parser_module._frozen_classes)
+        for key in ('b', 'c', 'd'):
+            self.parser.read_string(u"[mydict]\n%s = 4" % key)
+            frozen = self.parser.freeze()
+            self.assertEqual(frozen.one.spam[key], 4)
+            self.assertEqual(frozen.one.spam.a, 3)
+            self.assertIs(type(frozen.one.spam), FrozenConfig)
+        self.assertEqual(len(parser_module._frozen_classes), classes)
+        self.assertEqual(pickle.loads(pickle.dumps(frozen)), frozen)
+
+
 class TestParserIsValid(unittest.TestCase):
     def setUp(self):
         class MySchema(Schema):
@@ -1360,18 +2409,74 @@ class TestParserIsValid(unittest.TestCase):
         valid, errors = parser.is_valid(report=True)
         self.assertEqual((valid, errors), expected)
 
+    def test_validate(self):
+        """Test validate reports all the problems found."""
+        class MySchema(Schema):
+            foo = IntOption()
+            bar = IntOption()
+            baz = DictOption()
+
+            class one(Section):
+                qux = IntOption(fatal=True)
+                spam = BoolOption()
+
+        config = BytesIO(textwrap.dedent("""
+            [__main__]
+            foo = x
+            bar = y
+            baz = mydict
+            other = 1
+            [one]
+            spam = maybe
+            [two]
+            """).encode(CONFIG_FILE_ENCODING))
+        parser = SchemaConfigParser(MySchema())
+        parser.readfp(config)
+        errors = parser.validate()
+        self.assertEqual(
+            [error[:3] for error in errors],
+            [('undefined-section', 'mydict', None),
+             ('unknown-section', 'two', None),
+             ('unknown-option', '__main__', 'other'),
+             ('missing-option', 'one', 'qux'),
+             ('invalid-value', '__main__', 'bar'),
+             ('invalid-value', '__main__', 'foo'),
+             ('invalid-value', 'one', 'spam')])
+        self.assertEqual(errors[3].message,
+                         "Configuration missing required options for "
+                         "section 'one': qux")
+
+        valid, messages = parser.is_valid(report=True)
+        self.assertFalse(valid)
+        self.assertEqual(len(messages), 7)
+        self.assertEqual(messages[:4], [error.message for error in errors[:4]])
+
+    def test_is_valid_report_grouped(self):
+        """Test problems with options of a section are reported together."""
+        class MySchema(Schema):
+            foo = IntOption()
+
+        config = BytesIO(b"[__main__]\nfoo = 1\nbar = 2\nbaz = 3\n"
+                         b"[one]\n[two]")
+        parser = SchemaConfigParser(MySchema())
+        parser.readfp(config)
+        self.assertEqual(parser.is_valid(report=True), (False, [
+            "Sections in configuration are missing from schema: one, two",
+            "Configuration includes invalid options for section "
+            "'__main__': bar, baz"]))
+
     def test_is_not_valid_parser_error(self):
         """Test parser.is_valid when parser errors."""
         class MySchema(Schema):
             foo = IntOption()
 
-        def mock_parse_all(self):
+        def mock_value_errors():
             assert False
 
         schema = MySchema()
         config = BytesIO(b"[__main__]\nfoo = 5")
         parser = SchemaConfigParser(schema)
-        parser.parse_all = mock_parse_all
+        parser._value_errors = mock_value_errors
         parser.readfp(config)
 
         self.assertFalse(parser.is_valid())
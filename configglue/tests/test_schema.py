@@ -15,9 +15,14 @@
 #
 ###############################################################################
 
+import gc
+import json
+import marshal
 import textwrap
+import tracemalloc
 import unittest
 from io import BytesIO
+from unittest.mock import Mock, patch
 
 from configglue._compat import text_type
 from configglue._compat import NoOptionError, NoSectionError
@@ -35,7 +40,10 @@ from configglue.schema import (
     Schema,
     StringOption,
     TupleOption,
+    diff,
     get_config_objects,
+    get_definition,
+    intern_option,
     merge,
 )
 
@@ -122,6 +130,62 @@ class TestSchema(unittest.TestCase):
         schema = Schema()
         self.assertTrue(hasattr(schema, 'includes'))
 
+    def test_get_option(self):
+        """Test Schema option lookup by name."""
+        class MySchema(Schema):
+            foo = BoolOption()
+
+            class bar(Section):
+                baz = IntOption()
+
+        schema = MySchema()
+        self.assertEqual(schema.get_option('__main__', 'foo'), schema.foo)
+        self.assertEqual(schema.get_option('bar', 'baz'), schema.bar.baz)
+        self.assertEqual(schema.get_option('__main__', 'includes'),
+                         schema.includes)
+        self.assertEqual(schema.get_option('bar', 'foo'), None)
+        self.assertEqual(schema.get_option('baz', 'foo'), None)
+
+    def test_option_names(self):
+        """Test Schema option names."""
+        class MySchema(Schema):
+            foo = BoolOption()
+
+            class bar(Section):
+                baz = IntOption()
+                wham = IntOption()
+
+        schema = MySchema()
+        self.assertEqual(schema.option_names('__main__'), set(['foo']))
+        self.assertEqual(schema.option_names('bar'), set(['baz', 'wham']))
+        self.assertEqual(schema.option_names('baz'), set())
+        self.assertEqual(schema.option_names(),
+                         set(['foo', 'baz', 'wham']))
+
+    def test_fatal_options(self):
+        """Test Schema fatal option names."""
+        class MySchema(Schema):
+            foo = BoolOption(fatal=True)
+            bar = BoolOption()
+
+            class baz(Section):
+                wham = IntOption()
+
+        schema = MySchema()
+        self.assertEqual(schema.fatal_options('__main__'), set(['foo']))
+        self.assertEqual(schema.fatal_options('baz'), set())
+
+    def test_section_names(self):
+        """Test Schema section names."""
+        class MySchema(Schema):
+            foo = BoolOption()
+
+            class bar(Section):
+                baz = IntOption()
+
+        schema = MySchema()
+        self.assertEqual(schema.section_names(), set(['__main__', 'bar']))
+
     def test_equal(self):
         """Test Schema equality."""
         class MySchema(Schema):
@@ -143,6 +207,81 @@ class TestSchema(unittest.TestCase):
         self.assertEqual(hash(my_schema), hash(other_schema))
 
 
+    def test_fingerprint(self):
+        """Test Schema fingerprint depends on its structure only."""
+        class MySchema(Schema):
+            foo = IntOption()
+
+            class bar(Section):
+                baz = ListOption(item=IntOption())
+
+        class SameSchema(Schema):
+            foo = IntOption()
+
+            class bar(Section):
+                baz = ListOption(item=IntOption())
+
+        class OtherSchema(Schema):
+            foo = IntOption()
+
+            class bar(Section):
+                baz = ListOption(item=BoolOption())
+
+        fingerprint = MySchema().fingerprint()
+        self.assertEqual(len(fingerprint), 40)
+        self.assertEqual(MySchema().fingerprint(), fingerprint)
+        self.assertEqual(SameSchema().fingerprint(), fingerprint)
+        self.assertNotEqual(OtherSchema().fingerprint(), fingerprint)
+
+    def test_fingerprint_attributes(self):
+        """Test Schema fingerprint covers option attributes."""
+        def make_schema(**kwargs):
+            class MySchema(Schema):
+                foo = DictOption(**kwargs)
+            return MySchema()
+
+        fingerprints = set([
+            make_schema().fingerprint(),
+            make_schema(default={'a': 1}).fingerprint(),
+            make_schema(fatal=True).fingerprint(),
+            make_schema(help='foo').fingerprint(),
+            make_schema(strict=True).fingerprint(),
+            make_schema(item=IntOption()).fingerprint(),
+            make_schema(spec={'a': IntOption()}).fingerprint(),
+            make_schema(spec={'a': BoolOption()}).fingerprint(),
+        ])
+        self.assertEqual(len(fingerprints), 8)
+
+    def test_fingerprint_objects(self):
+        """Test Schema fingerprint doesn't depend on object addresses."""
+        class Codec(object):
+            loads = staticmethod(json.loads)
+            dumps = staticmethod(json.dumps)
+
+        def make_schema(codec):
+            class MySchema(Schema):
+                foo = ListOption(json_codec=codec)
+            return MySchema()
+
+        fingerprint = make_schema(Codec()).fingerprint()
+        self.assertEqual(make_schema(Codec()).fingerprint(), fingerprint)
+        self.assertNotEqual(make_schema(json).fingerprint(), fingerprint)
+        self.assertEqual(make_schema(Codec).fingerprint(),
+                         make_schema(Codec).fingerprint())
+        self.assertNotEqual(make_schema(Codec).fingerprint(), fingerprint)
+
+    def test_fingerprint_memoized(self):
+        """Test Schema fingerprint is only computed once."""
+        class MySchema(Schema):
+            foo = IntOption()
+
+        schema = MySchema()
+        fingerprint = schema.fingerprint()
+        schema.foo = BoolOption()
+        self.assertEqual(schema.fingerprint(), fingerprint)
+        self.assertEqual(schema, MySchema())
+
+
 class TestSchemaHelpers(unittest.TestCase):
     def test_get_config_objects(self):
         """Test get_config_objects."""
@@ -168,6 +307,338 @@ class TestSchemaHelpers(unittest.TestCase):
             self.assertEqual(type(objects[key]), type(value))
 
 
+    def test_get_definition_cached(self):
+        """Test schema definitions are cached per class."""
+        class MySchema(Schema):
+            foo = IntOption()
+
+        definition = get_definition(MySchema)
+        self.assertTrue(get_definition(MySchema) is definition)
+        self.assertTrue(MySchema()._definition is definition)
+
+    def test_get_definition_invalidated(self):
+        """Test changing a schema class invalidates its definition."""
+        class MySchema(Schema):
+            foo = IntOption()
+
+        class MyOtherSchema(MySchema):
+            pass
+
+        self.assertEqual(MySchema().option_names(), set(['foo']))
+        self.assertEqual(MyOtherSchema().option_names(), set(['foo']))
+
+        MySchema.bar = IntOption()
+        self.assertEqual(MySchema().option_names(), set(['foo', 'bar']))
+        self.assertEqual(MyOtherSchema().option_names(), set(['foo', 'bar']))
+
+        del MySchema.foo
+        self.assertEqual(MySchema().option_names(), set(['bar']))
+
+    def test_get_definition_invalidated_by_section(self):
+        """Test changing a section class invalidates schema definitions."""
+        class MySchema(Schema):
+            class foo(Section):
+                bar = IntOption()
+
+        self.assertEqual(MySchema().option_names('foo'), set(['bar']))
+
+        MySchema.foo.baz = IntOption()
+        self.assertEqual(MySchema().option_names('foo'), set(['bar', 'baz']))
+
+    def test_instances_share_options(self):
+        """Test schema instances share options but not sections."""
+        class MySchema(Schema):
+            foo = IntOption()
+
+            class bar(Section):
+                baz = IntOption()
+
+        schema = MySchema()
+        other = MySchema()
+        self.assertTrue(schema._get_option('__main__', 'foo') is
+                        other._get_option('__main__', 'foo'))
+        self.assertTrue(schema._get_option('bar', 'baz') is
+                        other._get_option('bar', 'baz'))
+        self.assertFalse(schema.bar is other.bar)
+        self.assertFalse(schema.includes is other.includes)
+
+    def test_options_copy_on_write(self):
+        """Test options accessed through a schema instance are its own."""
+        class MySchema(Schema):
+            foo = IntOption()
+
+            class bar(Section):
+                baz = IntOption()
+
+        schema = MySchema()
+        fingerprint = schema.fingerprint()
+        schema.foo.default = 5
+        schema.bar.baz.fatal = True
+        del schema.foo.help
+        self.assertEqual(schema.foo.default, 5)
+        self.assertTrue(schema.get_option('__main__', 'foo') is schema.foo)
+        self.assertEqual(schema.options('bar'), [schema.bar.baz])
+        self.assertTrue(schema.bar.baz.section is schema.bar)
+        self.assertEqual(schema.fatal_options('bar'), set(['baz']))
+        self.assertNotEqual(schema.fingerprint(), fingerprint)
+        self.assertNotEqual(schema.bar.fingerprint(),
+                            MySchema().bar.fingerprint())
+
+        # other instances are not affected
+        other = MySchema()
+        self.assertEqual(other.foo.default, 0)
+        self.assertFalse(other.bar.baz.fatal)
+        self.assertEqual(other.fatal_options('bar'), set())
+        self.assertEqual(other.fingerprint(), fingerprint)
+
+        parser = SchemaConfigParser(schema)
+        self.assertEqual(parser.get('__main__', 'foo'), 5)
+        self.assertRaises(NoOptionError, parser.get, 'bar', 'baz')
+
+    def test_shared_options_read_only(self):
+        """Test the options shared by schema instances can't be changed."""
+        class MySchema(Schema):
+            foo = IntOption()
+
+        shared = MySchema()._get_option('__main__', 'foo')
+        self.assertRaises(AttributeError, setattr, shared, 'default', 5)
+        self.assertRaises(AttributeError, delattr, shared, 'help')
+        self.assertRaises(AttributeError, setattr, MySchema.foo, 'default', 5)
+        self.assertEqual(MySchema().foo.default, 0)
+        # unbound options can still be changed
+        schema = MySchema()
+        schema.includes.default = ['foo.cfg']
+        self.assertEqual(schema.includes.default, ['foo.cfg'])
+
+
+class TestLazySchema(unittest.TestCase):
+    def setUp(self):
+        class MySchema(Schema):
+            foo = IntOption()
+
+            class one(Section):
+                bar = IntOption()
+
+            class two(Section):
+                baz = BoolOption(fatal=True)
+
+            three = Section()
+            three.bam = StringOption()
+
+        self.schema_class = MySchema
+        self.schema = MySchema(lazy=True)
+        self.definition = get_definition(MySchema, lazy=True)
+
+    def test_sections_registered(self):
+        """Test sections are registered but not introspected."""
+        self.assertEqual(set(self.definition.pending),
+                         set(['one', 'two', 'three']))
+        self.assertEqual(self.schema.section_names(),
+                         set(['__main__', 'one', 'two', 'three']))
+        self.assertTrue(self.schema.has_section('one'))
+        self.assertFalse(self.schema.has_section('four'))
+        self.assertEqual(self.schema.get_option('__main__', 'foo'),
+                         self.schema.foo)
+
+    def test_section(self):
+        """Test section() only introspects the requested section."""
+        section = self.schema.section('one')
+        self.assertEqual(section.name, 'one')
+        self.assertEqual(section.bar.name, 'bar')
+        self.assertEqual(section.bar.section.name, 'one')
+        self.assertEqual(set(self.definition.pending), set(['two', 'three']))
+        self.assertRaises(NoSectionError, self.schema.section, 'four')
+
+    def test_section_attribute(self):
+        """Test accessing a section attribute introspects it."""
+        section = self.schema.one
+        self.assertTrue(isinstance(section, Section))
+        self.assertEqual(section.name, 'one')
+        self.assertTrue(self.schema.section('one') is section)
+        self.assertEqual(set(self.definition.pending), set(['two', 'three']))
+
+    def test_section_attribute_shared_class(self):
+        """Test a section class used under two names."""
+        class Common(Section):
+            qux = IntOption()
+
+        class MySchema(Schema):
+            a = Common
+            b = Common
+
+        schema = MySchema(lazy=True)
+        self.assertEqual(schema.b.name, 'b')
+        self.assertEqual(schema.a.name, 'a')
+        self.assertEqual(schema.option_names('b'), set(['qux']))
+        self.assertTrue(schema.section('b') is schema.b)
+        self.assertRaises(AttributeError, getattr, schema, 'c')
+
+    def test_section_attribute_copy_on_write(self):
+        """Test options of sections not introspected yet can be changed."""
+        self.schema.three.bam.default = 'x'
+        self.assertEqual(self.schema.get_option('three', 'bam').default, 'x')
+        self.assertEqual(self.schema_class(lazy=True).three.bam.default, '')
+
+    def test_options(self):
+        """Test options() and lookups introspect the section they need."""
+        self.assertEqual(self.schema.options('three'),
+                         [self.schema.three.bam])
+        self.assertEqual(self.schema.three.bam.name, 'bam')
+        self.assertEqual(self.schema.get_option('one', 'bar').name, 'bar')
+        self.assertEqual(self.schema.fatal_options('two'), set(['baz']))
+        self.assertEqual(self.definition.pending, {})
+        self.assertRaises(NoSectionError, self.schema.options, 'four')
+
+    def test_parser(self):
+        """Test the parser only introspects the sections it reads."""
+        parser = SchemaConfigParser(self.schema)
+        parser.readfp(BytesIO(b"[one]\nbar = 2"))
+        self.assertEqual(parser.get('one', 'bar'), 2)
+        self.assertEqual(set(self.definition.pending), set(['two', 'three']))
+
+    def test_sections(self):
+        """Test whole-schema operations introspect all sections."""
+        names = set(section.name for section in self.schema.sections())
+        self.assertEqual(names, set(['__main__', 'one', 'two', 'three']))
+        self.assertEqual(self.definition.pending, {})
+        self.assertEqual(self.schema, self.schema_class())
+        self.assertEqual(self.schema.option_names(),
+                         set(['foo', 'bar', 'baz', 'bam']))
+
+
+class TestSchemaSerialization(unittest.TestCase):
+    def setUp(self):
+        class MySchema(Schema):
+            foo = IntOption(default=3, help='foo help')
+            bar = TupleOption(length=2, default=(1, 2))
+
+            class one(Section):
+                baz = ListOption(item=IntOption(), remove_duplicates=True)
+                bam = StringOption(null=True, default='x')
+
+            class two(Section):
+                qux = DictOption(spec={'a': IntOption(),
+                                       'b': ListOption(item=StringOption())},
+                                 strict=True, json_codec=json)
+                quux = BoolOption(raw=True)
+
+        self.schema_class = MySchema
+        self.schema = MySchema()
+
+    def test_roundtrip(self):
+        """Test a loaded schema is equivalent to the serialized one."""
+        loaded = self.schema_class.loads(self.schema.dumps())
+        self.assertEqual(loaded, self.schema)
+        self.assertEqual(loaded.section_names(), self.schema.section_names())
+        self.assertEqual(loaded.one.baz.item, IntOption())
+        self.assertEqual(loaded.two.qux.spec['b'].item, StringOption())
+        self.assertTrue(loaded.two.qux.json_codec is json)
+        self.assertEqual(loaded.bar.default, (1, 2))
+        self.assertEqual(loaded.one.bam.section.name, 'one')
+        self.assertEqual(loaded.get_option('two', 'quux').raw, True)
+        # recompute the fingerprint from the loaded options
+        fingerprint = loaded.fingerprint()
+        loaded._fingerprint = None
+        self.assertEqual(loaded.fingerprint(), fingerprint)
+
+    def test_loads_without_introspection(self):
+        """Test loading a schema does not introspect any class."""
+        data = self.schema.dumps()
+        with patch('configglue.schema.getmembers') as mock_getmembers:
+            loaded = Schema.loads(data)
+        self.assertFalse(mock_getmembers.called)
+        self.assertEqual(type(loaded), Schema)
+        self.assertEqual(loaded.fingerprint(), self.schema.fingerprint())
+
+        parser = SchemaConfigParser(loaded)
+        parser.readfp(BytesIO(b"[one]\nbaz = 1\n    2\n    2\n"
+                              b"[two]\nqux = extra\n[extra]\na = 5\n"))
+        self.assertEqual(parser.values(), {
+            '__main__': {'foo': 3, 'bar': (1, 2)},
+            'one': {'baz': [1, 2], 'bam': 'x'},
+            'two': {'qux': {'a': 5, 'b': []}, 'quux': False},
+        })
+
+    def test_loads_stale(self):
+        """Test loading checks the expected fingerprint."""
+        data = self.schema.dumps()
+        loaded = Schema.loads(data, fingerprint=self.schema.fingerprint())
+        self.assertEqual(loaded.fingerprint(), self.schema.fingerprint())
+        self.assertRaises(SchemaValidationError, Schema.loads, data,
+                          fingerprint='stale')
+
+    def test_loads_invalid(self):
+        """Test loading invalid data fails."""
+        self.assertRaises(SchemaValidationError, Schema.loads, b'invalid')
+        self.assertRaises(SchemaValidationError, Schema.loads,
+                          marshal.dumps({'format': 0}))
+
+    def test_dumps_local_option_type(self):
+        """Test options of types that cannot be imported cannot be dumped."""
+        class MyOption(Option):
+            pass
+
+        class MySchema(Schema):
+            foo = MyOption()
+
+        self.assertRaises(ValueError, MySchema().dumps)
+
+
+class TestSchemaDiff(unittest.TestCase):
+    def setUp(self):
+        class OldSchema(Schema):
+            foo = IntOption()
+            bar = IntOption()
+
+            class one(Section):
+                baz = StringOption()
+                bam = BoolOption()
+
+            class two(Section):
+                qux = IntOption()
+
+        class NewSchema(Schema):
+            foo = OldSchema.foo
+            bar = IntOption(default=1)
+
+            class one(Section):
+                baz = StringOption()
+                quux = IntOption()
+
+            class three(Section):
+                qux = IntOption()
+
+        self.old = OldSchema()
+        self.new = NewSchema()
+
+    def test_diff(self):
+        """Test diff finds the changes per section."""
+        changes = diff(self.old, self.new)
+        self.assertEqual(changes.added, {'one': set(['quux']),
+                                         'three': set(['qux'])})
+        self.assertEqual(changes.removed, {'one': set(['bam']),
+                                           'two': set(['qux'])})
+        self.assertEqual(changes.changed, {'__main__': set(['bar'])})
+        self.assertEqual(changes.added_sections, set(['three']))
+        self.assertEqual(changes.removed_sections, set(['two']))
+        self.assertEqual(changes.options(), set([
+            ('one', 'quux'), ('three', 'qux'), ('one', 'bam'), ('two', 'qux'),
+            ('__main__', 'bar')]))
+        self.assertTrue(changes)
+
+    def test_diff_equal(self):
+        """Test the diff between equivalent schemas is empty."""
+        changes = diff(self.old, self.old.__class__())
+        self.assertFalse(changes)
+        self.assertEqual(changes.options(), set())
+
+    def test_diff_lazy(self):
+        """Test lazy schemas are fully compared."""
+        changes = diff(self.old.__class__(lazy=True), self.new)
+        self.assertEqual(changes.removed, {'one': set(['bam']),
+                                           'two': set(['qux'])})
+
+
 class TestOption(unittest.TestCase):
     cls = Option
 
@@ -209,6 +680,65 @@ class TestOption(unittest.TestCase):
         self.assertEqual(opt1, opt2)
         self.assertEqual(hash(opt1), hash(opt2))
 
+    def test_fingerprint(self):
+        """Test Option fingerprint."""
+        sect = Section(name='sect')
+        opt = IntOption(name='opt1', default=3)
+        self.assertEqual(opt.fingerprint(),
+                         IntOption(name='opt1', default=3).fingerprint())
+        self.assertNotEqual(opt.fingerprint(),
+                            IntOption(name='opt1').fingerprint())
+        self.assertNotEqual(opt.fingerprint(),
+                            IntOption(name='opt2', default=3).fingerprint())
+        self.assertNotEqual(opt.fingerprint(),
+                            BoolOption(name='opt1', default=3).fingerprint())
+        self.assertNotEqual(
+            opt.fingerprint(),
+            IntOption(name='opt1', default=3, section=sect).fingerprint())
+
+    def test_fingerprint_memoized(self):
+        """Test Option fingerprint is remembered until the option changes."""
+        opt = DictOption(spec={'a': IntOption()})
+        fingerprint = opt.fingerprint()
+        self.assertTrue(opt.fingerprint() is fingerprint)
+        opt.strict = True
+        self.assertNotEqual(opt.fingerprint(), fingerprint)
+        self.assertEqual(opt, DictOption(spec={'a': IntOption()}, strict=True))
+
+    def test_bound_items_read_only(self):
+        """Test the options held by shared options can't be changed."""
+        class MySchema(Schema):
+            foo = ListOption(item=IntOption(default=1))
+            bar = DictOption(spec={'a': StringOption(help='a')})
+
+        foo = MySchema()._get_option('__main__', 'foo')
+        bar = MySchema()._get_option('__main__', 'bar')
+        self.assertRaises(AttributeError, setattr, foo.item, 'default', 2)
+        self.assertRaises(AttributeError, setattr, bar.spec['a'], 'help', 'b')
+
+        # they are copied along with the options holding them
+        schema = MySchema()
+        fingerprint = schema.foo.fingerprint()
+        schema.foo.item.default = 2
+        schema.bar.spec['a'].help = 'b'
+        self.assertNotEqual(schema.foo.fingerprint(), fingerprint)
+        self.assertEqual(MySchema().foo.item.default, 1)
+        self.assertEqual(MySchema().bar.spec['a'].help, 'a')
+
+    def test_parse_many(self):
+        """Test Option parse_many uses parse."""
+        class MyOption(self.cls):
+            require_parser = True
+
+            def parse(self, value, parser, raw=False):
+                return (value, parser, raw)
+
+        opt = MyOption()
+        self.assertEqual(opt.parse_many(['a', 'b'], parser='parser'),
+                         [('a', 'parser', False), ('b', 'parser', False)])
+        self.assertEqual(opt.parse_many(['a'], raw=True),
+                         [('a', None, True)])
+
     def test_validate(self):
         """Test Option default validate behaviour."""
         opt = self.cls()
@@ -220,6 +750,76 @@ class TestOption(unittest.TestCase):
         self.assertEqual(opt.short_name, 'f')
 
 
+class TestOptionMemory(unittest.TestCase):
+    def assert_size_per_option(self, factory, limit, count=1000):
+        gc.collect()
+        tracemalloc.start()
+        try:
+            options = [factory() for i in range(count)]
+            size, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        self.assertEqual(len(options), count)
+        per_option = size / count
+        self.assertTrue(per_option < limit,
+            "%s takes %d bytes per option" % (options[0], per_option))
+
+    def test_compact_options(self):
+        """Test options don't carry a __dict__ around."""
+        for cls in (BoolOption, IntOption, ListOption, StringOption,
+                    TupleOption, DictOption):
+            self.assertFalse(hasattr(cls(), '__dict__'))
+
+    def test_memory_per_option(self):
+        """Test the memory used per option is bounded."""
+        self.assert_size_per_option(BoolOption, 160)
+        self.assert_size_per_option(IntOption, 160)
+        self.assert_size_per_option(StringOption, 160)
+        self.assert_size_per_option(TupleOption, 160)
+        self.assert_size_per_option(ListOption, 260)
+        self.assert_size_per_option(
+            lambda: ListOption(item=IntOption()), 260)
+
+    def test_shared_items(self):
+        """Test identical item definitions are shared."""
+        self.assertTrue(ListOption().item is ListOption().item)
+        self.assertTrue(ListOption().item is DictOption().item)
+        self.assertTrue(ListOption(item=IntOption()).item is
+                        ListOption(item=IntOption()).item)
+        self.assertFalse(ListOption(item=IntOption()).item is
+                         ListOption(item=IntOption(default=1)).item)
+
+    def test_shared_items_value_types(self):
+        """Test items with equal values of different types aren't shared."""
+        item = ListOption(item=StringOption(default=1)).item
+        other = ListOption(item=StringOption(default=True)).item
+        self.assertFalse(item is other)
+        self.assertTrue(other.default is True)
+        item = ListOption(item=TupleOption(default=(1,))).item
+        other = ListOption(item=TupleOption(default=(1.0,))).item
+        self.assertFalse(item is other)
+        self.assertEqual(type(other.default[0]), float)
+
+    def test_intern_option_bound(self):
+        """Test options bound to a schema are never shared."""
+        option = IntOption(name='foo')
+        self.assertTrue(intern_option(option) is option)
+
+        option = IntOption(help='bound')
+        self.assertTrue(intern_option(option) is option)
+        other = IntOption(help='bound')
+        self.assertTrue(intern_option(other) is option)
+        # the shared option gets bound afterwards
+        option.name = 'foo'
+        other = IntOption(help='bound')
+        self.assertTrue(intern_option(other) is other)
+
+    def test_intern_option_unhashable(self):
+        """Test options with unhashable attributes are not shared."""
+        option = ListOption(item=ListOption())
+        self.assertTrue(intern_option(option) is option)
+
+
 class TestSchemaInheritance(unittest.TestCase):
     def setUp(self):
         class SchemaA(Schema):
@@ -346,6 +946,15 @@ class TestStringOption(unittest.TestCase):
         value = self.opt.parse(False)
         self.assertEqual(value, 'False')
 
+    def test_parse_many(self):
+        """Test StringOption parse_many."""
+        self.assertEqual(self.opt.parse_many(['foo', 42, 'None']),
+                         ['foo', '42', 'None'])
+        opt = self.cls(null=True)
+        self.assertEqual(opt.parse_many(['foo', 'None', None]),
+                         ['foo', None, None])
+        self.assertEqual(opt.parse_many(['None'], raw=True), ['None'])
+
     def test_default(self):
         """Test default value for StringOption."""
         self.assertEqual(self.opt.default, '')
@@ -427,6 +1036,26 @@ class TestIntOption(unittest.TestCase):
         parser.readfp(config)
         self.assertRaises(ValueError, parser.values)
 
+    def test_parse_many(self):
+        """Test IntOption parse_many."""
+        opt = self.cls()
+        self.assertEqual(opt.parse_many(['1', ' 2', '-3']), [1, 2, -3])
+        self.assertEqual(opt.parse_many(['1', 'x'], raw=True), ['1', 'x'])
+        self.assertRaises(ValueError, opt.parse_many, ['1', 'x'])
+
+    def test_parse_many_overridden_parse(self):
+        """Test IntOption parse_many uses an overridden parse."""
+        class PortOption(self.cls):
+            def parse(self, value, raw=False):
+                value = super(PortOption, self).parse(value, raw=raw)
+                if not raw and not 0 < value < 65536:
+                    raise ValueError("Invalid port %d" % value)
+                return value
+
+        opt = PortOption()
+        self.assertEqual(opt.parse_many(['80', '443']), [80, 443])
+        self.assertRaises(ValueError, opt.parse_many, ['80', '0'])
+
     def test_default(self):
         """Test IntOption default value."""
         opt = self.cls()
@@ -478,6 +1107,19 @@ class TestBoolOption(unittest.TestCase):
         parser.readfp(config)
         self.assertRaises(ValueError, parser.values)
 
+    def test_parse_many(self):
+        """Test BoolOption parse_many."""
+        opt = self.cls()
+        self.assertEqual(opt.parse_many(['Yes', 'off', '1', 'FALSE']),
+                         [True, False, True, False])
+        self.assertEqual(opt.parse_many(['bla'], raw=True), ['bla'])
+        try:
+            opt.parse_many(['yes', 'bla'])
+        except ValueError as e:
+            self.assertEqual(str(e), "Unable to determine boolosity of 'bla'")
+        else:
+            self.fail('ValueError not raised')
+
     def test_default(self):
         """Test BoolOption default value."""
         opt = self.cls()
@@ -693,6 +1335,67 @@ class TestListOption(unittest.TestCase):
         self.assertEqual(result, text_type(expected))
 
 
+    def test_parse_json_only_if_list(self):
+        """Test ListOption only decodes values that may hold a json list."""
+        codec = Mock(wraps=json)
+        opt = self.cls(item=IntOption(), json_codec=codec)
+        self.assertEqual(opt.parse('1\n2'), [1, 2])
+        self.assertEqual(opt.parse('{"a": 1}\n', raw=True), ['{"a": 1}'])
+        self.assertFalse(codec.loads.called)
+        self.assertEqual(opt.parse('  [1, 2]'), [1, 2])
+        self.assertEqual(codec.loads.call_count, 1)
+
+    def test_remove_duplicates_unhashable(self):
+        """Test ListOption remove duplicates of unhashable items."""
+        opt = self.cls(remove_duplicates=True)
+        value = opt.parse('[{"a": 1}, "b", {"a": 1}, "b", [1], [1], 1]')
+        self.assertEqual(value, [{'a': 1}, 'b', [1], 1])
+
+    def test_json_codec(self):
+        """Test ListOption uses its json codec for parsing and encoding."""
+        codec = Mock(loads=Mock(return_value=['x']),
+                     dumps=Mock(return_value=b'["x"]'))
+        opt = self.cls(json_codec=codec)
+        self.assertEqual(opt.parse('["a"]'), ['x'])
+        codec.loads.assert_called_once_with('["a"]')
+        self.assertEqual(opt.to_string(['a']), '["x"]')
+        codec.dumps.assert_called_once_with(['a'])
+
+    def test_parser_json_codec(self):
+        """Test ListOption uses the parser's json codec."""
+        class MySchema(Schema):
+            foo = self.cls()
+            bar = self.cls(json_codec=json)
+
+        codec = Mock(wraps=json)
+        parser = SchemaConfigParser(MySchema(), json_codec=codec)
+        parser.readfp(BytesIO(b'[__main__]\nfoo = ["a"]\nbar = ["b"]'))
+        self.assertEqual(parser.values(),
+                         {'__main__': {'foo': ['a'], 'bar': ['b']}})
+        codec.loads.assert_called_once_with('["a"]')
+        parser.set('__main__', 'foo', ['c'])
+        codec.dumps.assert_called_once_with(['c'])
+
+    def test_overridden_methods_without_parser(self):
+        """Test subclasses overriding parse and to_string get no parser."""
+        class CsvList(self.cls):
+            __slots__ = ()
+
+            def parse(self, value, raw=False):
+                return value.split(',')
+
+            def to_string(self, value):
+                return ','.join(value)
+
+        class MySchema(Schema):
+            foo = CsvList()
+
+        parser = SchemaConfigParser(MySchema())
+        parser.readfp(BytesIO(b'[__main__]\nfoo = a,b'))
+        self.assertEqual(parser.get('__main__', 'foo'), ['a', 'b'])
+        parser.set('__main__', 'foo', ['c', 'd'])
+        self.assertEqual(parser.get('__main__', 'foo', parse=False), 'c,d')
+
 class TestTupleOption(unittest.TestCase):
     cls = TupleOption
 
@@ -701,6 +1404,14 @@ class TestTupleOption(unittest.TestCase):
         opt = self.cls(length=2)
         self.assertEqual(opt.length, 2)
 
+    def test_parse_many(self):
+        """Test TupleOption parse_many."""
+        opt = self.cls(length=2)
+        self.assertEqual(opt.parse_many(['a, b', '()', 'c,d']),
+                         [('a', 'b'), (), ('c', 'd')])
+        self.assertRaises(ValueError, opt.parse_many, ['a, b', 'c'])
+        self.assertEqual(self.cls().parse_many(['a,b,c']), [('a', 'b', 'c')])
+
     def test_init_no_length(self):
         """Test TupleOption default attribute values."""
         opt = self.cls()
@@ -794,6 +1505,20 @@ class TestDictOption(unittest.TestCase):
         self.assertEqual(opt.spec, spec)
         self.assertEqual(opt.strict, True)
 
+    def test_parse_many_per_option(self):
+        """Test DictOption parses the items of each option all at once."""
+        opt = self.cls(spec={'a': IntOption(), 'b': BoolOption()},
+                       item=IntOption())
+        parser = SchemaConfigParser(Schema())
+        parser.readfp(BytesIO(b"[mydict]\na = 1\nb = yes\nc = 2\nd = 3"))
+        with patch.object(IntOption, 'parse_many',
+                          side_effect=IntOption.parse_many,
+                          autospec=True) as mock_parse_many:
+            value = opt.parse('mydict', parser)
+        self.assertEqual(value, {'a': 1, 'b': True, 'c': 2, 'd': 3})
+        # a, c and d share the same (interned) option
+        self.assertEqual(mock_parse_many.call_count, 1)
+
     def test_get_extra_sections(self):
         """Test DictOption get_extra_sections."""
         class MySchema(Schema):
@@ -1162,6 +1887,25 @@ wham=42
         self.assertEqual(result, text_type({'foo': '1'}))
 
 
+    def test_json_codec(self):
+        """Test DictOption uses its json codec for parsing and encoding."""
+        codec = Mock(wraps=json)
+        opt = self.cls(spec={'a': IntOption()}, json_codec=codec)
+        parser = SchemaConfigParser(Schema())
+        self.assertEqual(opt.parse(' {"a": 1}', parser), {'a': 1})
+        codec.loads.assert_called_once_with(' {"a": 1}')
+        self.assertEqual(opt.to_string({'a': 1}), '{"a": 1}')
+        codec.dumps.assert_called_once_with({'a': 1})
+
+    def test_parse_json_only_if_dict(self):
+        """Test DictOption only decodes values that may hold a json dict."""
+        codec = Mock(wraps=json)
+        opt = self.cls(json_codec=codec)
+        parser = SchemaConfigParser(Schema())
+        parser.readfp(BytesIO(b"[mydict]\nfoo = bar"))
+        self.assertEqual(opt.parse('mydict', parser), {'foo': 'bar'})
+        self.assertFalse(codec.loads.called)
+
 class TestListOfDictOption(unittest.TestCase):
     def test_parse_lines_of_dict(self):
         """Test ListOption parse a list of dicts."""
@@ -1288,6 +2032,17 @@ class TestSection(unittest.TestCase):
         self.assertEqual(section1, section2)
         self.assertEqual(hash(section1), hash(section2))
 
+    def test_fingerprint_memoized(self):
+        """Test Section fingerprint is remembered until the section
+        changes."""
+        section = self.cls(name='foo')
+        fingerprint = section.fingerprint()
+        self.assertTrue(section.fingerprint() is fingerprint)
+        section.bar = IntOption(name='bar')
+        self.assertNotEqual(section.fingerprint(), fingerprint)
+        del section.bar
+        self.assertEqual(section.fingerprint(), fingerprint)
+
     def test_repr(self):
         """Test Section repr."""
         section1 = self.cls()
@@ -1384,3 +2139,67 @@ class MultiSchemaTestCase(unittest.TestCase):
         except SchemaValidationError as e:
             self.assertEqual(text_type(e),
                 "Conflicting option '__main__.foo' while merging schemas.")
+
+    def test_merge_schemas_multiple_conflicts(self):
+        class SchemaA(Schema):
+            foo = IntOption()
+
+            class bar(Section):
+                baz = IntOption()
+
+        class SchemaB(Schema):
+            foo = BoolOption()
+
+            class bar(Section):
+                baz = BoolOption()
+
+        try:
+            merge(SchemaA, SchemaB)
+            self.fail('SchemaValidationError not raised.')
+        except SchemaValidationError as e:
+            self.assertEqual(text_type(e),
+                "Conflicting options '__main__.foo', 'bar.baz' while "
+                "merging schemas.")
+
+    def test_merge_schemas_memoized(self):
+        class SchemaA(Schema):
+            foo = IntOption()
+
+        class SchemaB(Schema):
+            class bar(Section):
+                baz = BoolOption()
+
+        merged = merge(SchemaA, SchemaB)
+        self.assertTrue(merge(SchemaA, SchemaB) is merged)
+        self.assertFalse(merge(SchemaB, SchemaA) is merged)
+
+    def test_merge_schemas_memoized_invalidated(self):
+        class SchemaA(Schema):
+            foo = IntOption()
+
+        class SchemaB(Schema):
+            bar = BoolOption()
+
+        merged = merge(SchemaA, SchemaB)
+        SchemaA.baz = IntOption()
+        other = merge(SchemaA, SchemaB)
+        self.assertFalse(other is merged)
+        self.assertEqual(other().option_names(), set(['foo', 'bar', 'baz']))
+
+        # modifying the merged schema doesn't affect further merges
+        other.wham = IntOption()
+        self.assertEqual(merge(SchemaA, SchemaB)().option_names(),
+                         set(['foo', 'bar', 'baz']))
+
+    def test_merge_does_not_modify_schemas(self):
+        class SchemaA(Schema):
+            class foo(Section):
+                bar = IntOption()
+
+        class SchemaB(Schema):
+            class foo(Section):
+                baz = BoolOption()
+
+        merge(SchemaA, SchemaB)
+        self.assertEqual(SchemaA().option_names(), set(['bar']))
+        self.assertEqual(SchemaB().option_names(), set(['baz']))
@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+###############################################################################
+#
+# configglue -- glue for your apps' configuration
+#
+# A library for simple, DRY configuration of applications
+#
+# (C) 2009--2013 by Canonical Ltd.
+# by John R. Lenton <john.lenton@canonical.com>
+# and Ricardo Kirkner <ricardo.kirkner@canonical.com>
+#
+# Released under the BSD License (see the file LICENSE)
+#
+# For bug reports, support, and new releases: http://launchpad.net/configglue
+#
+###############################################################################
+
+import os
+import tempfile
+import textwrap
+import unittest
+from io import BytesIO, StringIO
+from unittest.mock import patch
+
+from configglue import _tokenizer
+from configglue._compat import (
+    DEFAULTSECT,
+    RawConfigParser,
+    configparser,
+)
+
+
+class TestTokenize(unittest.TestCase):
+    def assert_same_as_configparser(self, text):
+        parser = RawConfigParser()
+        parser._read(StringIO(text), 'foo.cfg')
+        sections, defaults, lines = _tokenizer.tokenize(text, 'foo.cfg')
+        self.assertEqual(sections, parser._sections)
+        self.assertEqual(defaults, parser._defaults)
+        return sections, defaults, lines
+
+    def test_tokenize(self):
+        text = textwrap.dedent("""
+            # comment
+            [DEFAULT]
+            baz = 0
+            [__main__]
+            foo = 1
+            Bar : a = b
+            ; another comment
+            [section]
+            multi =
+                first
+
+                second
+            # not part of the value
+                third
+
+            empty =
+            """)
+        sections, defaults, lines = self.assert_same_as_configparser(text)
+        self.assertEqual(defaults, {'baz': '0'})
+        self.assertEqual(sections['__main__'], {'foo': '1', 'bar': 'a = b'})
+        self.assertEqual(sections['section']['multi'],
+                         '\nfirst\n\nsecond\nthird')
+        self.assertEqual(lines, {
+            DEFAULTSECT: {'baz': 4},
+            '__main__': {'foo': 6, 'bar': 7},
+            'section': {'multi': 10, 'empty': 17},
+        })
+
+    def test_tokenize_optionxform(self):
+        sections, defaults, lines = _tokenizer.tokenize(
+            "[__main__]\nFoo = 1", optionxform=str)
+        self.assertEqual(sections, {'__main__': {'Foo': '1'}})
+
+    def test_tokenize_errors(self):
+        self.assertRaises(configparser.MissingSectionHeaderError,
+                          _tokenizer.tokenize, "foo = 1")
+        self.assertRaises(configparser.DuplicateSectionError,
+                          _tokenizer.tokenize, "[foo]\n[bar]\n[foo]")
+        self.assertRaises(configparser.DuplicateOptionError,
+                          _tokenizer.tokenize, "[foo]\na = 1\nA = 2")
+        try:
+            _tokenizer.tokenize("[foo]\nbar\na = 1\nbaz", 'foo.cfg')
+        except configparser.ParsingError as e:
+            self.assertEqual(e.errors, [(2, repr('bar\n')), (4, repr('baz'))])
+        else:
+            self.fail("ParsingError not raised")
+
+    def test_tokenize_lazily(self):
+        text = textwrap.dedent("""
+            [__main__]
+            foo = 1
+            [DEFAULT]
+            baz = 0
+            [section]
+            bar = a
+                b
+            [other]
+            bar = 2
+            """)
+        sections, defaults, lines = _tokenizer.tokenize_lazily(text)
+        self.assertEqual(list(sections), ['__main__', 'section', 'other'])
+        self.assertEqual(sections['__main__'], {'foo': '1'})
+        self.assertEqual(defaults, {'baz': '0'})
+        self.assertEqual(lines, {'__main__': {'foo': 3},
+                                 DEFAULTSECT: {'baz': 5}})
+        self.assertIsInstance(sections['section'], _tokenizer.LazySection)
+        self.assertEqual(sections['section'].tokenize(),
+                         ({'section': {'bar': 'a\nb'}},
+                          {'section': {'bar': 7}}))
+        self.assertEqual(sections['other'].tokenize(),
+                         ({'other': {'bar': '2'}}, {'other': {'bar': 10}}))
+
+    def test_tokenize_lazily_errors(self):
+        self.assertRaises(configparser.MissingSectionHeaderError,
+                          _tokenizer.tokenize_lazily, "foo = 1\n[foo]")
+        self.assertRaises(configparser.DuplicateSectionError,
+                          _tokenizer.tokenize_lazily, "[foo]\n[bar]\n[foo]")
+
+    def test_tokenize_lazily_ambiguous(self):
+        # an indented header can't be told apart from a continuation line
+        # without tokenizing the file
+        text = "[foo]\na = 1\n  [bar]\n[baz]\nb = 2"
+        self.assertEqual(_tokenizer.tokenize_lazily(text),
+                         _tokenizer.tokenize(text))
+
+
+class TestRead(unittest.TestCase):
+    def test_read(self):
+        fp = BytesIO('[__main__]\nfoo = €'.encode('utf-8'))
+        self.assertEqual(_tokenizer.read(fp, 'utf-8'),
+                         '[__main__]\nfoo = €')
+
+    @patch('configglue._tokenizer.MMAP_THRESHOLD', 1)
+    def test_read_mapped(self):
+        fd, filename = tempfile.mkstemp()
+        self.addCleanup(os.remove, filename)
+        os.write(fd, '[__main__]\nfoo = €'.encode('utf-8'))
+        os.close(fd)
+
+        with open(filename, 'rb') as fp:
+            with patch('configglue._tokenizer.mmap.mmap',
+                       wraps=_tokenizer.mmap.mmap) as mock_mmap:
+                text = _tokenizer.read(fp, 'utf-8')
+        self.assertEqual(text, '[__main__]\nfoo = €')
+        self.assertTrue(mock_mmap.called)